@@ -1,11 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import Any, Dict, Optional, List, Literal
+from datetime import datetime, timedelta
 import asyncio
+import csv
+import io
+import json
+import os
+import re
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, SessionLocal
+from app.pagination import (
+    clamp_limit, decode_cursor, validate_order_by, escape_like, apply_keyset, build_page
+)
 from app.services.agent_service import agent_service
+from app.services.role_query_service import role_query_service
+from app.services.lease_service import LeaseService
+from app.services.usage_service import usage_accountant, to_utc_naive, GROUP_COLUMNS
+from app.services.message_rollup_service import message_rollup_service, GROUP_BY_OPTIONS as ROLLUP_GROUP_BY_OPTIONS
+from app.services.log_partition_service import log_partition_service
+from app.services.log_archive_service import log_archive_service, GROUP_BY_OPTIONS as ARCHIVE_GROUP_BY_OPTIONS
+from app.services.log_search_service import log_search_service
+from app.workers.agent_runner import agent_controller
+from app.workers.runner_client import agent_runner_client
 from app.models.account import Account
 from app.models.agent import AgentRole, ChatGroup
 from app.models.message_log import MessageLog
@@ -13,7 +33,54 @@ from app.models.message_log import MessageLog
 router = APIRouter(prefix="/agents", tags=["agents"])
 
 # Pydantic 모델들
+class RelevanceRules(BaseModel):
+    """역할별 관련성 검사 규칙 (지정한 항목만 전역 기본값을 덮어씀, 키 설명은 relevance_gate 참고)"""
+    model_config = ConfigDict(extra="forbid")
+    
+    enabled: Optional[bool] = None
+    require_mention: Optional[bool] = None
+    keywords: Optional[List[str]] = None
+    patterns: Optional[List[str]] = None
+    min_length: Optional[int] = Field(default=None, ge=0)
+    skip_commands: Optional[bool] = None
+    skip_media: Optional[bool] = None
+    classifier: Optional[bool] = None
+    threshold: Optional[float] = Field(default=None, ge=0, le=1)
+    on_fail: Optional[Literal["drop", "context"]] = None
+    
+    @field_validator("patterns")
+    @classmethod
+    def compile_patterns(cls, patterns: Optional[List[str]]) -> Optional[List[str]]:
+        """정규식이 올바른지 저장 전에 확인 (잘못된 패턴으로 메시지가 모두 무시되지 않도록)"""
+        for pattern in patterns or []:
+            try:
+                re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"잘못된 정규식 '{pattern}': {e}")
+        return patterns
+    
+    def to_rules(self) -> Dict[str, Any]:
+        """agent_roles.relevance_rules에 저장할 값 (지정한 항목만)"""
+        return self.model_dump(exclude_none=True)
+
+class ModelRouting(BaseModel):
+    """역할별 모델 라우팅 설정 (지정한 항목만 전역 기본값을 덮어씀, 키 설명은 openai_service 참고)"""
+    model_config = ConfigDict(extra="forbid", protected_namespaces=())  # model 필드 허용
+    
+    model: Optional[str] = Field(default=None, min_length=1)
+    fast_model: Optional[str] = Field(default=None, min_length=1)
+    complex_model: Optional[str] = Field(default=None, min_length=1)
+    complex_length: Optional[int] = Field(default=None, ge=0)
+    complex_roles: Optional[List[str]] = None
+    route_questions: Optional[bool] = None
+    
+    def to_rules(self) -> Dict[str, Any]:
+        """agent_roles.model_routing에 저장할 값 (지정한 항목만)"""
+        return self.model_dump(exclude_none=True)
+
 class RoleCreateRequest(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())  # model_routing 필드 허용
+    
     account_id: int
     chat_id: int
     role_name: str
@@ -21,13 +88,21 @@ class RoleCreateRequest(BaseModel):
     openai_api_key: Optional[str] = None
     response_delay_ms: Optional[int] = 0
     max_response_length: Optional[int] = 500
+    relevance_rules: Optional[RelevanceRules] = None
+    model_routing: Optional[ModelRouting] = None
+    daily_token_budget: Optional[int] = None
 
 class RoleUpdateRequest(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())  # model_routing 필드 허용
+    
     role_name: Optional[str] = None
     persona: Optional[str] = None
     openai_api_key: Optional[str] = None
     response_delay_ms: Optional[int] = None
     max_response_length: Optional[int] = None
+    relevance_rules: Optional[RelevanceRules] = None
+    model_routing: Optional[ModelRouting] = None
+    daily_token_budget: Optional[int] = None
     is_active: Optional[bool] = None
 
 class AccountCreateRequest(BaseModel):
@@ -40,12 +115,26 @@ class AccountCreateRequest(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
 
+def get_agent_controller():
+    """에이전트 런타임 제어 객체 (remote 모드에서는 별도 러너 프로세스로 명령 전달)"""
+    if settings.AGENT_RUNNER_MODE == "remote":
+        return agent_runner_client
+    return agent_controller
+
+async def notify_role_change(account_id: int):
+    """실행 중인 에이전트에 역할 변경 반영 요청"""
+    try:
+        await get_agent_controller().reload_roles(account_id)
+    except ConnectionError as e:
+        print(f"Failed to notify role change for account {account_id}: {e}")
+
 @router.post("/start")
-async def start_all_agents(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def start_all_agents():
     """모든 활성 에이전트 시작"""
     try:
-        background_tasks.add_task(agent_service.start_all_agents, db)
-        return {"success": True, "message": "에이전트 시작 요청이 처리되었습니다."}
+        return await get_agent_controller().start()
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"에이전트 시작 실패: {str(e)}")
 
@@ -53,23 +142,208 @@ async def start_all_agents(background_tasks: BackgroundTasks, db: Session = Depe
 async def stop_all_agents():
     """모든 에이전트 중지"""
     try:
-        await agent_service.stop_all_agents()
-        return {"success": True, "message": "모든 에이전트가 중지되었습니다."}
+        return await get_agent_controller().stop()
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"에이전트 중지 실패: {str(e)}")
 
+@router.post("/rebalance")
+async def rebalance_agents():
+    """계정 재동기화 요청 (계정 추가/비활성화 즉시 반영)"""
+    try:
+        result = await get_agent_controller().rebalance()
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
 @router.get("/status")
 async def get_agents_status():
     """활성 에이전트 상태 조회"""
     try:
-        active_agents = agent_service.get_active_agents()
+        return await get_agent_controller().status()
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"상태 조회 실패: {str(e)}")
+
+@router.get("/models")
+async def get_model_metrics():
+    """모델별 라우팅/지연 시간/토큰 통계"""
+    try:
+        return await get_agent_controller().models()
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"모델 통계 조회 실패: {str(e)}")
+
+@router.get("/keys")
+async def get_api_keys():
+    """공유 OpenAI API 키 풀 사용량 (키는 마스킹)"""
+    try:
+        return await get_agent_controller().keys()
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"API 키 상태 조회 실패: {str(e)}")
+
+@router.get("/usage")
+async def get_llm_usage(hours: int = 24, group_by: str = "role",
+                        since: Optional[datetime] = None, until: Optional[datetime] = None,
+                        db: Session = Depends(get_db)):
+    """LLM 토큰/비용 사용량 (group_by: role, account, model, key / 기본 최근 24시간, 1시간 단위 추이 포함)"""
+    if group_by not in GROUP_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"group_by는 {', '.join(GROUP_COLUMNS)} 중 하나여야 합니다.")
+    try:
+        # 집계 구간은 UTC naive 기준 (timezone 포함 입력은 UTC로 변환)
+        since = to_utc_naive(since) if since else datetime.utcnow() - timedelta(hours=hours)
+        until = to_utc_naive(until) if until else None
         return {
             "success": True,
-            "active_agents": active_agents,
-            "total_agents": len(active_agents)
+            "since": since,
+            "until": until,
+            **usage_accountant.summarize(db, since, group_by, until)
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"상태 조회 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"사용량 조회 실패: {str(e)}")
+
+@router.get("/analytics")
+async def get_message_analytics(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    hours: int = 24,
+    role_id: Optional[int] = None,
+    chat_id: Optional[int] = None,
+    group_by: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """시간대별 집계 기반 처리량과 응답 시간 p50/p95/p99 (group_by: role, chat, hour)"""
+    if group_by is not None and group_by not in ROLLUP_GROUP_BY_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"group_by는 {', '.join(ROLLUP_GROUP_BY_OPTIONS)} 중 하나여야 합니다.")
+    try:
+        # 집계 시간대는 UTC naive 기준 (timezone 포함 입력은 UTC로 변환)
+        until = to_utc_naive(until) if until else datetime.utcnow()
+        since = to_utc_naive(since) if since else until - timedelta(hours=hours)
+        return {
+            "success": True,
+            "since": since,
+            "until": until,
+            **message_rollup_service.analyze(db, since, until, role_id, chat_id, group_by)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 조회 실패: {str(e)}")
+
+@router.post("/analytics/rebuild")
+async def rebuild_message_analytics(since: datetime, until: Optional[datetime] = None,
+                                    db: Session = Depends(get_db)):
+    """기간 내 원본 로그로 시간대별 집계 다시 계산"""
+    try:
+        until = to_utc_naive(until) if until else datetime.utcnow()
+        processed = message_rollup_service.rebuild(db, to_utc_naive(since), until)
+        return {"success": True, "processed_logs": processed}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"집계 재계산 실패: {str(e)}")
+
+@router.get("/logs/partitions")
+async def get_log_partitions(db: Session = Depends(get_db)):
+    """메시지 로그 파티션(SQLite는 월별 행 수)과 아카이브 파일 목록"""
+    try:
+        archive_dir = settings.MESSAGE_LOG_ARCHIVE_DIR
+        archives = sorted(os.listdir(archive_dir)) if os.path.isdir(archive_dir) else []
+        return {
+            "success": True,
+            "partitioned": log_partition_service.is_partitioned(db),
+            "retention_months": settings.MESSAGE_LOG_RETENTION_MONTHS,
+            "partitions": log_partition_service.list_partitions(db),
+            "archives": [name for name in archives if not name.endswith(".tmp")],
+            "last_maintenance": log_partition_service.last_run
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"파티션 조회 실패: {str(e)}")
+
+@router.post("/logs/maintenance")
+async def run_log_maintenance():
+    """파티션 미리 생성과 보관 기간이 지난 로그 아카이브 즉시 실행"""
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, log_partition_service.run_maintenance)
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"로그 관리 실패: {str(e)}")
+
+@router.get("/logs/search")
+async def search_logs(
+    q: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    role_id: Optional[int] = None,
+    chat_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """메시지/응답 내용 전문 검색 (관련도순, (score, id) 커서 페이지네이션)"""
+    try:
+        limit = clamp_limit(limit)
+        after = decode_cursor(cursor, "score")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        rows = log_search_service.search(db, q, limit, after, role_id, chat_id, user_id, since, until)
+        log_list, next_cursor = build_page(rows, limit, "score")
+        return {
+            "success": True,
+            "logs": log_list,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"로그 검색 실패: {str(e)}")
+
+@router.get("/logs/archive")
+async def query_log_archive(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    role_id: Optional[int] = None,
+    chat_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    group_by: Optional[str] = None,
+    limit: int = 0
+):
+    """컬럼형 아카이브 조회 (행 수/응답 시간 백분위 집계, group_by: role, chat, day / limit > 0 이면 최신 행 포함)"""
+    if group_by is not None and group_by not in ARCHIVE_GROUP_BY_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"group_by는 {', '.join(ARCHIVE_GROUP_BY_OPTIONS)} 중 하나여야 합니다.")
+    limit = clamp_limit(limit) if limit > 0 else 0
+    # 아카이브의 날짜/시각은 UTC naive 기준 (timezone 포함 입력은 UTC로 변환)
+    since = to_utc_naive(since) if since else None
+    until = to_utc_naive(until) if until else None
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: log_archive_service.query(since, until, role_id, chat_id, user_id, group_by, limit)
+        )
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"아카이브 조회 실패: {str(e)}")
+
+@router.get("/leases")
+async def get_account_leases(db: Session = Depends(get_db)):
+    """노드별 계정 임대 현황"""
+    try:
+        lease_service = agent_service.lease_service or LeaseService()
+        return {
+            "success": True,
+            "enabled": settings.AGENT_LEASES_ENABLED,
+            "node_id": lease_service.node_id,
+            "leases": lease_service.list_leases(db)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"임대 조회 실패: {str(e)}")
 
 @router.post("/roles")
 async def create_role(request: RoleCreateRequest, db: Session = Depends(get_db)):
@@ -89,8 +363,12 @@ async def create_role(request: RoleCreateRequest, db: Session = Depends(get_db))
             openai_api_key=request.openai_api_key,
             response_delay_ms=request.response_delay_ms,
             max_response_length=request.max_response_length,
+            relevance_rules=request.relevance_rules.to_rules() if request.relevance_rules else None,
+            model_routing=request.model_routing.to_rules() if request.model_routing else None,
+            daily_token_budget=request.daily_token_budget,
             db=db
         )
+        await notify_role_change(request.account_id)
         
         return {
             "success": True,
@@ -108,37 +386,21 @@ async def create_role(request: RoleCreateRequest, db: Session = Depends(get_db))
         raise HTTPException(status_code=400, detail=f"역할 생성 실패: {str(e)}")
 
 @router.get("/accounts/{account_id}/roles")
-async def get_account_roles(account_id: int, db: Session = Depends(get_db)):
-    """계정의 모든 역할 조회"""
+async def get_account_roles(account_id: int, include_persona: bool = False, db: Session = Depends(get_db)):
+    """계정의 모든 역할 조회 (persona는 include_persona=true일 때만 포함)"""
     try:
-        roles = db.query(AgentRole).join(ChatGroup).filter(
-            AgentRole.account_id == account_id
-        ).all()
-        
-        role_list = []
-        for role in roles:
-            role_list.append({
-                "id": role.id,
-                "role_name": role.role_name,
-                "persona": role.persona,
-                "chat_id": role.chat_group.chat_id,
-                "chat_title": role.chat_group.chat_title,
-                "is_active": role.is_active,
-                "response_delay_ms": role.response_delay_ms,
-                "max_response_length": role.max_response_length,
-                "created_at": role.created_at
-            })
-        
-        return {"success": True, "roles": role_list}
+        roles = role_query_service.list_account_roles(db, account_id, include_persona)
+        return {"success": True, "roles": roles}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"역할 조회 실패: {str(e)}")
 
 @router.put("/roles/{role_id}")
-async def update_role(role_id: int, request: RoleUpdateRequest, db: Session = Depends(get_db)):
+async def update_role(role_id: int, request: RoleUpdateRequest, include_persona: bool = False,
+                      db: Session = Depends(get_db)):
     """역할 정보 수정"""
     try:
-        role = db.query(AgentRole).filter(AgentRole.id == role_id).first()
-        if not role:
+        # 없는 역할이면 아무것도 쓰기 전에 404
+        if not role_query_service.get_role(db, role_id):
             raise HTTPException(status_code=404, detail="역할을 찾을 수 없습니다.")
         
         # 업데이트할 필드들
@@ -153,107 +415,239 @@ async def update_role(role_id: int, request: RoleUpdateRequest, db: Session = De
             update_data["response_delay_ms"] = request.response_delay_ms
         if request.max_response_length is not None:
             update_data["max_response_length"] = request.max_response_length
+        if request.relevance_rules is not None:
+            update_data["relevance_rules"] = request.relevance_rules.to_rules()
+        if request.model_routing is not None:
+            update_data["model_routing"] = request.model_routing.to_rules()
+        if request.daily_token_budget is not None:
+            update_data["daily_token_budget"] = request.daily_token_budget or None  # 0이면 한도 해제
         if request.is_active is not None:
             update_data["is_active"] = request.is_active
         
         # 데이터베이스 업데이트
-        for key, value in update_data.items():
-            setattr(role, key, value)
+        role_query_service.update_role(db, role_id, update_data)
         
-        db.commit()
-        db.refresh(role)
+        role = role_query_service.get_role(db, role_id, include_persona)
+        if not role:
+            raise HTTPException(status_code=404, detail="역할을 찾을 수 없습니다.")
         
-        # 활성 클라이언트의 역할 정보도 업데이트
-        if role.account_id in agent_service.active_clients:
-            chat_id = role.chat_group.chat_id
-            if chat_id in agent_service.role_handlers.get(role.account_id, {}):
-                agent_service.role_handlers[role.account_id][chat_id].update({
-                    "role_name": role.role_name,
-                    "persona": role.persona,
-                    "openai_api_key": role.openai_api_key,
-                    "response_delay_ms": role.response_delay_ms,
-                    "max_response_length": role.max_response_length
-                })
+        # 실행 중인 에이전트의 역할 정보도 업데이트
+        await notify_role_change(role["account_id"])
+        
+        role_response = {
+            "id": role["id"],
+            "role_name": role["role_name"],
+            "is_active": role["is_active"]
+        }
+        if include_persona:
+            role_response["persona"] = role["persona"]
         
         return {
             "success": True,
-            "role": {
-                "id": role.id,
-                "role_name": role.role_name,
-                "persona": role.persona,
-                "is_active": role.is_active
-            }
+            "role": role_response
         }
     except HTTPException:
         raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=400, detail=f"역할 수정 실패: {str(e)}")
 
 @router.delete("/roles/{role_id}")
 async def delete_role(role_id: int, db: Session = Depends(get_db)):
     """역할 삭제"""
     try:
-        role = db.query(AgentRole).filter(AgentRole.id == role_id).first()
+        role = role_query_service.get_role(db, role_id)
         if not role:
             raise HTTPException(status_code=404, detail="역할을 찾을 수 없습니다.")
         
-        # 활성 클라이언트에서 역할 제거
-        if role.account_id in agent_service.active_clients:
-            chat_id = role.chat_group.chat_id
-            if chat_id in agent_service.role_handlers.get(role.account_id, {}):
-                del agent_service.role_handlers[role.account_id][chat_id]
+        role_query_service.delete_role(db, role_id)
         
-        db.delete(role)
-        db.commit()
+        # 실행 중인 에이전트에서 역할 제거
+        await notify_role_change(role["account_id"])
         
         return {"success": True, "message": "역할이 삭제되었습니다."}
     except HTTPException:
         raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=400, detail=f"역할 삭제 실패: {str(e)}")
 
+LOG_COLUMNS = (
+    MessageLog.id,
+    MessageLog.chat_id,
+    MessageLog.user_id,
+    MessageLog.message_text,
+    MessageLog.response_text,
+    MessageLog.response_time_ms,
+    MessageLog.queue_wait_ms,
+    MessageLog.llm_ms,
+    MessageLog.delay_ms,
+    MessageLog.send_ms,
+    MessageLog.model,
+    MessageLog.prompt_tokens,
+    MessageLog.completion_tokens,
+    MessageLog.role_used,
+    MessageLog.created_at
+)
+LOG_EXPORT_CHUNK_SIZE = 1000
+
+def _role_logs_query(db: Session, role_id: int, chat_id: Optional[int] = None,
+                     since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """역할별 로그 조회 쿼리 (필터 적용, since 미지정 시 보관 기간 내 파티션만 조회)"""
+    query = db.query(*LOG_COLUMNS).filter(MessageLog.agent_role_id == role_id)
+    if chat_id is not None:
+        query = query.filter(MessageLog.chat_id == chat_id)
+    if since is None:
+        cutoff = log_partition_service.retention_cutoff()
+        since = datetime.combine(cutoff, datetime.min.time()) if cutoff else None
+    if since is not None:
+        query = query.filter(MessageLog.created_at >= since)
+    if until is not None:
+        query = query.filter(MessageLog.created_at < until)
+    return query
+
 @router.get("/roles/{role_id}/logs")
-async def get_role_logs(role_id: int, limit: int = 50, db: Session = Depends(get_db)):
-    """역할별 메시지 로그 조회"""
+async def get_role_logs(
+    role_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    chat_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """역할별 메시지 로그 조회 (최신순, (created_at, id) 커서 페이지네이션)"""
     try:
-        logs = db.query(MessageLog).filter(
-            MessageLog.agent_role_id == role_id
-        ).order_by(MessageLog.created_at.desc()).limit(limit).all()
-        
-        log_list = []
-        for log in logs:
-            log_list.append({
-                "id": log.id,
-                "chat_id": log.chat_id,
-                "user_id": log.user_id,
-                "message_text": log.message_text,
-                "response_text": log.response_text,
-                "response_time_ms": log.response_time_ms,
-                "role_used": log.role_used,
-                "created_at": log.created_at
-            })
+        limit = clamp_limit(limit)
+        after = decode_cursor(cursor, "created_at")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        query = _role_logs_query(db, role_id, chat_id, since, until)
+        rows = [
+            dict(row._mapping)
+            for row in apply_keyset(query, MessageLog, "created_at", after, limit, descending=True).all()
+        ]
+        log_list, next_cursor = build_page(rows, limit, "created_at")
         
-        return {"success": True, "logs": log_list}
+        return {
+            "success": True,
+            "logs": log_list,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"로그 조회 실패: {str(e)}")
 
+@router.get("/roles/{role_id}/logs/export")
+async def export_role_logs(
+    role_id: int,
+    format: str = "ndjson",
+    chat_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """역할별 메시지 로그 내보내기 (NDJSON/CSV 스트리밍, 오래된 순)"""
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format은 ndjson 또는 csv여야 합니다.")
+    
+    field_names = [column.key for column in LOG_COLUMNS]
+    
+    def iter_chunks():
+        # 스트리밍 동안 유지되는 전용 세션, 청크 단위 keyset 조회로 메모리 사용량 일정
+        db = SessionLocal()
+        try:
+            after = None
+            while True:
+                query = _role_logs_query(db, role_id, chat_id, since, until)
+                rows = apply_keyset(query, MessageLog, "created_at", after, None)
+                rows = rows.limit(LOG_EXPORT_CHUNK_SIZE).all()
+                if not rows:
+                    break
+                yield [dict(row._mapping) for row in rows]
+                if len(rows) < LOG_EXPORT_CHUNK_SIZE:
+                    break
+                last = rows[-1]
+                after = {"id": last.id, "created_at": last.created_at.isoformat()}
+        finally:
+            db.close()
+    
+    def stream_ndjson():
+        for chunk in iter_chunks():
+            yield "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in chunk)
+    
+    def stream_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=field_names)
+        writer.writeheader()
+        for chunk in iter_chunks():
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    filename = f"role_{role_id}_logs.{format}"
+    if format == "csv":
+        return StreamingResponse(
+            stream_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    return StreamingResponse(
+        stream_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @router.get("/chats")
-async def get_chat_groups(db: Session = Depends(get_db)):
-    """모든 채팅방 조회"""
+async def get_chat_groups(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    is_active: Optional[bool] = None,
+    title_prefix: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db)
+):
+    """채팅방 목록 조회 (커서 기반 페이지네이션)"""
+    try:
+        limit = clamp_limit(limit)
+        order_by = validate_order_by(order_by)
+        after = decode_cursor(cursor, order_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        chats = db.query(ChatGroup).all()
+        query = db.query(
+            ChatGroup.id,
+            ChatGroup.chat_id,
+            ChatGroup.chat_title,
+            ChatGroup.chat_type,
+            ChatGroup.is_active,
+            ChatGroup.created_at
+        )
+        
+        if is_active is not None:
+            query = query.filter(ChatGroup.is_active == is_active)
+        if title_prefix:
+            query = query.filter(ChatGroup.chat_title.like(f"{escape_like(title_prefix)}%", escape="\\"))
+        
+        total = query.count() if include_total else None
         
-        chat_list = []
-        for chat in chats:
-            chat_list.append({
-                "id": chat.id,
-                "chat_id": chat.chat_id,
-                "chat_title": chat.chat_title,
-                "chat_type": chat.chat_type,
-                "is_active": chat.is_active,
-                "created_at": chat.created_at
-            })
+        rows = [dict(row._mapping) for row in apply_keyset(query, ChatGroup, order_by, after, limit).all()]
+        chat_list, next_cursor = build_page(rows, limit, order_by)
         
-        return {"success": True, "chats": chat_list}
+        response = {
+            "success": True,
+            "chats": chat_list,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+        if include_total:
+            response["total"] = total
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"채팅방 조회 실패: {str(e)}")
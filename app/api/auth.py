@@ -4,9 +4,13 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 
 from app.database import get_db
+from app.pagination import (
+    clamp_limit, decode_cursor, validate_order_by, escape_like, apply_keyset, build_page
+)
 from app.models.account import Account
 from app.services.telegram_auth_service import telegram_auth_service
 from app.services.supabase_service import supabase_service
+from app.api.telegram_auth import AuthStartRequest, CodeVerifyRequest, TwoFactorRequest
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
@@ -69,25 +73,61 @@ async def create_account(request: AccountCreateRequest, db: Session = Depends(ge
         raise HTTPException(status_code=400, detail=f"계정 생성 실패: {str(e)}")
 
 @router.get("/")
-async def get_accounts(db: Session = Depends(get_db)):
-    """모든 계정 조회"""
+async def get_accounts(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    phone_prefix: Optional[str] = None,
+    username_prefix: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db)
+):
+    """계정 목록 조회 (커서 기반 페이지네이션)"""
     try:
-        accounts = db.query(Account).all()
+        limit = clamp_limit(limit)
+        order_by = validate_order_by(order_by)
+        after = decode_cursor(cursor, order_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        query = db.query(
+            Account.id,
+            Account.phone_number,
+            Account.username,
+            Account.first_name,
+            Account.last_name,
+            Account.is_verified,
+            Account.is_active,
+            Account.created_at
+        )
         
-        account_list = []
-        for account in accounts:
-            account_list.append({
-                "id": account.id,
-                "phone_number": account.phone_number,
-                "username": account.username,
-                "first_name": account.first_name,
-                "last_name": account.last_name,
-                "is_verified": account.is_verified,
-                "is_active": account.is_active,
-                "created_at": account.created_at
-            })
+        # 서버 측 필터
+        if is_active is not None:
+            query = query.filter(Account.is_active == is_active)
+        if is_verified is not None:
+            query = query.filter(Account.is_verified == is_verified)
+        if phone_prefix:
+            query = query.filter(Account.phone_number.like(f"{escape_like(phone_prefix)}%", escape="\\"))
+        if username_prefix:
+            query = query.filter(Account.username.like(f"{escape_like(username_prefix)}%", escape="\\"))
+        
+        total = query.count() if include_total else None
+        
+        rows = [dict(row._mapping) for row in apply_keyset(query, Account, order_by, after, limit).all()]
+        account_list, next_cursor = build_page(rows, limit, order_by)
         
-        return {"success": True, "accounts": account_list}
+        response = {
+            "success": True,
+            "accounts": account_list,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+        if include_total:
+            response["total"] = total
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"계정 조회 실패: {str(e)}")
 
@@ -340,14 +380,34 @@ async def create_account_supabase(request: AccountCreateRequest):
         raise HTTPException(status_code=400, detail=f"계정 생성 실패: {str(e)}")
 
 @router.get("/accounts")
-async def get_accounts_supabase():
-    """모든 계정 조회"""
+async def get_accounts_supabase(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    is_active: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    phone_prefix: Optional[str] = None,
+    username_prefix: Optional[str] = None,
+    include_total: bool = False
+):
+    """계정 목록 조회 (커서 기반 페이지네이션)"""
     try:
-        accounts = await supabase_service.get_all_accounts()
+        page = await supabase_service.list_accounts(
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            include_total=include_total,
+            is_active=is_active,
+            is_verified=is_verified,
+            phone_prefix=phone_prefix,
+            username_prefix=username_prefix
+        )
         return {
             "success": True,
-            "accounts": accounts
+            **page
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"계정 조회 실패: {str(e)}")
 
@@ -16,3 +16,10 @@ async def health_check():
 async def ping():
     """간단한 ping 응답"""
     return {"message": "pong", "timestamp": datetime.utcnow().isoformat()}
+
+
+@router.get("/cache")
+async def cache_stats():
+    """계정 조회 캐시 적중률"""
+    from app.services.supabase_service import supabase_service
+    return {"success": True, "cache": supabase_service.get_cache_stats()}
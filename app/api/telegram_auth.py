@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List
+import json
 
-from app.services.telegram_auth_service import telegram_auth_service
+from app.services.telegram_auth_service import telegram_auth_service, MAX_CONNECTION_TEST_CONCURRENCY
 from app.services.supabase_service import supabase_service
 
 router = APIRouter(prefix="/telegram-auth", tags=["telegram-authentication"])
@@ -21,6 +23,11 @@ class TwoFactorRequest(BaseModel):
     phone_number: str
     password: str
 
+class BulkConnectionTestRequest(BaseModel):
+    account_ids: Optional[List[int]] = None  # 미지정 시 전체 계정
+    only_active: bool = True
+    concurrency: Optional[int] = Field(default=None, ge=1, le=MAX_CONNECTION_TEST_CONCURRENCY)
+
 @router.post("/start")
 async def start_auth(request: AuthStartRequest):
     """텔레그램 인증 프로세스 시작"""
@@ -87,6 +94,32 @@ async def test_connection(account_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"연결 테스트 실패: {str(e)}")
 
+@router.post("/test-connections")
+async def test_connections(request: BulkConnectionTestRequest):
+    """여러 계정 연결 테스트 (완료되는 순서대로 NDJSON 스트리밍)"""
+    async def stream():
+        async for result in telegram_auth_service.test_connections(
+            account_ids=request.account_ids,
+            only_active=request.only_active,
+            concurrency=request.concurrency
+        ):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.get("/connection-status")
+async def get_connection_status(account_ids: Optional[List[int]] = Query(None)):
+    """캐시된 연결 테스트 결과 조회 (재검사 없음)"""
+    try:
+        results = telegram_auth_service.get_cached_connections(account_ids)
+        return {
+            "success": True,
+            "results": results,
+            "expired_accounts": [r["account_id"] for r in results if r.get("session_expired")]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"연결 상태 조회 실패: {str(e)}")
+
 @router.post("/revoke-session/{account_id}")
 async def revoke_session(account_id: int):
     """세션 취소"""
@@ -15,10 +15,38 @@ class Settings:
     # OpenAI 설정
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    OPENAI_FAST_MODEL: str = os.getenv("OPENAI_FAST_MODEL", "")  # 간단한 메시지용 모델 (비우면 OPENAI_MODEL)
+    
+    # 토큰 사용량 집계 저장 주기와 모델별 1K 토큰당 가격 ("모델:입력:출력" 쉼표 구분, 기본 가격표를 덮어씀)
+    AGENT_USAGE_FLUSH_SECONDS: int = int(os.getenv("AGENT_USAGE_FLUSH_SECONDS", "60"))
+    OPENAI_MODEL_PRICES: str = os.getenv("OPENAI_MODEL_PRICES", "")
+    
+    # 역할별 키가 없는 호출의 공유 키 풀 ("키[:가중치[:분당 요청 수]]" 쉼표 구분, 비우면 OPENAI_API_KEY)
+    OPENAI_API_KEYS: str = os.getenv("OPENAI_API_KEYS", "")
+    OPENAI_KEY_QUARANTINE_SECONDS: float = float(os.getenv("OPENAI_KEY_QUARANTINE_SECONDS", "600"))
+    OPENAI_KEY_WAIT_SECONDS: float = float(os.getenv("OPENAI_KEY_WAIT_SECONDS", "10"))  # 사용 가능한 키가 없을 때 최대 대기 시간
+    
+    # LLM 장애 대응: 시도별 제한 시간, 헤징(p95 이후 두 번째 요청), 모델별 회로 차단기와 대체 모델
+    OPENAI_ATTEMPT_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_ATTEMPT_TIMEOUT_SECONDS", "20"))
+    OPENAI_HEDGE_ENABLED: bool = os.getenv("OPENAI_HEDGE_ENABLED", "False").lower() == "true"
+    OPENAI_HEDGE_MIN_DELAY_MS: float = float(os.getenv("OPENAI_HEDGE_MIN_DELAY_MS", "500"))
+    OPENAI_HEDGE_MIN_SAMPLES: int = int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", "20"))
+    OPENAI_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("OPENAI_BREAKER_FAILURE_THRESHOLD", "5"))
+    OPENAI_BREAKER_OPEN_SECONDS: float = float(os.getenv("OPENAI_BREAKER_OPEN_SECONDS", "30"))
+    OPENAI_FALLBACK_MODEL: str = os.getenv("OPENAI_FALLBACK_MODEL", "")
+    
+    # 메시지 복잡도에 따른 모델 선택 (역할별 model_routing으로 덮어쓰기 가능)
+    AGENT_MODEL_ROUTING_ENABLED: bool = os.getenv("AGENT_MODEL_ROUTING_ENABLED", "False").lower() == "true"
+    AGENT_ROUTING_COMPLEX_LENGTH: int = int(os.getenv("AGENT_ROUTING_COMPLEX_LENGTH", "200"))
+    AGENT_ROUTING_COMPLEX_ROLES: str = os.getenv("AGENT_ROUTING_COMPLEX_ROLES", "Admin")
+    # 우회 중 복구 확인 주기로도 쓰이므로 최소 1
+    AGENT_ROUTING_MIN_SAMPLES: int = max(int(os.getenv("AGENT_ROUTING_MIN_SAMPLES", "10")), 1)
+    AGENT_ROUTING_MAX_ERROR_RATE: float = float(os.getenv("AGENT_ROUTING_MAX_ERROR_RATE", "0.5"))
     
     # 텔레그램 설정
     TELEGRAM_API_ID: str = os.getenv("TELEGRAM_API_ID", "")
     TELEGRAM_API_HASH: str = os.getenv("TELEGRAM_API_HASH", "")
+    TELEGRAM_SESSION_DIR: str = os.getenv("TELEGRAM_SESSION_DIR", "")  # 설정 시 계정별 SQLite 세션 파일로 엔티티 캐시 유지
     
     # 애플리케이션 설정
     APP_NAME: str = "Telegram Agent Manager"
@@ -29,9 +57,75 @@ class Settings:
     DEFAULT_RESPONSE_DELAY_MS: int = int(os.getenv("DEFAULT_RESPONSE_DELAY_MS", "0"))
     DEFAULT_MAX_RESPONSE_LENGTH: int = int(os.getenv("DEFAULT_MAX_RESPONSE_LENGTH", "500"))
     
+    # 에이전트 실행 설정
+    AGENT_WORKERS: int = int(os.getenv("AGENT_WORKERS", "0"))  # 0이면 API 프로세스 내에서 실행
+    AGENT_SHARD_SYNC_SECONDS: int = int(os.getenv("AGENT_SHARD_SYNC_SECONDS", "30"))
+    
+    # 재시작 시 놓친 메시지 보충 응답 (채팅방당 최대 1회, 속도 제한)
+    AGENT_CATCHUP_ENABLED: bool = os.getenv("AGENT_CATCHUP_ENABLED", "False").lower() == "true"
+    AGENT_CATCHUP_MAX_AGE_SECONDS: int = int(os.getenv("AGENT_CATCHUP_MAX_AGE_SECONDS", "900"))
+    AGENT_CATCHUP_MAX_MESSAGES: int = int(os.getenv("AGENT_CATCHUP_MAX_MESSAGES", "20"))
+    AGENT_CATCHUP_RATE_PER_SECOND: float = float(os.getenv("AGENT_CATCHUP_RATE_PER_SECOND", "0.5"))
+    
+    # 재전달된 메시지 중복 처리 방지 인덱스 (계정별)
+    AGENT_DEDUP_WINDOW_SECONDS: int = int(os.getenv("AGENT_DEDUP_WINDOW_SECONDS", "600"))
+    AGENT_DEDUP_MAX_ENTRIES: int = int(os.getenv("AGENT_DEDUP_MAX_ENTRIES", "10000"))
+    
+    # 같은 채팅방의 여러 계정 간 응답 조정 (all, round_robin, priority, mention)
+    AGENT_ARBITRATION_POLICY: str = os.getenv("AGENT_ARBITRATION_POLICY", "all")
+    AGENT_ARBITRATION_MAX_RESPONDERS: int = int(os.getenv("AGENT_ARBITRATION_MAX_RESPONDERS", "1"))
+    AGENT_ROLE_PRIORITY: str = os.getenv("AGENT_ROLE_PRIORITY", "Admin,Moderator,Chatter")
+    
+    # LLM 호출 전 관련성 검사 기본값 (역할별 relevance_rules로 덮어쓰기 가능)
+    AGENT_RELEVANCE_ENABLED: bool = os.getenv("AGENT_RELEVANCE_ENABLED", "False").lower() == "true"
+    AGENT_RELEVANCE_MIN_LENGTH: int = int(os.getenv("AGENT_RELEVANCE_MIN_LENGTH", "3"))
+    AGENT_RELEVANCE_SKIP_COMMANDS: bool = os.getenv("AGENT_RELEVANCE_SKIP_COMMANDS", "True").lower() == "true"
+    AGENT_RELEVANCE_SKIP_MEDIA: bool = os.getenv("AGENT_RELEVANCE_SKIP_MEDIA", "True").lower() == "true"
+    AGENT_RELEVANCE_CLASSIFIER: str = os.getenv("AGENT_RELEVANCE_CLASSIFIER", "")
+    AGENT_RELEVANCE_CLASSIFIER_THRESHOLD: float = float(os.getenv("AGENT_RELEVANCE_CLASSIFIER_THRESHOLD", "0.3"))
+    AGENT_RELEVANCE_ON_FAIL: str = os.getenv("AGENT_RELEVANCE_ON_FAIL", "drop")
+    
+    # 에이전트 런타임 DB 커넥션 풀 (메시지 처리 단위로 짧게 사용)
+    AGENT_DB_POOL_SIZE: int = int(os.getenv("AGENT_DB_POOL_SIZE", "5"))
+    AGENT_DB_MAX_OVERFLOW: int = int(os.getenv("AGENT_DB_MAX_OVERFLOW", "10"))
+    AGENT_DB_POOL_TIMEOUT: int = int(os.getenv("AGENT_DB_POOL_TIMEOUT", "30"))
+    
+    # 에이전트 러너 설정 (embedded: API 프로세스 내 실행, remote: python -m app.workers 별도 프로세스)
+    AGENT_RUNNER_MODE: str = os.getenv("AGENT_RUNNER_MODE", "embedded")
+    AGENT_RUNNER_HOST: str = os.getenv("AGENT_RUNNER_HOST", "127.0.0.1")
+    AGENT_RUNNER_PORT: int = int(os.getenv("AGENT_RUNNER_PORT", "8765"))
+    AGENT_RUNNER_TOKEN: str = os.getenv("AGENT_RUNNER_TOKEN", "")
+    AGENT_RUNNER_AUTOSTART: bool = os.getenv("AGENT_RUNNER_AUTOSTART", "True").lower() == "true"
+    
+    # 여러 노드 실행 시 계정 임대 설정
+    AGENT_LEASES_ENABLED: bool = os.getenv("AGENT_LEASES_ENABLED", "False").lower() == "true"
+    AGENT_NODE_ID: str = os.getenv("AGENT_NODE_ID", "")  # 미설정 시 호스트명:PID
+    AGENT_NODE_CAPACITY: int = int(os.getenv("AGENT_NODE_CAPACITY", "0"))  # 0이면 제한 없음
+    AGENT_LEASE_TTL_SECONDS: int = int(os.getenv("AGENT_LEASE_TTL_SECONDS", "90"))
+    
     # 인증 설정
     SESSION_EXPIRE_HOURS: int = int(os.getenv("SESSION_EXPIRE_HOURS", "24"))
     
+    # 계정 조회 캐시 설정
+    ACCOUNT_CACHE_TTL_SECONDS: int = int(os.getenv("ACCOUNT_CACHE_TTL_SECONDS", "30"))
+    
+    # 연결 상태 점검 설정
+    HEALTH_CHECK_CONCURRENCY: int = int(os.getenv("HEALTH_CHECK_CONCURRENCY", "10"))
+    HEALTH_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("HEALTH_SWEEP_INTERVAL_SECONDS", "0"))  # 0이면 비활성화
+    
+    # 메시지 로그 파티션/보관 설정
+    MESSAGE_LOG_RETENTION_MONTHS: int = int(os.getenv("MESSAGE_LOG_RETENTION_MONTHS", "0"))  # 0이면 아카이브하지 않음
+    MESSAGE_LOG_ARCHIVE_DIR: str = os.getenv("MESSAGE_LOG_ARCHIVE_DIR", "./archives")
+    MESSAGE_LOG_ARCHIVE_FORMAT: str = os.getenv("MESSAGE_LOG_ARCHIVE_FORMAT", "columnar")  # columnar, ndjson
+    MESSAGE_LOG_PARTITIONS_AHEAD: int = int(os.getenv("MESSAGE_LOG_PARTITIONS_AHEAD", "2"))
+    MESSAGE_LOG_SPOOL_ENABLED: bool = os.getenv("MESSAGE_LOG_SPOOL_ENABLED", "True").lower() == "true"
+    MESSAGE_LOG_SPOOL_PATH: str = os.getenv("MESSAGE_LOG_SPOOL_PATH", "./spool/message_logs.spool")
+    MESSAGE_LOG_SPOOL_FSYNC_BATCH: int = int(os.getenv("MESSAGE_LOG_SPOOL_FSYNC_BATCH", "50"))
+    MESSAGE_LOG_SPOOL_DRAIN_SECONDS: float = float(os.getenv("MESSAGE_LOG_SPOOL_DRAIN_SECONDS", "1"))
+    MESSAGE_LOG_SPOOL_BATCH_SIZE: int = int(os.getenv("MESSAGE_LOG_SPOOL_BATCH_SIZE", "500"))
+    MESSAGE_LOG_SPOOL_MAX_BYTES: int = int(os.getenv("MESSAGE_LOG_SPOOL_MAX_BYTES", str(512 * 1024 * 1024)))
+    MESSAGE_LOG_MAINTENANCE_INTERVAL_SECONDS: int = int(os.getenv("MESSAGE_LOG_MAINTENANCE_INTERVAL_SECONDS", "21600"))  # 0이면 비활성화
+    
     # CORS 설정
     CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "*").split(",")
     
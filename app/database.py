@@ -1,11 +1,14 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
 import os
 from dotenv import load_dotenv
 
+from app.config import settings
+
 # 모든 모델 import (테이블 생성용)
-from app.models import Account, ChatGroup, AgentRole, MessageLog
+from app.models import Account, ChatGroup, AgentRole, MessageLog, AccountLease, LlmUsageRollup, MessageLogRollup
 
 load_dotenv()
 
@@ -21,6 +24,37 @@ engine = create_engine(
 # 세션 팩토리 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 에이전트 런타임 전용 엔진 (API 요청과 커넥션 풀을 공유하지 않음)
+runtime_pool_options = {} if DATABASE_URL.startswith("sqlite") else {
+    "pool_size": settings.AGENT_DB_POOL_SIZE,
+    "max_overflow": settings.AGENT_DB_MAX_OVERFLOW,
+    "pool_timeout": settings.AGENT_DB_POOL_TIMEOUT,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True
+}
+runtime_engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    **runtime_pool_options
+)
+
+# 커밋 후에도 조회한 값을 그대로 사용할 수 있도록 expire_on_commit 비활성화
+RuntimeSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=runtime_engine
+)
+
+@contextmanager
+def runtime_session():
+    """에이전트 런타임 작업 단위 세션 (작업이 끝나면 즉시 커넥션 반환)"""
+    db = RuntimeSessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 # Base 클래스 생성
 Base = declarative_base()
 
@@ -42,3 +76,11 @@ def create_tables():
     # 모든 Base 클래스의 메타데이터를 통합
     metadata = AccountBase.metadata
     metadata.create_all(bind=engine)
+    
+    # 전문 검색 색인 (SQLite FTS5, Postgres는 스키마의 search_vector 사용)
+    from app.services.log_search_service import log_search_service
+    db = SessionLocal()
+    try:
+        log_search_service.ensure_index(db)
+    finally:
+        db.close()
@@ -40,6 +40,18 @@ async def startup_event():
         print(f"❌ 설정 오류: {e}")
         print("⚠️  .env 파일을 확인하고 Supabase 설정을 입력하세요")
     
+    # 주기적 연결 상태 점검 (설정된 경우)
+    if settings.HEALTH_SWEEP_INTERVAL_SECONDS > 0:
+        from app.services.telegram_auth_service import telegram_auth_service
+        telegram_auth_service.start_health_sweep()
+        print(f"✅ 연결 상태 점검 시작 ({settings.HEALTH_SWEEP_INTERVAL_SECONDS}초 주기)")
+    
+    # 메시지 로그 파티션 생성/보관 기간 적용 (설정된 경우)
+    if settings.MESSAGE_LOG_MAINTENANCE_INTERVAL_SECONDS > 0:
+        from app.services.log_partition_service import log_partition_service
+        log_partition_service.start_maintenance()
+        print(f"✅ 메시지 로그 관리 시작 ({settings.MESSAGE_LOG_MAINTENANCE_INTERVAL_SECONDS}초 주기)")
+    
     print("✅ 서버 시작 완료")
 
 @app.on_event("shutdown")
@@ -49,8 +61,17 @@ async def shutdown_event():
     
     # 임시 클라이언트 정리
     from app.services.telegram_auth_service import telegram_auth_service
+    telegram_auth_service.stop_health_sweep()
+    from app.services.log_partition_service import log_partition_service
+    log_partition_service.stop_maintenance()
     telegram_auth_service.cleanup_temp_clients()
     print("✅ 임시 클라이언트 정리 완료")
+    
+    # 프로세스 내 에이전트 정리 (remote 모드에서는 러너 프로세스가 별도로 관리)
+    if settings.AGENT_RUNNER_MODE != "remote":
+        from app.workers.agent_runner import agent_controller
+        await agent_controller.stop()
+        print("✅ 에이전트 종료 완료")
 
 @app.get("/")
 async def root():
@@ -1,6 +1,9 @@
 from .account import Account, Base as AccountBase
 from .agent import ChatGroup, AgentRole, Base as AgentBase
 from .message_log import MessageLog, Base as MessageLogBase
+from .account_lease import AccountLease
+from .llm_usage import LlmUsageRollup
+from .message_rollup import MessageLogRollup
 
 # 모든 모델을 한 곳에서 import
 __all__ = [
@@ -8,6 +11,9 @@ __all__ = [
     "ChatGroup", 
     "AgentRole",
     "MessageLog",
+    "AccountLease",
+    "LlmUsageRollup",
+    "MessageLogRollup",
     "AccountBase",
     "AgentBase", 
     "MessageLogBase"
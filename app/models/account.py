@@ -1,15 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, BigInteger
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, BigInteger, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
-Base = declarative_base()
+from app.models.base import Base
 
 class Account(Base):
     __tablename__ = "accounts"
     
-    id = Column(Integer, primary_key=True, index=True)
-    phone_number = Column(String(20), unique=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    phone_number = Column(String(20), unique=True, nullable=False)  # UNIQUE 인덱스로 조회 (별도 인덱스 없음)
     api_id = Column(Integer, nullable=False)
     api_hash = Column(String(32), nullable=False)
     session_string = Column(String, nullable=False)
@@ -27,3 +26,7 @@ class Account(Base):
     
     def __repr__(self):
         return f"<Account(id={self.id}, phone_number='{self.phone_number}', username='{self.username}')>"
+
+# 활성 계정 로드/집계용 부분 인덱스
+Index("idx_accounts_active", Account.id,
+      postgresql_where=Account.is_active == True, sqlite_where=Account.is_active == True)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+
+from app.models.base import Base
+
+class AccountLease(Base):
+    __tablename__ = "account_leases"
+    
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    node_id = Column(String(100), nullable=False, index=True)  # 계정을 실행 중인 노드
+    expires_at = Column(DateTime, nullable=False)  # 갱신되지 않으면 다른 노드가 인수 (갱신마다 바뀌므로 인덱스 없음)
+    acquired_at = Column(DateTime, default=datetime.utcnow)
+    renewed_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<AccountLease(account_id={self.account_id}, node_id='{self.node_id}', expires_at={self.expires_at})>"
@@ -1,14 +1,13 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
-Base = declarative_base()
+from app.models.base import Base
 
 class ChatGroup(Base):
     __tablename__ = "chat_groups"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     chat_id = Column(Integer, unique=True, nullable=False)  # 텔레그램 채팅 ID
     chat_title = Column(String(255))
     chat_type = Column(String(50))  # 'group', 'supergroup', 'channel'
@@ -24,8 +23,12 @@ class ChatGroup(Base):
 
 class AgentRole(Base):
     __tablename__ = "agent_roles"
+    __table_args__ = (
+        # 한 계정이 한 그룹에서 하나의 역할만 가질 수 있음 (account_id 단독 조회도 이 인덱스 사용)
+        UniqueConstraint("account_id", "chat_group_id", name="agent_roles_account_id_chat_group_id_key"),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
     chat_group_id = Column(Integer, ForeignKey("chat_groups.id"), nullable=False)
     role_name = Column(String(50), nullable=False)  # 'Chatter', 'Moderator', 'Admin'
@@ -34,6 +37,9 @@ class AgentRole(Base):
     openai_api_key = Column(String(100))  # 개별 역할별 OpenAI 키
     response_delay_ms = Column(Integer, default=0)  # 응답 지연 시간
     max_response_length = Column(Integer, default=500)  # 최대 응답 길이
+    daily_token_budget = Column(Integer)  # 하루(UTC) 토큰 한도 (없으면 무제한)
+    relevance_rules = Column(JSON)  # LLM 호출 전 관련성 검사 규칙 (전역 기본값을 덮어씀)
+    model_routing = Column(JSON)  # 모델 선택 규칙 (전역 기본값을 덮어씀)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -44,3 +50,8 @@ class AgentRole(Base):
     
     def __repr__(self):
         return f"<AgentRole(id={self.id}, account_id={self.account_id}, role_name='{self.role_name}')>"
+
+# 계정의 활성 역할 조회용 부분 인덱스
+Index("idx_agent_roles_account_active", AgentRole.account_id, AgentRole.chat_group_id,
+      postgresql_where=AgentRole.is_active == True, sqlite_where=AgentRole.is_active == True)
+Index("idx_agent_roles_chat", AgentRole.chat_group_id)
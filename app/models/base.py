@@ -0,0 +1,4 @@
+from sqlalchemy.ext.declarative import declarative_base
+
+# 모든 모델이 공유하는 Base (테이블 간 관계/외래키 해석을 위해 단일 메타데이터 사용)
+Base = declarative_base()
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, Index, UniqueConstraint
+from datetime import datetime
+
+from app.models.base import Base
+
+class LlmUsageRollup(Base):
+    __tablename__ = "llm_usage_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "agent_role_id", "model", "api_key_label", name="uq_llm_usage_bucket"),
+        Index("idx_llm_usage_role_bucket", "agent_role_id", "bucket_start"),  # 역할별 오늘 토큰 사용량
+    )
+    
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False)  # 집계 시간대 시작 (UTC, 1시간 단위)
+    agent_role_id = Column(Integer, nullable=False)
+    account_id = Column(Integer, nullable=False, index=True)
+    model = Column(String(100), nullable=False)
+    api_key_label = Column(String(20), nullable=False)  # 마스킹된 키
+    calls = Column(Integer, default=0)
+    prompt_tokens = Column(BigInteger, default=0)
+    completion_tokens = Column(BigInteger, default=0)
+    cost_usd = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<LlmUsageRollup(bucket_start={self.bucket_start}, role={self.agent_role_id}, model='{self.model}')>"
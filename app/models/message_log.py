@@ -1,14 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
-Base = declarative_base()
+from app.models.base import Base
 
 class MessageLog(Base):
     __tablename__ = "message_logs"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     agent_role_id = Column(Integer, ForeignKey("agent_roles.id"), nullable=False)
     chat_id = Column(BigInteger, nullable=False)
     user_id = Column(BigInteger, nullable=False)
@@ -16,10 +15,25 @@ class MessageLog(Base):
     response_text = Column(Text)
     response_time_ms = Column(Integer)
     role_used = Column(String(50))  # 실제 사용된 역할
+    queue_wait_ms = Column(Integer)  # 메시지 전송 시각부터 생성 시작까지
+    llm_ms = Column(Integer)  # 응답 생성 시간
+    delay_ms = Column(Integer)  # 설정된 응답 지연 (response_delay_ms)
+    send_ms = Column(Integer)  # 텔레그램 전송 시간
+    model = Column(String(100))  # 실제 사용된 모델
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
+    log_key = Column(String(64))  # 스풀 레코드 ID (같은 레코드를 다시 저장해도 중복되지 않도록)
     
     # 관계 설정
     agent_role = relationship("AgentRole", back_populates="message_logs")
     
     def __repr__(self):
         return f"<MessageLog(id={self.id}, chat_id={self.chat_id}, role_used='{self.role_used}')>"
+
+# 역할별 최신 로그 (keyset 페이지네이션 정렬과 동일), 채팅방별, 기간별(오늘 메시지 수, 보관 기간) 조회
+Index("idx_message_logs_role_created", MessageLog.agent_role_id, MessageLog.created_at.desc(), MessageLog.id.desc())
+Index("idx_message_logs_chat", MessageLog.chat_id)
+Index("idx_message_logs_created", MessageLog.created_at)
+# 파티션 테이블(Postgres)의 고유 인덱스는 파티션 키를 포함해야 하므로 created_at 포함 (같은 레코드는 created_at도 같음)
+Index("idx_message_logs_log_key", MessageLog.log_key, MessageLog.created_at, unique=True)
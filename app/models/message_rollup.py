@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, JSON, Index, UniqueConstraint
+
+from app.models.base import Base
+
+class MessageLogRollup(Base):
+    __tablename__ = "message_log_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "agent_role_id", "chat_id", name="uq_message_log_rollup_bucket"),
+        Index("idx_message_log_rollups_role", "agent_role_id", "bucket_start"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, nullable=False)  # 집계 시간대 시작 (UTC, 1시간 단위)
+    agent_role_id = Column(Integer, nullable=False)
+    chat_id = Column(BigInteger, nullable=False)
+    message_count = Column(Integer, default=0)  # 기록된 메시지 수 (문맥만 기록된 메시지 포함)
+    reply_count = Column(Integer, default=0)  # 응답한 메시지 수
+    latency_sum_ms = Column(BigInteger, default=0)  # 응답 시간 합계 (평균 계산용)
+    latency_histogram = Column(JSON)  # 응답 시간 로그 구간별 건수 (합산 가능)
+    
+    def __repr__(self):
+        return f"<MessageLogRollup(bucket_start={self.bucket_start}, role={self.agent_role_id}, chat_id={self.chat_id})>"
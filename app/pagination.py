@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+# 커서 기반(keyset) 페이지네이션 공통 유틸리티
+# 커서는 마지막 행의 정렬 키 (id + created_at/score 등)를 base64로 인코딩한 불투명 문자열
+
+ORDER_FIELDS = ("id", "created_at")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """페이지 크기 범위 제한"""
+    if not limit or limit <= 0:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+def encode_cursor(row: Dict[str, Any], order_by: str = "id") -> str:
+    """마지막 행으로부터 다음 페이지 커서 생성"""
+    payload = {"id": row["id"]}
+    if order_by != "id":
+        value = row[order_by]
+        payload[order_by] = value.isoformat() if isinstance(value, datetime) else value
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str], order_by: str = "id") -> Optional[Dict[str, Any]]:
+    """커서 해석 (잘못된 커서는 ValueError)"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if "id" not in payload or order_by not in payload:
+            raise ValueError("missing key")
+        return payload
+    except Exception:
+        raise ValueError("유효하지 않은 커서입니다.")
+
+def validate_order_by(order_by: str) -> str:
+    """정렬 기준 검증"""
+    if order_by not in ORDER_FIELDS:
+        raise ValueError(f"order_by는 {', '.join(ORDER_FIELDS)} 중 하나여야 합니다.")
+    return order_by
+
+def escape_like(prefix: str) -> str:
+    """LIKE 패턴 특수문자 이스케이프"""
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def apply_keyset(query, model, order_by: str, cursor: Optional[Dict[str, Any]], limit: Optional[int],
+                 descending: bool = False):
+    """SQLAlchemy 쿼리에 keyset 조건, 정렬, limit(+1) 적용"""
+    if order_by == "created_at":
+        if cursor:
+            created_at = datetime.fromisoformat(cursor["created_at"])
+            if descending:
+                query = query.filter(or_(
+                    model.created_at < created_at,
+                    and_(model.created_at == created_at, model.id < cursor["id"])
+                ))
+            else:
+                query = query.filter(or_(
+                    model.created_at > created_at,
+                    and_(model.created_at == created_at, model.id > cursor["id"])
+                ))
+        if descending:
+            query = query.order_by(model.created_at.desc(), model.id.desc())
+        else:
+            query = query.order_by(model.created_at.asc(), model.id.asc())
+    else:
+        if cursor:
+            query = query.filter(model.id < cursor["id"] if descending else model.id > cursor["id"])
+        query = query.order_by(model.id.desc() if descending else model.id.asc())
+    if limit is None:
+        return query
+    # 다음 페이지 존재 여부 확인을 위해 한 행 더 조회
+    return query.limit(limit + 1)
+
+def build_page(rows: List[Dict[str, Any]], limit: int, order_by: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """limit+1 조회 결과를 페이지와 다음 커서로 분리"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1], order_by)
+    return rows, None
@@ -0,0 +1,122 @@
+import json
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Account, AgentRole, MessageLog, LlmUsageRollup, MessageLogRollup
+from app.pagination import apply_keyset
+from app.services.role_query_service import role_query_service
+
+# 주요 조회 쿼리의 실행 계획 확인: 모든 쿼리가 인덱스를 사용하는지 (전체 테이블 스캔 없음) 검사
+# 실행: python -m app.query_plans (하나라도 실패하면 종료 코드 1)
+# Postgres는 작은 테이블에서 순차 스캔을 선택할 수 있으므로 enable_seqscan을 끄고 인덱스로 처리 가능한지 확인합니다.
+
+class HotQuery(NamedTuple):
+    name: str
+    build: Callable[[Session], Any]
+    ordered: bool = False  # 정렬도 인덱스 순서로 처리되어야 하는지
+
+def _role_logs(db: Session):
+    """역할별 최신 로그 (GET /agents/roles/{role_id}/logs)"""
+    query = db.query(MessageLog.id, MessageLog.message_text, MessageLog.created_at).filter(
+        MessageLog.agent_role_id == 1,
+        MessageLog.created_at >= datetime.utcnow() - timedelta(days=90)
+    )
+    return apply_keyset(query, MessageLog, "created_at", None, 50, descending=True)
+
+def _today_messages(db: Session):
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    return db.query(func.count(MessageLog.id)).filter(MessageLog.created_at >= today)
+
+def _token_budget(db: Session):
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    return db.query(
+        func.coalesce(func.sum(LlmUsageRollup.prompt_tokens + LlmUsageRollup.completion_tokens), 0)
+    ).filter(LlmUsageRollup.agent_role_id == 1, LlmUsageRollup.bucket_start >= today)
+
+def _role_analytics(db: Session):
+    since = datetime.utcnow() - timedelta(hours=24)
+    return db.query(MessageLogRollup.bucket_start, MessageLogRollup.latency_histogram).filter(
+        MessageLogRollup.agent_role_id == 1,
+        MessageLogRollup.bucket_start >= since
+    )
+
+HOT_QUERIES = (
+    HotQuery("role_logs", _role_logs, ordered=True),
+    HotQuery("active_role_handlers", lambda db: role_query_service.active_role_handlers_query(db, 1)),
+    HotQuery("active_roles_count", lambda db: db.query(func.count(AgentRole.id)).filter(AgentRole.is_active == True)),
+    HotQuery("active_accounts", lambda db: db.query(Account.id, Account.session_string).filter(Account.is_active == True)),
+    HotQuery("phone_lookup", lambda db: db.query(Account.id).filter(Account.phone_number == "+10000000000")),
+    HotQuery("today_messages", _today_messages),
+    HotQuery("token_budget", _token_budget),
+    HotQuery("role_analytics", _role_analytics)
+)
+
+def _explain_sqlite(db: Session, sql: str, params) -> List[str]:
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).all()
+    return [row[-1] for row in rows]
+
+def _explain_postgres(db: Session, sql: str, params) -> List[str]:
+    db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+    result = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar()
+    plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+    lines, stack = [], [plan]
+    while stack:
+        node = stack.pop()
+        target = node.get("Index Name") or node.get("Relation Name") or ""
+        lines.append(f"{node['Node Type']} {target}".strip())
+        stack.extend(node.get("Plans", []))
+    return lines
+
+def explain(db: Session, query) -> List[str]:
+    """쿼리 실행 계획 (한 줄에 하나의 단계)"""
+    compiled = query.statement.compile(dialect=db.bind.dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    try:
+        if db.bind.dialect.name == "postgresql":
+            return _explain_postgres(db, str(compiled), params)
+        return _explain_sqlite(db, str(compiled), params)
+    finally:
+        db.rollback()
+
+def full_scans(plan: List[str]) -> List[str]:
+    """인덱스 없이 테이블 전체를 읽는 단계"""
+    return [
+        line for line in plan
+        if line.startswith("Seq Scan") or (line.startswith("SCAN ") and " USING " not in line)
+    ]
+
+def extra_sorts(plan: List[str]) -> List[str]:
+    """인덱스 순서를 쓰지 못해 별도로 정렬하는 단계"""
+    return [line for line in plan if "TEMP B-TREE" in line or line.startswith(("Sort", "Incremental Sort"))]
+
+def check_query_plans(db: Session) -> List[Dict[str, Any]]:
+    """주요 쿼리별 실행 계획과 인덱스 사용 여부"""
+    results = []
+    for hot_query in HOT_QUERIES:
+        plan = explain(db, hot_query.build(db))
+        problems = full_scans(plan) + (extra_sorts(plan) if hot_query.ordered else [])
+        results.append({"query": hot_query.name, "uses_index": not problems, "problems": problems, "plan": plan})
+    return results
+
+def main() -> int:
+    db = SessionLocal()
+    try:
+        results = check_query_plans(db)
+    finally:
+        db.close()
+    for result in results:
+        status = "✅" if result["uses_index"] else "❌"
+        print(f"{status} {result['query']}")
+        for line in result["plan"]:
+            print(f"    {line}")
+    return 0 if all(result["uses_index"] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,43 +1,81 @@
 import asyncio
 import time
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
 from telethon import TelegramClient, events
-from telethon.sessions import StringSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-import openai
+from sqlalchemy import and_, func
 import os
 
 from app.models.account import Account
 from app.models.agent import ChatGroup, AgentRole
 from app.models.message_log import MessageLog
 from app.config import settings
+from app.database import runtime_session
+from app.services.role_query_service import role_query_service
+from app.services.lease_service import LeaseService
+from app.services.session_store import build_session, export_session_string
+from app.services.dedup_index import RecentMessageIndex
+from app.services.reply_arbiter import ReplyArbiter, message_key
+from app.services.relevance_gate import relevance_gate
+from app.services.openai_service import openai_service, LLMResult
+from app.services.api_key_pool import api_key_pool
+from app.services.usage_service import usage_accountant
+from app.services.message_rollup_service import message_rollup_service
+from app.services.log_spool import message_log_spool
 
 class TelegramAgentService:
     def __init__(self):
         self.active_clients: Dict[int, TelegramClient] = {}
         self.role_handlers: Dict[int, Dict[int, dict]] = {}  # account_id -> {chat_id -> role_info}
+        self.account_phones: Dict[int, str] = {}  # account_id -> phone_number
+        self.dedup_indexes: Dict[int, RecentMessageIndex] = {}  # account_id -> 최근 처리한 (chat_id, message_id)
+        self.sent_indexes: Dict[int, RecentMessageIndex] = {}  # account_id -> 최근 보낸 (chat_id, message_id)
+        self.account_usernames: Dict[int, Optional[str]] = {}  # account_id -> 텔레그램 username
         
-        # OpenAI 설정
-        if settings.OPENAI_API_KEY:
-            openai.api_key = settings.OPENAI_API_KEY
+        # 같은 채팅방의 여러 계정 중 응답할 계정 선택
+        self.reply_arbiter = ReplyArbiter()
+        
+        # 여러 노드 실행 시 계정 소유권 임대 (AGENT_LEASES_ENABLED)
+        self.lease_service: Optional[LeaseService] = LeaseService() if settings.AGENT_LEASES_ENABLED else None
+        self.sync_task: Optional[asyncio.Task] = None
+        
+        # 다운타임 중 놓친 메시지 보충 응답 (채팅방 단위 작업 큐, 속도 제한 처리)
+        self.catchup_queue: asyncio.Queue = None
+        self.catchup_task: Optional[asyncio.Task] = None
     
-    async def start_all_agents(self, db: Session):
+    async def start_all_agents(self):
         """모든 활성 에이전트 시작"""
         try:
-            # 활성 계정들 가져오기
-            accounts = db.query(Account).filter(Account.is_active == True).all()
+            if settings.MESSAGE_LOG_SPOOL_ENABLED:
+                # 보충 응답이 마지막 응답 로그로 놓친 범위를 판단하므로 클라이언트 시작 전에 남은 로그부터 저장
+                message_log_spool.start()
+                await message_log_spool.drain_pending()
+            await self.sync_accounts()
+            print(f"Started {len(self.active_clients)} active agents")
             
-            for account in accounts:
-                await self.start_account_client(account, db)
-                
-            print(f"Started {len(accounts)} active agents")
+            # 임대 사용 시 주기적으로 갱신/인수해야 하므로 동기화 루프 실행
+            if self.lease_service and (self.sync_task is None or self.sync_task.done()):
+                self.sync_task = asyncio.create_task(self.run_sync_loop())
             
         except Exception as e:
             print(f"Error starting agents: {e}")
     
-    async def start_account_client(self, account: Account, db: Session):
-        """개별 계정 클라이언트 시작"""
+    async def run_sync_loop(self, account_filter: Optional[Callable[[int], bool]] = None,
+                            interval_seconds: Optional[int] = None):
+        """주기적 계정 동기화 (임대 갱신, 만료 임대 인수, 비활성 계정 중지)"""
+        interval_seconds = interval_seconds or settings.AGENT_SHARD_SYNC_SECONDS
+        while True:
+            # 갱신에 실패한 임대가 있으면 만료 시점에 다시 시도 (그때도 실패하면 해당 클라이언트 중지)
+            delay = interval_seconds
+            remaining = self.lease_service.seconds_until_expiry() if self.lease_service else None
+            if remaining is not None:
+                delay = max(min(delay, remaining), 1)
+            await asyncio.sleep(delay)
+            await self.sync_accounts(account_filter)
+    
+    async def start_account_client(self, account):
+        """개별 계정 클라이언트 시작 (account: Account 또는 동일한 속성을 가진 조회 행)"""
         account_id = account.id
         
         # 이미 실행 중인지 확인
@@ -45,9 +83,9 @@ class TelegramAgentService:
             return
         
         try:
-            # 텔레그램 클라이언트 생성
+            # 텔레그램 클라이언트 생성 (TELEGRAM_SESSION_DIR 설정 시 엔티티 캐시가 유지되는 파일 세션)
             client = TelegramClient(
-                StringSession(account.session_string),
+                build_session(account_id, account.session_string),
                 account.api_id,
                 account.api_hash
             )
@@ -55,103 +93,325 @@ class TelegramAgentService:
             # 이벤트 핸들러 설정
             @client.on(events.NewMessage)
             async def handle_message(event):
-                await self.process_message(event, account_id, db)
+                await self.process_message(event, account_id)
             
             # 클라이언트 시작
+            started_at = datetime.now(timezone.utc)
             await client.start()
             self.active_clients[account_id] = client
             self.role_handlers[account_id] = {}
+            self.account_phones[account_id] = account.phone_number
+            self.dedup_indexes[account_id] = RecentMessageIndex(
+                settings.AGENT_DEDUP_WINDOW_SECONDS, settings.AGENT_DEDUP_MAX_ENTRIES
+            )
+            self.sent_indexes[account_id] = RecentMessageIndex(
+                settings.AGENT_DEDUP_WINDOW_SECONDS, settings.AGENT_DEDUP_MAX_ENTRIES
+            )
+            if self.reply_arbiter.policy == "mention":
+                me = await client.get_me()
+                self.account_usernames[account_id] = me.username
+            await self.export_session_string(account, client)
             
             # 해당 계정의 모든 역할 정보 로드
-            await self.load_account_roles(account_id, db)
+            with runtime_session() as db:
+                await self.load_account_roles(account_id, db)
+            
+            if settings.AGENT_CATCHUP_ENABLED:
+                self.schedule_catchup(account_id, started_at)
             
             print(f"Account {account.phone_number} started successfully")
             
         except Exception as e:
             print(f"Failed to start account {account.phone_number}: {e}")
     
+    def schedule_catchup(self, account_id: int, started_at: datetime):
+        """계정의 역할이 있는 채팅방마다 보충 응답 작업 등록"""
+        if self.catchup_queue is None:
+            self.catchup_queue = asyncio.Queue()
+        if self.catchup_task is None or self.catchup_task.done():
+            self.catchup_task = asyncio.create_task(self._catchup_worker())
+        for chat_id in list(self.role_handlers.get(account_id, {}).keys()):
+            self.catchup_queue.put_nowait((account_id, chat_id, started_at))
+    
+    async def _catchup_worker(self):
+        """보충 응답 작업을 설정된 속도로 순차 처리 (재시작 직후 부하 급증 방지)"""
+        interval = 1 / settings.AGENT_CATCHUP_RATE_PER_SECOND if settings.AGENT_CATCHUP_RATE_PER_SECOND > 0 else 0
+        while True:
+            account_id, chat_id, started_at = await self.catchup_queue.get()
+            try:
+                if await self.catchup_chat(account_id, chat_id, started_at):
+                    await asyncio.sleep(interval)
+            except Exception as e:
+                print(f"Error during catch-up for account {account_id} chat {chat_id}: {e}")
+            finally:
+                self.catchup_queue.task_done()
+    
+    async def catchup_chat(self, account_id: int, chat_id: int, started_at: datetime) -> bool:
+        """다운타임 중 놓친 메시지를 하나로 묶어 최대 한 번만 응답 (응답했으면 True)"""
+        client = self.active_clients.get(account_id)
+        role_info = self.role_handlers.get(account_id, {}).get(chat_id)
+        if client is None or role_info is None:
+            return False
+        
+        # 보충 범위: 최대 허용 기간 이내이면서 이 역할의 마지막 로그 이후
+        cutoff = started_at - timedelta(seconds=settings.AGENT_CATCHUP_MAX_AGE_SECONDS)
+        with runtime_session() as db:
+            last_logged = db.query(func.max(MessageLog.created_at)).filter(
+                MessageLog.agent_role_id == role_info["id"],
+                MessageLog.chat_id == chat_id
+            ).scalar()
+        if last_logged is not None:
+            cutoff = max(cutoff, last_logged.replace(tzinfo=timezone.utc))
+        
+        missed = []
+        async for message in client.iter_messages(chat_id, limit=settings.AGENT_CATCHUP_MAX_MESSAGES):
+            if message.date <= cutoff:
+                break
+            if message.date >= started_at or message.out or not message.text:
+                continue  # 시작 이후 메시지는 실시간 핸들러가 처리
+            missed.append(message)
+        if not missed:
+            return False
+        
+        # 오래된 순으로 합쳐 한 번의 응답 생성, 가장 최근 메시지에 답장
+        missed.reverse()
+        dedup_index = self.dedup_indexes.get(account_id)
+        if dedup_index is not None:
+            for message in missed:
+                dedup_index.add((chat_id, message.id))
+        
+        # 관련성 검사를 통과한 메시지만 응답 대상
+        missed = [
+            message for message in missed
+            if self.check_relevance(message, account_id, chat_id, role_info) is None
+        ]
+        if not missed or usage_accountant.budget_exhausted(role_info):
+            return False
+        latest = missed[-1]
+        
+        # 실시간 처리와 같은 키(가장 최근 메시지)로 응답 조정 (같은 채팅방의 다른 계정이 각자 보충 응답하지 않도록)
+        if not self.should_respond(latest, account_id, chat_id):
+            return False
+        combined_text = "\n".join(message.text for message in missed)
+        
+        start_time = time.time()
+        result = await self.generate_role_response(combined_text, role_info)
+        if result is None:
+            return False
+        generated_at = time.time()
+        sent = await latest.reply(result.text)
+        sent_at = time.time()
+        self._record_sent(account_id, chat_id, sent)
+        
+        await self.save_message_log(
+            role_info["id"],
+            chat_id,
+            latest.sender_id,
+            combined_text,
+            result.text,
+            int((sent_at - start_time) * 1000),
+            role_info["role_name"],
+            self.stage_timings(result, latest.date, start_time, generated_at, generated_at, sent_at)
+        )
+        print(f"Caught up {len(missed)} missed messages for account {account_id} chat {chat_id}")
+        return True
+    
+    async def export_session_string(self, account, client: TelegramClient):
+        """세션 인증 정보가 바뀐 경우(DC 이전 등) session_string을 Supabase에 다시 저장"""
+        session_string = export_session_string(client.session)
+        if not session_string or session_string == account.session_string:
+            return
+        try:
+            from app.services.supabase_service import supabase_service
+            await supabase_service.update_account(account.id, {"session_string": session_string})
+        except Exception as e:
+            print(f"Failed to export session string for account {account.id}: {e}")
+    
     async def load_account_roles(self, account_id: int, db: Session):
         """계정의 모든 역할 정보 로드"""
         try:
-            roles = db.query(AgentRole).join(ChatGroup).filter(
-                and_(
-                    AgentRole.account_id == account_id,
-                    AgentRole.is_active == True,
-                    ChatGroup.is_active == True
-                )
-            ).all()
+            roles = role_query_service.list_active_role_handlers(db, account_id)
             
             for role in roles:
-                chat_id = role.chat_group.chat_id
-                self.role_handlers[account_id][chat_id] = {
-                    "id": role.id,
-                    "role_name": role.role_name,
-                    "persona": role.persona,
-                    "openai_api_key": role.openai_api_key,
-                    "response_delay_ms": role.response_delay_ms,
-                    "max_response_length": role.max_response_length
-                }
+                chat_id = role.pop("chat_id")
+                role["account_id"] = account_id
+                self.role_handlers[account_id][chat_id] = role
                 
             print(f"Loaded {len(roles)} roles for account {account_id}")
             
         except Exception as e:
             print(f"Error loading roles for account {account_id}: {e}")
     
-    async def process_message(self, event, account_id: int, db: Session):
+    async def reload_account_roles(self, account_id: int):
+        """실행 중인 계정의 역할 정보 다시 로드 (역할 생성/수정/삭제 반영)"""
+        if account_id not in self.active_clients:
+            return
+        with runtime_session() as db:
+            self.role_handlers[account_id] = {}
+            await self.load_account_roles(account_id, db)
+    
+    async def process_message(self, event, account_id: int):
         """메시지 처리 및 응답"""
         try:
             # 자기 자신의 메시지는 무시
-            if event.sender_id == event.client.get_me().id:
+            if event.out:
                 return
             
             chat_id = event.chat_id
             
+            # 재연결 후 재전달된 업데이트는 무시
+            dedup_index = self.dedup_indexes.get(account_id)
+            if dedup_index is not None and dedup_index.check_and_add((chat_id, event.message.id)):
+                return
+            
             # 해당 채팅방에서의 역할 확인
             if account_id not in self.role_handlers or chat_id not in self.role_handlers[account_id]:
                 return  # 이 채팅방에서는 역할이 없음
             
             role_info = self.role_handlers[account_id][chat_id]
             
+            # 관련성 검사 (통과하지 못하면 LLM 호출 없이 무시하거나 문맥으로만 기록)
+            gate_action = self.check_relevance(event.message, account_id, chat_id, role_info)
+            if gate_action == "context":
+                await self.save_message_log(
+                    role_info["id"], chat_id, event.sender_id, event.message.text,
+                    None, None, role_info["role_name"]
+                )
+            if gate_action is not None:
+                return
+            
+            # 역할의 하루 토큰 한도를 모두 사용했으면 생성하지 않음
+            if usage_accountant.budget_exhausted(role_info):
+                return
+            
+            # 같은 채팅방에 역할을 가진 다른 계정과 응답 조정 (선택되지 않으면 LLM 호출 없이 종료)
+            if not self.should_respond(event.message, account_id, chat_id):
+                return
+            
             # 역할별 응답 생성
             start_time = time.time()
             
-            response_text = await self.generate_role_response(
+            result = await self.generate_role_response(
                 event.message.text,
                 role_info
             )
+            if result is None:
+                return
+            generated_at = time.time()
             
             # 응답 지연 (설정된 경우)
             if role_info.get("response_delay_ms", 0) > 0:
                 await asyncio.sleep(role_info["response_delay_ms"] / 1000)
+            delayed_at = time.time()
             
             # 응답 전송
-            await event.reply(response_text)
-            
-            # 응답 시간 계산
-            response_time = int((time.time() - start_time) * 1000)
+            sent = await event.reply(result.text)
+            sent_at = time.time()
+            self._record_sent(account_id, chat_id, sent)
             
-            # 로그 저장
+            # 로그 저장 (response_time_ms는 생성 시작부터 전송 완료까지, 단계별 시간은 별도 기록)
             await self.save_message_log(
                 role_info["id"],
                 chat_id,
                 event.sender_id,
                 event.message.text,
-                response_text,
-                response_time,
+                result.text,
+                int((sent_at - start_time) * 1000),
                 role_info["role_name"],
-                db
+                self.stage_timings(result, event.message.date, start_time, generated_at, delayed_at, sent_at)
             )
             
         except Exception as e:
             print(f"Error processing message: {e}")
     
-    async def generate_role_response(self, message: str, role_info: dict) -> str:
-        """역할별 OpenAI 응답 생성"""
+    def stage_timings(self, result: LLMResult, message_date: datetime, start_time: float,
+                      generated_at: float, delayed_at: float, sent_at: float) -> dict:
+        """메시지 로그용 단계별 소요 시간(ms)과 모델/토큰 정보"""
+        return {
+            "queue_wait_ms": max(int((start_time - message_date.timestamp()) * 1000), 0),
+            "llm_ms": int((generated_at - start_time) * 1000),
+            "delay_ms": int((delayed_at - generated_at) * 1000),
+            "send_ms": int((sent_at - delayed_at) * 1000),
+            "model": result.model,
+            "prompt_tokens": result.prompt_tokens,
+            "completion_tokens": result.completion_tokens
+        }
+    
+    def check_relevance(self, message, account_id: int, chat_id: int, role_info: dict) -> Optional[str]:
+        """관련성 검사 (통과하면 None, 아니면 drop/context)"""
+        sent_index = self.sent_indexes.get(account_id)
+        mentioned = bool(message.mentioned) or (
+            sent_index is not None and message.reply_to_msg_id is not None
+            and (chat_id, message.reply_to_msg_id) in sent_index
+        )
+        has_media = message.media is not None and message.web_preview is None
+        return relevance_gate.check(account_id, role_info, message.text, mentioned, has_media)
+    
+    def should_respond(self, message, account_id: int, chat_id: int) -> bool:
+        """응답 조정 정책에 따라 이 계정이 응답할지 결정 (후보는 관련성 검사를 통과한 계정만)"""
+        if self.reply_arbiter.policy == "all":
+            return True
+        
+        reply_to_account = None
+        if message.reply_to_msg_id:
+            reply_to_account = next(
+                (candidate_id for candidate_id, sent_index in self.sent_indexes.items()
+                 if (chat_id, message.reply_to_msg_id) in sent_index),
+                None
+            )
+        
+        def candidates():
+            return [
+                {
+                    "account_id": candidate_id,
+                    "role_name": handlers[chat_id]["role_name"],
+                    "username": self.account_usernames.get(candidate_id)
+                }
+                for candidate_id, handlers in self.role_handlers.items()
+                if chat_id in handlers and (
+                    candidate_id == account_id
+                    or self.candidate_eligible(message, candidate_id, handlers[chat_id], reply_to_account)
+                )
+            ]
+        
+        return self.reply_arbiter.should_respond(
+            message_key(chat_id, message.sender_id, message.date.timestamp(), message.text),
+            account_id,
+            chat_id,
+            candidates,
+            message.text,
+            reply_to_account
+        )
+    
+    def candidate_eligible(self, message, candidate_id: int, role_info: dict,
+                           reply_to_account: Optional[int]) -> bool:
+        """다른 계정이 이 메시지에 응답할 수 있는지 (관련성 검사, 토큰 한도 / 통계는 각 계정이 직접 처리할 때 기록)"""
+        if usage_accountant.budget_exhausted(role_info, record=False):
+            return False
+        username = self.account_usernames.get(candidate_id)
+        mentioned = candidate_id == reply_to_account or bool(
+            username and f"@{username.lower()}" in (message.text or "").lower()
+        )
+        has_media = message.media is not None and message.web_preview is None
+        return relevance_gate.check(
+            candidate_id, role_info, message.text, mentioned, has_media, record=False
+        ) is None
+    
+    def _record_sent(self, account_id: int, chat_id: int, sent):
+        """보낸 메시지 기록 (답장 대상 계정 판별용)"""
+        sent_index = self.sent_indexes.get(account_id)
+        if sent_index is not None and sent is not None:
+            sent_index.add((chat_id, sent.id))
+    
+    async def generate_role_response(self, message: str, role_info: dict) -> Optional[LLMResult]:
+        """역할별 OpenAI 응답 생성 (생성하지 못하면 None)"""
         try:
             # 역할별 API 키 사용 (있는 경우)
-            api_key = role_info.get("openai_api_key") or settings.OPENAI_API_KEY
-            if not api_key:
-                return "OpenAI API 키가 설정되지 않았습니다."
+            api_key = role_info.get("openai_api_key")
+            if not api_key and not len(api_key_pool):
+                # 안내 문구를 그룹에 응답으로 보내지 않음
+                print(f"OpenAI API key is not configured for role {role_info['role_name']}")
+                return None
             
             # 역할별 페르소나와 시스템 프롬프트 구성
             system_prompt = f"""
@@ -167,51 +427,69 @@ class TelegramAgentService:
 4. 역할에 맞지 않는 내용은 피하세요
 """
             
-            # OpenAI 클라이언트 생성
-            client = openai.OpenAI(api_key=api_key)
-            
-            response = client.chat.completions.create(
-                model=settings.OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": message}
-                ],
-                max_tokens=role_info.get("max_response_length", 500),
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content
+            # 메시지 복잡도에 따라 선택된 모델로 생성
+            return await openai_service.generate(message, role_info, system_prompt, api_key)
             
         except Exception as e:
-            print(f"OpenAI API error: {e}")
-            return "죄송합니다. 응답을 생성하는 중에 오류가 발생했습니다."
+            # 오류 안내 메시지를 그룹에 보내지 않고 이 메시지는 응답하지 않음
+            print(f"OpenAI API error ({type(e).__name__}): {e}")
+            return None
     
     async def save_message_log(self, role_id: int, chat_id: int, user_id: int, 
-                              message: str, response: str, response_time: int, 
-                              role_used: str, db: Session):
-        """메시지 로그 저장"""
+                              message: str, response: Optional[str], response_time: Optional[int], 
+                              role_used: str, stages: Optional[dict] = None):
+        """메시지 로그 저장 후 시간대별 집계 갱신 (스풀 사용 시 파일에 기록하고 드레이너가 DB에 저장)"""
+        created_at = datetime.utcnow()
+        if settings.MESSAGE_LOG_SPOOL_ENABLED:
+            try:
+                message_log_spool.append({
+                    "role_id": role_id,
+                    "chat_id": chat_id,
+                    "user_id": user_id,
+                    "message": message,
+                    "response": response,
+                    "response_time": response_time,
+                    "role_used": role_used,
+                    "created_at": created_at.isoformat(),
+                    "stages": stages
+                })
+            except Exception as e:
+                print(f"Failed to spool message log: {e}")
+            return
+        
         try:
-            log = MessageLog(
-                agent_role_id=role_id,
-                chat_id=chat_id,
-                user_id=user_id,
-                message_text=message,
-                response_text=response,
-                response_time_ms=response_time,
-                role_used=role_used
-            )
-            
-            db.add(log)
-            db.commit()
+            with runtime_session() as db:
+                db.add(MessageLog(
+                    agent_role_id=role_id,
+                    chat_id=chat_id,
+                    user_id=user_id,
+                    message_text=message,
+                    response_text=response,
+                    response_time_ms=response_time,
+                    role_used=role_used,
+                    created_at=created_at,
+                    **(stages or {})
+                ))
+                db.commit()
+                
+                # 집계 갱신 실패가 로그 저장에 영향을 주지 않도록 별도 커밋
+                try:
+                    message_rollup_service.record(
+                        db, role_id, chat_id, created_at, response_time, response is not None
+                    )
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    print(f"Failed to update message log rollup: {e}")
             
         except Exception as e:
             print(f"Failed to save message log: {e}")
-            db.rollback()
     
     async def add_role_to_chat(self, account_id: int, chat_id: int, role_name: str, 
                               persona: str, openai_api_key: str = None, 
                               response_delay_ms: int = 0, max_response_length: int = 500,
-                              db: Session = None) -> AgentRole:
+                              relevance_rules: Optional[dict] = None, model_routing: Optional[dict] = None,
+                              daily_token_budget: Optional[int] = None, db: Session = None) -> AgentRole:
         """새로운 역할을 채팅방에 추가"""
         try:
             # 채팅방 정보 확인 또는 생성
@@ -226,7 +504,10 @@ class TelegramAgentService:
                 is_active=True,
                 openai_api_key=openai_api_key,
                 response_delay_ms=response_delay_ms,
-                max_response_length=max_response_length
+                max_response_length=max_response_length,
+                relevance_rules=relevance_rules,
+                model_routing=model_routing,
+                daily_token_budget=daily_token_budget
             )
             
             db.add(role)
@@ -237,11 +518,15 @@ class TelegramAgentService:
             if account_id in self.active_clients:
                 self.role_handlers[account_id][chat_id] = {
                     "id": role.id,
+                    "account_id": account_id,
                     "role_name": role.role_name,
                     "persona": role.persona,
                     "openai_api_key": role.openai_api_key,
                     "response_delay_ms": role.response_delay_ms,
-                    "max_response_length": role.max_response_length
+                    "max_response_length": role.max_response_length,
+                    "relevance_rules": role.relevance_rules,
+                    "model_routing": role.model_routing,
+                    "daily_token_budget": role.daily_token_budget
                 }
             
             return role
@@ -278,27 +563,111 @@ class TelegramAgentService:
             db.rollback()
             raise
     
+    async def stop_account_client(self, account_id: int):
+        """개별 계정 클라이언트 중지"""
+        client = self.active_clients.pop(account_id, None)
+        self.role_handlers.pop(account_id, None)
+        self.account_phones.pop(account_id, None)
+        self.dedup_indexes.pop(account_id, None)
+        self.sent_indexes.pop(account_id, None)
+        self.account_usernames.pop(account_id, None)
+        if client is None:
+            return
+        try:
+            await client.disconnect()
+            print(f"Stopped agent {account_id}")
+        except Exception as e:
+            print(f"Error stopping agent {account_id}: {e}")
+    
+    async def sync_accounts(self, account_filter: Optional[Callable[[int], bool]] = None):
+        """활성 계정 목록과 실행 중인 클라이언트 동기화 (신규 시작, 비활성/담당 외 계정 중지)"""
+        try:
+            # 조회/임대 처리에만 세션 사용 (클라이언트 연결 중에는 커넥션 반환)
+            with runtime_session() as db:
+                accounts = db.query(
+                    Account.id,
+                    Account.phone_number,
+                    Account.api_id,
+                    Account.api_hash,
+                    Account.session_string
+                ).filter(Account.is_active == True).all()
+                wanted = {
+                    account.id: account for account in accounts
+                    if account_filter is None or account_filter(account.id)
+                }
+                
+                if self.lease_service:
+                    # 임대를 보유한 계정만 실행 (갱신 실패/다른 노드 인수 시 중지)
+                    held = self.lease_service.acquire(db, wanted.keys())
+                    unwanted = held - wanted.keys()
+                    if unwanted:
+                        self.lease_service.release(db, unwanted)
+                    wanted = {account_id: account for account_id, account in wanted.items() if account_id in held}
+            
+            for account_id in list(self.active_clients.keys()):
+                if account_id not in wanted:
+                    await self.stop_account_client(account_id)
+            
+            for account_id, account in wanted.items():
+                if account_id not in self.active_clients:
+                    await self.start_account_client(account)
+                    
+        except Exception as e:
+            print(f"Error syncing accounts: {e}")
+            await self.stop_expired_clients()
+    
+    async def stop_expired_clients(self):
+        """임대를 갱신하지 못한 채 만료된 계정의 클라이언트 중지 (다른 노드가 인수해 중복 응답하지 않도록)"""
+        if not self.lease_service:
+            return
+        expired = {
+            account_id for account_id in [*self.active_clients, *self.lease_service.deadlines]
+            if not self.lease_service.is_held(account_id)
+        }
+        for account_id in expired:
+            if account_id in self.active_clients:
+                print(f"Lease for account {account_id} expired without renewal, stopping client")
+                await self.stop_account_client(account_id)
+        self.lease_service.forget(expired)
+    
     async def stop_all_agents(self):
         """모든 에이전트 중지"""
-        for account_id, client in self.active_clients.items():
-            try:
-                await client.disconnect()
-                print(f"Stopped agent {account_id}")
-            except Exception as e:
-                print(f"Error stopping agent {account_id}: {e}")
+        if self.sync_task:
+            self.sync_task.cancel()
+            self.sync_task = None
+        if self.catchup_task:
+            self.catchup_task.cancel()
+            self.catchup_task = None
+            self.catchup_queue = None
+        
+        for account_id in list(self.active_clients.keys()):
+            await self.stop_account_client(account_id)
         
-        self.active_clients.clear()
-        self.role_handlers.clear()
+        # 아직 저장되지 않은 토큰 사용량/메시지 로그 저장
+        await usage_accountant.stop()
+        await message_log_spool.stop()
+        
+        # 클라이언트 종료 후 임대 반납 (다른 노드가 즉시 인수 가능)
+        if self.lease_service:
+            with runtime_session() as db:
+                self.lease_service.release(db)
     
     def get_active_agents(self) -> Dict[int, Dict]:
         """활성 에이전트 정보 반환"""
         return {
             account_id: {
-                "phone_number": client.session.phone if hasattr(client, 'session') else "Unknown",
-                "roles": list(roles.keys()) if roles else []
+                "phone_number": self.account_phones.get(account_id, "Unknown"),
+                "roles": list(self.role_handlers.get(account_id, {}).keys()),
+                "duplicates_suppressed": self.dedup_indexes[account_id].suppressed
+                if account_id in self.dedup_indexes else 0,
+                "arbitration_skipped": self.reply_arbiter.skipped.get(account_id, 0),
+                "relevance": relevance_gate.account_stats(account_id),
+                "budget_skipped": sum(
+                    usage_accountant.budget_skipped.get(role["id"], 0)
+                    for role in self.role_handlers.get(account_id, {}).values()
+                )
             }
-            for account_id, client in self.active_clients.items()
-            for roles in [self.role_handlers.get(account_id, {})]
+            for account_id in self.active_clients
         }
 
 # 전역 인스턴스
@@ -0,0 +1,166 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import openai
+
+from app.config import settings
+
+# 역할별 키가 없는 호출이 함께 사용하는 OpenAI API 키 풀
+# OPENAI_API_KEYS 형식: "키[:가중치[:분당 요청 수]]"를 쉼표로 구분 (비우면 OPENAI_API_KEY 하나)
+# 호출마다 남은 여유가 가장 큰 키를 선택하고, 인증/할당량 오류가 난 키는 자동으로 격리합니다.
+# 분당 요청 수는 프로세스별로 계산하므로 샤드 워커는 설정값을 워커 수로 나눠 사용합니다 (여러 노드 실행 시 노드마다 적용).
+
+# 키 자체의 문제로 격리하는 오류 (다른 키로 재시도)
+KEY_ERRORS = (openai.AuthenticationError, openai.PermissionDeniedError)
+
+# 분당 요청 한도 초과(429, 할당량 소진 제외) 시 잠시 쉬는 시간
+RATE_LIMIT_COOLDOWN_SECONDS = 15
+
+class NoAvailableKeyError(Exception):
+    """사용 가능한 키 없음 (모두 격리되었거나 분당 한도 도달)"""
+
+def mask_key(api_key: str) -> str:
+    """상태 표시용 키 라벨"""
+    return f"{api_key[:3]}...{api_key[-4:]}" if len(api_key) > 8 else "***"
+
+def parse_keys(spec: str) -> List[Dict[str, Any]]:
+    """OPENAI_API_KEYS 설정 해석"""
+    keys = []
+    for entry in spec.split(","):
+        parts = entry.strip().split(":")
+        if not parts[0]:
+            continue
+        keys.append({
+            "key": parts[0],
+            "weight": float(parts[1]) if len(parts) > 1 and parts[1] else 1.0,
+            "rpm_limit": int(parts[2]) if len(parts) > 2 and parts[2] else 0
+        })
+    return keys
+
+class PooledKey:
+    """풀의 키 하나와 사용량 (최근 1분 요청 시각, 진행 중 요청 수, 격리 상태)"""
+
+    def __init__(self, key: str, weight: float = 1.0, rpm_limit: int = 0):
+        self.key = key
+        self.label = mask_key(key)
+        self.weight = weight
+        self.configured_rpm_limit = rpm_limit
+        self.rpm_limit = rpm_limit  # 이 프로세스의 분당 한도 (0이면 제한 없음)
+        self.recent_requests: Deque[float] = deque()
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.quarantined_until = 0.0
+        self.last_error: Optional[str] = None
+
+    def _trim(self, now: float):
+        while self.recent_requests and now - self.recent_requests[0] >= 60:
+            self.recent_requests.popleft()
+
+    def headroom(self, now: float) -> float:
+        """남은 여유 (0~1, 분당 한도 대비 남은 비율)"""
+        if now < self.quarantined_until:
+            return 0.0
+        if not self.rpm_limit:
+            return 1.0
+        self._trim(now)
+        return max(self.rpm_limit - len(self.recent_requests), 0) / self.rpm_limit
+
+    def available_in(self, now: float) -> float:
+        """다시 사용할 수 있을 때까지 남은 시간(초) (격리 해제 또는 분당 한도 여유 발생)"""
+        wait = max(self.quarantined_until - now, 0)
+        if self.rpm_limit:
+            self._trim(now)
+            if len(self.recent_requests) >= self.rpm_limit:
+                wait = max(wait, self.recent_requests[len(self.recent_requests) - self.rpm_limit] + 60 - now)
+        return wait
+
+    def score(self, now: float) -> float:
+        """선택 점수 (가중치 x 남은 여유 / 진행 중 요청 수)"""
+        return self.weight * self.headroom(now) / (1 + self.in_flight)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        self._trim(now)
+        return {
+            "key": self.label,
+            "weight": self.weight,
+            "rpm_limit": self.rpm_limit,
+            "requests_last_minute": len(self.recent_requests),
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "quarantined": now < self.quarantined_until,
+            "quarantine_remaining_seconds": round(max(self.quarantined_until - now, 0), 1),
+            "last_error": self.last_error
+        }
+
+class ApiKeyPool:
+    """공유 키 풀: 여유가 가장 큰 키 선택, 오류 키 격리"""
+
+    def __init__(self, keys: Optional[List[Dict[str, Any]]] = None):
+        if keys is None:
+            keys = parse_keys(settings.OPENAI_API_KEYS or settings.OPENAI_API_KEY)
+        self.keys = [PooledKey(**key) for key in keys]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def share_limits(self, shares: int):
+        """분당 한도를 여러 프로세스가 나눠 쓰도록 조정 (샤드 워커에서 워커 수로 호출, 키당 최소 1)"""
+        for pooled in self.keys:
+            if pooled.configured_rpm_limit:
+                pooled.rpm_limit = max(pooled.configured_rpm_limit // max(shares, 1), 1)
+
+    def acquire(self) -> PooledKey:
+        """남은 여유가 가장 큰 키를 할당 (release로 반환)"""
+        now = time.monotonic()
+        best = max(self.keys, key=lambda pooled: pooled.score(now), default=None)
+        if best is None or best.score(now) <= 0:
+            raise NoAvailableKeyError("사용 가능한 OpenAI API 키가 없습니다.")
+        best.recent_requests.append(now)
+        best.in_flight += 1
+        best.calls += 1
+        return best
+
+    async def acquire_wait(self, max_wait: Optional[float] = None) -> PooledKey:
+        """키 할당, 모든 키가 한도/격리 상태이면 max_wait초 안에 사용 가능해지는 키를 기다림"""
+        max_wait = settings.OPENAI_KEY_WAIT_SECONDS if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        while True:
+            try:
+                return self.acquire()
+            except NoAvailableKeyError:
+                now = time.monotonic()
+                wait = min((pooled.available_in(now) for pooled in self.keys), default=None)
+                if wait is None or now + wait > deadline:
+                    raise
+                await asyncio.sleep(max(wait, 0.05))
+
+    def release(self, pooled: PooledKey, error: Optional[BaseException] = None):
+        """키 반환 (키 오류는 격리, 분당 한도 초과는 잠시 제외)"""
+        pooled.in_flight -= 1
+        if error is None:
+            return
+        pooled.errors += 1
+        pooled.last_error = f"{type(error).__name__}: {error}"[:200]
+        now = time.monotonic()
+        if isinstance(error, KEY_ERRORS) or getattr(error, "code", None) == "insufficient_quota":
+            if now >= pooled.quarantined_until:
+                print(f"OpenAI API key {pooled.label} quarantined: {pooled.last_error}")
+            pooled.quarantined_until = now + settings.OPENAI_KEY_QUARANTINE_SECONDS
+        elif isinstance(error, openai.RateLimitError):
+            pooled.quarantined_until = now + RATE_LIMIT_COOLDOWN_SECONDS
+
+    @staticmethod
+    def is_key_error(error: BaseException) -> bool:
+        """다른 키로 재시도할 오류인지 (인증/권한/할당량/분당 한도)"""
+        return isinstance(error, KEY_ERRORS + (openai.RateLimitError,))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [pooled.stats(now) for pooled in self.keys]
+
+# 전역 인스턴스
+api_key_pool = ApiKeyPool()
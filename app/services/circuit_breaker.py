@@ -0,0 +1,66 @@
+import time
+from typing import Any, Dict, Optional
+
+class CircuitOpenError(Exception):
+    """회로가 열려 있어 호출하지 않음"""
+
+class CircuitBreaker:
+    """연속 실패 시 일정 시간 호출을 차단하는 회로 차단기 (closed -> open -> half_open -> closed)
+
+    연속 failure_threshold번 실패하면 open 상태가 되어 open_seconds 동안 즉시 실패하고,
+    이후 half_open 상태에서 한 번의 시험 호출이 성공하면 closed로 돌아갑니다.
+    """
+
+    def __init__(self, failure_threshold: int, open_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """호출 허용 여부 (open 기간이 지나면 시험 호출 한 건만 허용)"""
+        now = time.monotonic() if now is None else now
+        if self.state == "open" and now - self.opened_at >= self.open_seconds:
+            self.state = "half_open"
+            self.trial_in_flight = False
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def release_trial(self):
+        """결과 없이 끝난 시험 호출(취소 등) 해제 (다음 호출이 다시 시험할 수 있도록)"""
+        self.trial_in_flight = False
+
+    def record_failure(self, now: Optional[float] = None):
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic() if now is None else now
+
+    def stats(self) -> Dict[str, Any]:
+        remaining = None
+        if self.state == "open":
+            remaining = round(max(self.open_seconds - (time.monotonic() - self.opened_at), 0), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "open_remaining_seconds": remaining
+        }
@@ -0,0 +1,49 @@
+import time
+from typing import Hashable, Optional, Set
+
+class RecentMessageIndex:
+    """최근 처리한 메시지 키 인덱스 (두 세대 집합을 교대로 사용, 메모리 사용량 상한)
+
+    현재 세대가 window_seconds를 넘기거나 max_entries에 도달하면 이전 세대를 버리고 교체하므로
+    키는 최소 한 세대 기간 동안 유지되고, 전체 크기는 2 * max_entries를 넘지 않습니다.
+    """
+
+    def __init__(self, window_seconds: float, max_entries: int):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.current: Set[Hashable] = set()
+        self.previous: Set[Hashable] = set()
+        self.rotated_at = time.monotonic()
+        self.checked = 0
+        self.suppressed = 0
+
+    def _maybe_rotate(self, now: float):
+        if now - self.rotated_at >= self.window_seconds or len(self.current) >= self.max_entries:
+            self.previous = self.current
+            self.current = set()
+            self.rotated_at = now
+
+    def check_and_add(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """이미 처리한 키이면 True (중복), 처음이면 기록 후 False"""
+        self._maybe_rotate(time.monotonic() if now is None else now)
+        self.checked += 1
+        if key in self.current or key in self.previous:
+            self.suppressed += 1
+            return True
+        self.current.add(key)
+        return False
+
+    def add(self, key: Hashable):
+        """처리한 키 기록 (중복 여부 확인 없이)"""
+        self._maybe_rotate(time.monotonic())
+        self.current.add(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.current or key in self.previous
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.current) + len(self.previous),
+            "checked": self.checked,
+            "duplicates_suppressed": self.suppressed
+        }
@@ -0,0 +1,157 @@
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, or_
+
+from app.models.account_lease import AccountLease
+from app.config import settings
+
+def default_node_id() -> str:
+    """노드 식별자 (설정값이 없으면 호스트명:PID)"""
+    return settings.AGENT_NODE_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+class LeaseService:
+    """계정 실행 임대 관리 (노드별 용량 한도 내 획득, 주기적 갱신, 만료 임대 인수, 종료 시 반납)
+
+    시각 비교는 각 노드의 UTC 시계를 사용하므로 TTL은 동기화 주기와 노드 간 시계 오차보다
+    충분히 길게 설정해야 합니다. 마지막으로 성공한 획득/갱신 시점 기준의 만료 시각을 로컬에도 기록해,
+    DB 장애로 갱신하지 못하면 다른 노드가 인수하기 전에 클라이언트를 중지할 수 있게 합니다.
+    """
+
+    def __init__(self, node_id: Optional[str] = None, capacity: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None):
+        self.node_id = node_id or default_node_id()
+        self.capacity = capacity if capacity is not None else settings.AGENT_NODE_CAPACITY
+        self.ttl_seconds = ttl_seconds or settings.AGENT_LEASE_TTL_SECONDS
+        self.deadlines: Dict[int, float] = {}  # account_id -> 로컬 만료 시각 (time.monotonic 기준)
+
+    def _expiry(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.ttl_seconds)
+
+    def is_held(self, account_id: int) -> bool:
+        """마지막 획득/갱신 이후 임대가 아직 유효한지 (DB 조회 없이 로컬 만료 시각으로 판단)"""
+        deadline = self.deadlines.get(account_id)
+        return deadline is not None and deadline > time.monotonic()
+
+    def seconds_until_expiry(self) -> Optional[float]:
+        """보유 임대 중 가장 먼저 만료되는 임대까지 남은 시간 (보유 임대가 없으면 None)"""
+        if not self.deadlines:
+            return None
+        return min(self.deadlines.values()) - time.monotonic()
+
+    def forget(self, account_ids: Iterable[int]):
+        """로컬 만료 시각 삭제 (반납했거나 만료되어 클라이언트를 중지한 계정)"""
+        for account_id in account_ids:
+            self.deadlines.pop(account_id, None)
+
+    def renew(self, db: Session) -> Set[int]:
+        """보유 중인 임대 갱신 후 현재 보유 계정 반환 (다른 노드가 인수한 계정은 제외됨)"""
+        now = datetime.utcnow()
+        # 갱신 요청 전 시각 기준으로 만료 시각 계산 (DB에 기록되는 만료 시각보다 늦지 않음)
+        deadline = time.monotonic() + self.ttl_seconds
+        try:
+            db.query(AccountLease).filter(AccountLease.node_id == self.node_id).update(
+                {"expires_at": self._expiry(now), "renewed_at": now},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        rows = db.query(AccountLease.account_id).filter(AccountLease.node_id == self.node_id).all()
+        held = {row.account_id for row in rows}
+        self.deadlines = {account_id: deadline for account_id in held}
+        return held
+
+    def acquire(self, db: Session, account_ids: Iterable[int], held: Optional[Set[int]] = None) -> Set[int]:
+        """후보 계정 중 비어 있거나 만료된 임대를 용량 한도까지 획득, 전체 보유 계정 반환"""
+        held = set(held) if held is not None else self.renew(db)
+        room = None if self.capacity <= 0 else self.capacity - len(held)
+        candidates = sorted(set(account_ids) - held)
+        if not candidates or (room is not None and room <= 0):
+            return held
+
+        now = datetime.utcnow()
+        deadline = time.monotonic() + self.ttl_seconds
+        existing = {
+            row.account_id: row
+            for row in db.query(AccountLease.account_id, AccountLease.node_id, AccountLease.expires_at).filter(
+                AccountLease.account_id.in_(candidates)
+            ).all()
+        }
+
+        for account_id in candidates:
+            if room is not None and room <= 0:
+                break
+            lease = existing.get(account_id)
+            if lease is not None and lease.expires_at >= now:
+                continue  # 다른 노드가 보유 중
+
+            try:
+                if lease is None:
+                    db.add(AccountLease(
+                        account_id=account_id,
+                        node_id=self.node_id,
+                        expires_at=self._expiry(now),
+                        acquired_at=now,
+                        renewed_at=now
+                    ))
+                    db.commit()
+                    acquired = True
+                else:
+                    # 만료된 임대 인수 (조건부 UPDATE로 동시 인수 경쟁 방지)
+                    acquired = db.query(AccountLease).filter(
+                        and_(
+                            AccountLease.account_id == account_id,
+                            or_(AccountLease.expires_at < now, AccountLease.node_id == self.node_id)
+                        )
+                    ).update(
+                        {"node_id": self.node_id, "expires_at": self._expiry(now),
+                         "acquired_at": now, "renewed_at": now},
+                        synchronize_session=False
+                    ) == 1
+                    db.commit()
+            except IntegrityError:
+                db.rollback()
+                acquired = False  # 다른 노드가 먼저 생성
+
+            if acquired:
+                held.add(account_id)
+                self.deadlines[account_id] = deadline
+                if room is not None:
+                    room -= 1
+        return held
+
+    def release(self, db: Session, account_ids: Optional[Iterable[int]] = None):
+        """임대 반납 (미지정 시 이 노드의 모든 임대)"""
+        try:
+            query = db.query(AccountLease).filter(AccountLease.node_id == self.node_id)
+            if account_ids is not None:
+                query = query.filter(AccountLease.account_id.in_(list(account_ids)))
+            query.delete(synchronize_session=False)
+            db.commit()
+            if account_ids is None:
+                self.deadlines.clear()
+            else:
+                self.forget(account_ids)
+        except Exception as e:
+            print(f"Error releasing leases for node {self.node_id}: {e}")
+            db.rollback()
+
+    def list_leases(self, db: Session) -> List[dict]:
+        """전체 임대 현황"""
+        now = datetime.utcnow()
+        rows = db.query(AccountLease).order_by(AccountLease.account_id).all()
+        return [
+            {
+                "account_id": row.account_id,
+                "node_id": row.node_id,
+                "expires_at": row.expires_at,
+                "expired": row.expires_at < now
+            }
+            for row in rows
+        ]
@@ -0,0 +1,228 @@
+import gzip
+import json
+import os
+import shutil
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.message_rollup_service import PERCENTILES
+from app.services.usage_service import to_utc_naive
+
+# 보관 기간이 지난 메시지 로그의 컬럼형 아카이브 (날짜/역할별 디렉터리)
+# 레이아웃: {MESSAGE_LOG_ARCHIVE_DIR}/columnar/date=YYYY-MM-DD/role=N/part-{첫 id}-{마지막 id}/
+#   숫자 컬럼은 컬럼별 .npy 파일 (메모리 매핑으로 필요한 컬럼만 읽음, NULL은 -1)
+#   텍스트 컬럼은 text.json.gz (조회 결과 행을 반환할 때만 읽음)
+
+NUMERIC_COLUMNS = {
+    "id": np.int64,
+    "chat_id": np.int64,
+    "user_id": np.int64,
+    "created_at_ms": np.int64,  # UTC 기준 epoch 밀리초
+    "response_time_ms": np.int32,
+    "queue_wait_ms": np.int32,
+    "llm_ms": np.int32,
+    "delay_ms": np.int32,
+    "send_ms": np.int32,
+    "prompt_tokens": np.int32,
+    "completion_tokens": np.int32
+}
+NOT_NULL_COLUMNS = ("id", "chat_id", "user_id", "created_at_ms")
+TEXT_COLUMNS = ("message_text", "response_text", "role_used", "model")
+NULL_VALUE = -1
+GROUP_BY_OPTIONS = ("role", "chat", "day")
+EPOCH = datetime(1970, 1, 1)
+
+def epoch_ms(value: datetime) -> int:
+    return (to_utc_naive(value) - EPOCH) // timedelta(milliseconds=1)
+
+class LogArchiveService:
+    """컬럼형 아카이브 쓰기와 메모리 매핑 기반 조회/집계"""
+
+    @property
+    def root(self) -> str:
+        return os.path.join(settings.MESSAGE_LOG_ARCHIVE_DIR, "columnar")
+
+    def _write_part(self, day: date, role_id: int, rows: List[Dict[str, Any]]) -> bool:
+        """날짜/역할 하나의 행을 part 디렉터리로 저장 (임시 디렉터리에 쓴 뒤 이름 변경)
+
+        part 이름은 첫/마지막 id로 정해지므로, 중단된 아카이브를 다시 실행하면 이미 저장된 part는 건너뜁니다.
+        """
+        partition_dir = os.path.join(self.root, f"date={day.isoformat()}", f"role={role_id}")
+        part_dir = os.path.join(partition_dir, f"part-{rows[0]['id']}-{rows[-1]['id']}")
+        if os.path.isdir(part_dir):
+            return False
+        temp_dir = part_dir + ".tmp"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+
+        for column, dtype in NUMERIC_COLUMNS.items():
+            if column == "created_at_ms":
+                values = [epoch_ms(row["created_at"]) for row in rows]
+            else:
+                values = [NULL_VALUE if row[column] is None else row[column] for row in rows]
+            np.save(os.path.join(temp_dir, f"{column}.npy"), np.array(values, dtype=dtype))
+        np.save(os.path.join(temp_dir, "replied.npy"), np.array([row["response_text"] is not None for row in rows]))
+        with gzip.open(os.path.join(temp_dir, "text.json.gz"), "wt", encoding="utf-8") as text_file:
+            json.dump({column: [row[column] for row in rows] for column in TEXT_COLUMNS}, text_file, ensure_ascii=False)
+        os.rename(temp_dir, part_dir)
+        return True
+
+    def write(self, chunks: Iterable[List[Dict[str, Any]]]) -> int:
+        """created_at 순으로 정렬된 로그 청크를 날짜/역할별로 저장, 저장한 행 수 반환 (메모리에는 하루치만 유지)"""
+        buffers: Dict[int, List[Dict[str, Any]]] = {}
+        current_day: Optional[date] = None
+        count = 0
+
+        def flush():
+            for role_id, rows in buffers.items():
+                rows.sort(key=lambda row: row["id"])
+                self._write_part(current_day, role_id, rows)
+            buffers.clear()
+
+        for chunk in chunks:
+            for row in chunk:
+                day = to_utc_naive(row["created_at"]).date()
+                if day != current_day:
+                    flush()
+                    current_day = day
+                buffers.setdefault(row["agent_role_id"] or 0, []).append(row)
+                count += 1
+        flush()
+        return count
+
+    def _parts(self, since: Optional[datetime], until: Optional[datetime],
+               role_id: Optional[int]) -> List[Dict[str, Any]]:
+        """기간/역할에 해당하는 part 디렉터리 (디렉터리 이름으로 먼저 걸러냄)"""
+        parts = []
+        if not os.path.isdir(self.root):
+            return parts
+        for date_dir in sorted(os.listdir(self.root)):
+            if not date_dir.startswith("date="):
+                continue
+            day_start = datetime.fromisoformat(date_dir[len("date="):])
+            if (since and day_start + timedelta(days=1) <= since) or (until and day_start >= until):
+                continue
+            for role_dir in sorted(os.listdir(os.path.join(self.root, date_dir))):
+                part_role = int(role_dir[len("role="):])
+                if role_id is not None and part_role != role_id:
+                    continue
+                role_path = os.path.join(self.root, date_dir, role_dir)
+                for part in sorted(os.listdir(role_path)):
+                    if not part.endswith(".tmp"):
+                        parts.append({"path": os.path.join(role_path, part), "role": part_role, "day": date_dir[len("date="):]})
+        return parts
+
+    @staticmethod
+    def _load(path: str, column: str) -> np.ndarray:
+        return np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+
+    @staticmethod
+    def _summary(count: int, latencies: np.ndarray, tokens: int) -> Dict[str, Any]:
+        """행 수와 응답 시간 배열 -> 응답 수/평균/백분위"""
+        replies = len(latencies)
+        values = np.percentile(latencies, PERCENTILES, method="higher") if replies else [None] * len(PERCENTILES)
+        return {
+            "message_count": int(count),
+            "reply_count": replies,
+            "total_tokens": int(tokens),
+            "avg_response_time_ms": round(float(latencies.mean()), 1) if replies else None,
+            **{f"p{p}_ms": None if value is None else int(value) for p, value in zip(PERCENTILES, values)}
+        }
+
+    def query(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              role_id: Optional[int] = None, chat_id: Optional[int] = None, user_id: Optional[int] = None,
+              group_by: Optional[str] = None, limit: int = 0) -> Dict[str, Any]:
+        """아카이브 필터 조회와 집계 (group_by: role, chat, day / limit > 0 이면 최신 행 반환)"""
+        since_ms = epoch_ms(since) if since else np.iinfo(np.int64).min
+        until_ms = epoch_ms(until) if until else np.iinfo(np.int64).max
+        parts = self._parts(since, until, role_id)
+
+        matched = {"created": [], "latency": [], "replied": [], "tokens": [], "group": [], "part": [], "index": []}
+        scanned_rows = 0
+        for part_index, part in enumerate(parts):
+            created = self._load(part["path"], "created_at_ms")
+            scanned_rows += len(created)
+            mask = (created >= since_ms) & (created < until_ms)
+            if chat_id is not None:
+                mask &= self._load(part["path"], "chat_id") == chat_id
+            if user_id is not None:
+                mask &= self._load(part["path"], "user_id") == user_id
+            indexes = np.flatnonzero(mask)
+            if not len(indexes):
+                continue
+            latency = self._load(part["path"], "response_time_ms")[indexes]
+            replied = self._load(part["path"], "replied")[indexes] & (latency >= 0)
+            tokens = (np.maximum(self._load(part["path"], "prompt_tokens")[indexes], 0).astype(np.int64)
+                      + np.maximum(self._load(part["path"], "completion_tokens")[indexes], 0))
+            if group_by == "chat":
+                group = np.asarray(self._load(part["path"], "chat_id")[indexes])
+            elif group_by == "day":
+                group = np.full(len(indexes), part["day"])
+            else:
+                group = np.full(len(indexes), part["role"])
+            matched["created"].append(np.asarray(created[indexes]))
+            matched["latency"].append(latency)
+            matched["replied"].append(replied)
+            matched["tokens"].append(tokens)
+            matched["group"].append(group)
+            matched["part"].append(np.full(len(indexes), part_index))
+            matched["index"].append(indexes)
+
+        if not matched["created"]:
+            empty = {"summary": self._summary(0, np.array([]), 0), "scanned_parts": len(parts), "scanned_rows": scanned_rows}
+            if group_by:
+                empty["groups"] = []
+            if limit:
+                empty["rows"] = []
+            return empty
+
+        columns = {name: np.concatenate(arrays) for name, arrays in matched.items()}
+        replied = columns["replied"]
+        result = {
+            "summary": self._summary(len(columns["created"]), columns["latency"][replied], columns["tokens"].sum()),
+            "scanned_parts": len(parts),
+            "scanned_rows": scanned_rows
+        }
+
+        if group_by:
+            keys, inverse = np.unique(columns["group"], return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(keys))
+            tokens = np.bincount(inverse, weights=columns["tokens"], minlength=len(keys))
+            # 응답 시간을 (그룹, 응답 시간) 순으로 정렬해 그룹별 구간으로 나눔
+            reply_groups, reply_latencies = inverse[replied], columns["latency"][replied]
+            order = np.lexsort((reply_latencies, reply_groups))
+            bounds = np.searchsorted(reply_groups[order], np.arange(len(keys) + 1))
+            sorted_latencies = reply_latencies[order]
+            result["groups"] = [
+                {group_by: key.item(),
+                 **self._summary(counts[index], sorted_latencies[bounds[index]:bounds[index + 1]], tokens[index])}
+                for index, key in enumerate(keys)
+            ]
+
+        if limit:
+            latest = np.argsort(-columns["created"], kind="stable")[:limit]
+            texts: Dict[int, Dict[str, list]] = {}
+            numbers: Dict[int, Dict[str, np.ndarray]] = {}
+            rows = []
+            for position in latest:
+                part_index, index = int(columns["part"][position]), int(columns["index"][position])
+                part = parts[part_index]
+                if part_index not in texts:
+                    with gzip.open(os.path.join(part["path"], "text.json.gz"), "rt", encoding="utf-8") as text_file:
+                        texts[part_index] = json.load(text_file)
+                    numbers[part_index] = {column: self._load(part["path"], column) for column in NUMERIC_COLUMNS}
+                row = {"agent_role_id": part["role"]}
+                for column in NUMERIC_COLUMNS:
+                    value = int(numbers[part_index][column][index])
+                    row[column] = None if value == NULL_VALUE and column not in NOT_NULL_COLUMNS else value
+                row["created_at"] = (EPOCH + timedelta(milliseconds=row.pop("created_at_ms"))).isoformat()
+                row.update({column: texts[part_index][column][index] for column in TEXT_COLUMNS})
+                rows.append(row)
+            result["rows"] = rows
+        return result
+
+# 전역 인스턴스
+log_archive_service = LogArchiveService()
@@ -0,0 +1,254 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine, runtime_session
+from app.models.message_log import MessageLog
+from app.services.log_archive_service import log_archive_service
+
+# message_logs 월 단위 파티션 관리와 보관 기간이 지난 로그 아카이브
+# Postgres: message_logs는 created_at 기준 RANGE 파티션 테이블 (supabase_schema.sql), 월별 파티션을 미리 생성하고
+#           보관 기간이 지난 파티션은 분리(DETACH) -> 압축 파일로 저장 -> 삭제(DROP)합니다.
+# SQLite: 파티션이 없으므로 message_logs를 최근 데이터 테이블로 유지하고, 오래된 달의 행을 압축 파일로 저장한 뒤 삭제합니다.
+# 아카이브 형식은 MESSAGE_LOG_ARCHIVE_FORMAT: columnar (날짜/역할별 컬럼 파일, log_archive_service) 또는 ndjson (월별 gzip NDJSON)
+# 관리 작업은 프로세스 내 잠금과 Postgres advisory lock으로 한 번에 하나만 실행합니다 (백그라운드 루프, API, 여러 노드).
+
+PARTITION_PREFIX = "message_logs_"
+DEFAULT_PARTITION = "message_logs_default"
+MAINTENANCE_LOCK_KEY = 7304520146  # pg_try_advisory_lock 키 (메시지 로그 관리 작업)
+# 아카이브에 저장하는 컬럼 (Postgres 검색용 search_vector 등 파생 컬럼 제외)
+ARCHIVE_COLUMNS = ", ".join(column.name for column in MessageLog.__table__.columns)
+ARCHIVE_CHUNK_SIZE = 5000
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}"
+
+def partition_month(name: str) -> Optional[date]:
+    """파티션 이름에서 월 추출 (message_logs_YYYY_MM 형식이 아니면 None)"""
+    try:
+        year, month = name[len(PARTITION_PREFIX):].split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+class LogPartitionService:
+    """메시지 로그 파티션 생성, 보관 기간 적용, 아카이브"""
+
+    def __init__(self):
+        self.dialect = engine.dialect.name
+        self.maintenance_task: Optional[asyncio.Task] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.maintenance_lock = threading.Lock()
+
+    @property
+    def postgres(self) -> bool:
+        return self.dialect == "postgresql"
+
+    def is_partitioned(self, db) -> bool:
+        """message_logs가 파티션 테이블인지 (Postgres 전용)"""
+        if not self.postgres:
+            return False
+        return bool(db.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'message_logs')"
+        )).scalar())
+
+    def ensure_partitions(self, db, months_ahead: Optional[int] = None) -> List[str]:
+        """이번 달부터 months_ahead개월 뒤까지 파티션 생성 (이미 있으면 건너뜀), 새로 만든 파티션 반환"""
+        if not self.is_partitioned(db):
+            return []
+        months_ahead = settings.MESSAGE_LOG_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+        existing = {row["name"] for row in self.list_partitions(db)}
+        created = []
+        current = month_start(datetime.utcnow().date())
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            moved = self._move_default_rows(db, month) if DEFAULT_PARTITION in existing else 0
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF message_logs "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            if moved:
+                # 부모 테이블로 다시 넣으면 새 파티션에 저장됨
+                db.execute(text(
+                    f"INSERT INTO message_logs ({ARCHIVE_COLUMNS}) SELECT {ARCHIVE_COLUMNS} FROM moved_message_logs"
+                ))
+                print(f"Moved {moved} message logs of {month:%Y-%m} from {DEFAULT_PARTITION} to {name}")
+            db.commit()
+            created.append(name)
+        return created
+
+    def _move_default_rows(self, db, month: date) -> int:
+        """새 파티션 범위의 행을 기본 파티션에서 임시 테이블로 옮김 (남아 있으면 파티션 생성이 실패하므로, 같은 트랜잭션에서 처리)"""
+        params = {"start": month, "end": add_months(month, 1)}
+        condition = "created_at >= :start AND created_at < :end"
+        db.execute(text(
+            f"CREATE TEMP TABLE moved_message_logs ON COMMIT DROP AS "
+            f"SELECT {ARCHIVE_COLUMNS} FROM {DEFAULT_PARTITION} WHERE {condition}"
+        ), params)
+        return db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {condition}"), params).rowcount
+
+    def list_partitions(self, db) -> List[Dict[str, Any]]:
+        """파티션(SQLite는 월별 행 수) 목록"""
+        if self.postgres:
+            rows = db.execute(text(
+                "SELECT child.relname AS name, pg_get_expr(child.relpartbound, child.oid) AS bounds, "
+                "child.reltuples::bigint AS estimated_rows "
+                "FROM pg_inherits JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = 'message_logs' ORDER BY child.relname"
+            )).mappings().all()
+            return [dict(row) for row in rows]
+
+        rows = db.execute(text(
+            "SELECT strftime('%Y_%m', created_at) AS month, COUNT(*) AS row_count "
+            "FROM message_logs GROUP BY month ORDER BY month"
+        )).mappings().all()
+        return [{"name": f"{PARTITION_PREFIX}{row['month']}", "rows": row["row_count"]} for row in rows]
+
+    def _detached_partitions(self, db) -> List[str]:
+        """분리되었지만 아직 삭제되지 않은 파티션 (이전 아카이브가 중간에 실패한 경우)"""
+        rows = db.execute(text(
+            "SELECT c.relname FROM pg_class c "
+            "WHERE c.relkind = 'r' AND c.relname LIKE 'message\\_logs\\_%' AND NOT c.relispartition"
+        )).all()
+        return [row[0] for row in rows if partition_month(row[0]) is not None]
+
+    def _write_archive(self, db, query: str, params: Dict[str, Any], month: date) -> Tuple[int, str]:
+        """쿼리 결과(created_at 순)를 설정된 형식으로 저장, (저장한 행 수, 저장 위치) 반환"""
+        result = db.connection().execution_options(stream_results=True).execute(text(query), params)
+        chunks = ([dict(row) for row in chunk] for chunk in result.mappings().partitions(ARCHIVE_CHUNK_SIZE))
+        if settings.MESSAGE_LOG_ARCHIVE_FORMAT == "columnar":
+            return log_archive_service.write(chunks), log_archive_service.root
+
+        path = self.archive_path(month)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = path + ".tmp"
+        count = 0
+        with gzip.open(temp_path, "wt", encoding="utf-8") as archive:
+            for chunk in chunks:
+                archive.write("".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in chunk))
+                count += len(chunk)
+            archive.flush()
+            os.fsync(archive.fileno())
+        os.replace(temp_path, path)
+        return count, path
+
+    def archive_path(self, month: date) -> str:
+        """아카이브 파일 경로 (같은 달 파일이 이미 있으면 번호를 붙여 덮어쓰지 않음)"""
+        base = os.path.join(settings.MESSAGE_LOG_ARCHIVE_DIR, partition_name(month))
+        path, suffix = f"{base}.ndjson.gz", 1
+        while os.path.exists(path):
+            path, suffix = f"{base}.{suffix}.ndjson.gz", suffix + 1
+        return path
+
+    def archive_month(self, db, month: date) -> Dict[str, Any]:
+        """한 달치 로그를 아카이브로 저장한 뒤 삭제 (Postgres는 파티션 분리 후 삭제)"""
+        name = partition_name(month)
+        if self.postgres:
+            if name not in self._detached_partitions(db):
+                db.execute(text(f"ALTER TABLE message_logs DETACH PARTITION {name}"))
+                db.commit()
+            rows, path = self._write_archive(db, f"SELECT {ARCHIVE_COLUMNS} FROM {name} ORDER BY created_at, id", {}, month)
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+        else:
+            params = {"start": datetime.combine(month, datetime.min.time()),
+                      "end": datetime.combine(add_months(month, 1), datetime.min.time())}
+            condition = "created_at >= :start AND created_at < :end"
+            rows, path = self._write_archive(
+                db, f"SELECT {ARCHIVE_COLUMNS} FROM message_logs WHERE {condition} ORDER BY created_at, id", params, month
+            )
+            db.execute(text(f"DELETE FROM message_logs WHERE {condition}"), params)
+            db.commit()
+        print(f"Archived {rows} message logs of {month:%Y-%m} to {path}")
+        return {"partition": name, "rows": rows, "archive": path}
+
+    def expired_months(self, db, cutoff: date) -> List[date]:
+        """보관 기간(cutoff 이전)이 지난 달 목록"""
+        names = [row["name"] for row in self.list_partitions(db)]
+        if self.postgres:
+            names += self._detached_partitions(db)
+        months = {partition_month(name) for name in names}
+        return sorted(month for month in months if month is not None and month < cutoff)
+
+    def retention_cutoff(self) -> Optional[date]:
+        """보관 기간의 시작 월 (이보다 오래된 달은 아카이브 대상, 보관 기간 미설정 시 None)"""
+        if settings.MESSAGE_LOG_RETENTION_MONTHS <= 0:
+            return None
+        return add_months(month_start(datetime.utcnow().date()), -settings.MESSAGE_LOG_RETENTION_MONTHS)
+
+    def run_maintenance(self) -> Dict[str, Any]:
+        """파티션 미리 생성 + 보관 기간이 지난 달 아카이브 (다른 관리 작업이 실행 중이면 건너뜀)"""
+        if not self.maintenance_lock.acquire(blocking=False):
+            return {"skipped": True, "reason": "이 프로세스에서 관리 작업이 이미 실행 중입니다."}
+        try:
+            if not self.postgres:
+                return self._run_maintenance()
+            # 세션 단위 advisory lock (작업 중 여러 번 커밋하므로 트랜잭션 단위 잠금은 사용하지 않음, 연결이 끊기면 자동 해제)
+            with engine.connect() as lock_connection:
+                if not lock_connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar():
+                    return {"skipped": True, "reason": "다른 노드에서 관리 작업이 실행 중입니다."}
+                try:
+                    return self._run_maintenance()
+                finally:
+                    lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+                    lock_connection.commit()
+        finally:
+            self.maintenance_lock.release()
+
+    def _run_maintenance(self) -> Dict[str, Any]:
+        with runtime_session() as db:
+            created = self.ensure_partitions(db)
+            archived = []
+            cutoff = self.retention_cutoff()
+            if cutoff is not None:
+                for month in self.expired_months(db, cutoff):
+                    archived.append(self.archive_month(db, month))
+        self.last_run = {
+            "ran_at": datetime.utcnow().isoformat(),
+            "created_partitions": created,
+            "archived": archived
+        }
+        return self.last_run
+
+    async def _maintenance_loop(self, interval_seconds: int):
+        while True:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.run_maintenance)
+            except Exception as e:
+                print(f"Message log maintenance failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def start_maintenance(self, interval_seconds: Optional[int] = None):
+        """백그라운드 파티션 관리 시작"""
+        interval_seconds = interval_seconds or settings.MESSAGE_LOG_MAINTENANCE_INTERVAL_SECONDS
+        if interval_seconds <= 0 or (self.maintenance_task and not self.maintenance_task.done()):
+            return
+        self.maintenance_task = asyncio.create_task(self._maintenance_loop(interval_seconds))
+
+    def stop_maintenance(self):
+        """백그라운드 파티션 관리 중지"""
+        if self.maintenance_task:
+            self.maintenance_task.cancel()
+            self.maintenance_task = None
+
+# 전역 인스턴스
+log_partition_service = LogPartitionService()
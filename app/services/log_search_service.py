@@ -0,0 +1,106 @@
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.database import engine
+
+# 메시지 로그 전문 검색 (message_text, response_text)
+# SQLite: FTS5 외부 콘텐츠 테이블 message_logs_fts + 트리거로 동기화 (최초 검색 시 생성 후 기존 로그 색인)
+# Postgres: message_logs.search_vector (생성 컬럼, 'simple' 구성) + GIN 인덱스 (supabase_schema.sql)
+# 검색어는 공백으로 나눈 단어별 접두사 일치이며 모든 단어가 포함된 로그만 반환합니다 (한국어 조사 대응).
+
+SEARCH_COLUMNS = "id, agent_role_id, chat_id, user_id, message_text, response_text, role_used, created_at"
+
+SQLITE_INDEX_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS message_logs_fts USING fts5("
+    "message_text, response_text, content='message_logs', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS message_logs_fts_insert AFTER INSERT ON message_logs BEGIN "
+    "INSERT INTO message_logs_fts(rowid, message_text, response_text) "
+    "VALUES (new.id, new.message_text, new.response_text); END",
+    "CREATE TRIGGER IF NOT EXISTS message_logs_fts_delete AFTER DELETE ON message_logs BEGIN "
+    "INSERT INTO message_logs_fts(message_logs_fts, rowid, message_text, response_text) "
+    "VALUES ('delete', old.id, old.message_text, old.response_text); END",
+    "CREATE TRIGGER IF NOT EXISTS message_logs_fts_update AFTER UPDATE OF message_text, response_text "
+    "ON message_logs BEGIN "
+    "INSERT INTO message_logs_fts(message_logs_fts, rowid, message_text, response_text) "
+    "VALUES ('delete', old.id, old.message_text, old.response_text); "
+    "INSERT INTO message_logs_fts(rowid, message_text, response_text) "
+    "VALUES (new.id, new.message_text, new.response_text); END"
+)
+
+def search_terms(query: str) -> List[str]:
+    """검색어 -> 단어 목록 (문자/숫자 외 기호 제거)"""
+    return re.findall(r"[^\W_]+", query.lower())
+
+class LogSearchService:
+    """메시지 로그 전문 검색 (관련도순, (score, id) 커서 페이지네이션)"""
+
+    def __init__(self):
+        self.dialect = engine.dialect.name
+        self.index_ready = False
+
+    def ensure_index(self, db):
+        """SQLite FTS 테이블/트리거 생성 (새로 만든 경우 기존 로그 색인)"""
+        if self.index_ready or self.dialect != "sqlite":
+            return
+        exists = db.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'message_logs_fts'"
+        )).first()
+        for statement in SQLITE_INDEX_STATEMENTS:
+            db.execute(text(statement))
+        if not exists:
+            db.execute(text("INSERT INTO message_logs_fts(message_logs_fts) VALUES ('rebuild')"))
+        db.commit()
+        self.index_ready = True
+
+    def search(self, db, query: str, limit: int, after: Optional[Dict[str, Any]] = None,
+               role_id: Optional[int] = None, chat_id: Optional[int] = None, user_id: Optional[int] = None,
+               since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """검색어와 필터에 맞는 로그를 관련도(score) 높은 순으로 limit+1건 조회"""
+        terms = search_terms(query)
+        if not terms:
+            raise ValueError("검색어에 단어가 없습니다.")
+        self.ensure_index(db)
+
+        params: Dict[str, Any] = {"limit": limit + 1}
+        filters = []
+        for column, value in (("agent_role_id", role_id), ("chat_id", chat_id), ("user_id", user_id)):
+            if value is not None:
+                filters.append(f"m.{column} = :{column}")
+                params[column] = value
+        if since is not None:
+            filters.append("m.created_at >= :since")
+            params["since"] = since
+        if until is not None:
+            filters.append("m.created_at < :until")
+            params["until"] = until
+        columns = ", ".join(f"m.{column}" for column in SEARCH_COLUMNS.split(", "))
+
+        if self.dialect == "postgresql":
+            params["query"] = " & ".join(f"{term}:*" for term in terms)
+            hits = (
+                f"SELECT {columns}, ts_rank_cd(m.search_vector, q)::float8 AS score "
+                f"FROM message_logs m, to_tsquery('simple', :query) q "
+                f"WHERE m.search_vector @@ q"
+            )
+        else:
+            params["query"] = " ".join(f'"{term}"*' for term in terms)
+            hits = (
+                f"SELECT {columns}, -bm25(message_logs_fts) AS score "
+                f"FROM message_logs_fts JOIN message_logs m ON m.id = message_logs_fts.rowid "
+                f"WHERE message_logs_fts MATCH :query"
+            )
+        if filters:
+            hits += " AND " + " AND ".join(filters)
+
+        statement = f"SELECT * FROM ({hits}) hits"
+        if after:
+            statement += " WHERE score < :after_score OR (score = :after_score AND id < :after_id)"
+            params.update(after_score=float(after["score"]), after_id=int(after["id"]))
+        statement += " ORDER BY score DESC, id DESC LIMIT :limit"
+        return [dict(row) for row in db.execute(text(statement), params).mappings().all()]
+
+# 전역 인스턴스
+log_search_service = LogSearchService()
@@ -0,0 +1,346 @@
+import asyncio
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.config import settings
+from app.database import runtime_session
+from app.models.message_log import MessageLog
+from app.services.message_rollup_service import message_rollup_service
+
+# 메시지 로그 디스크 스풀: DB가 느리거나 중단되어도 로그를 잃지 않고 응답 처리를 막지 않음
+# 로그는 먼저 추가 전용 파일에 [길이(4) | CRC32(4) | JSON] 레코드로 기록하고 (fsync는 모아서 수행),
+# 백그라운드 드레이너가 체크포인트(처리한 바이트 위치) 이후 레코드를 배치로 DB에 저장합니다.
+# 레코드마다 고유 ID(log_key)를 붙여, 저장 후 체크포인트 갱신 전에 중단되어 같은 배치를 다시 저장해도 중복되지 않습니다.
+# 다시 시도해도 실패하는 데이터 오류(잘못된 값, log_key 충돌)는 배치를 반씩 나눠 원인 레코드만
+# dead-letter 파일(스풀 경로 + .dead, NDJSON)로 옮겨 나머지 로그 저장이 막히지 않게 하고, 그 밖의 오류는 백오프 후 재시도합니다.
+
+RECORD_HEADER = struct.Struct(">II")
+STAGE_COLUMNS = ("queue_wait_ms", "llm_ms", "delay_ms", "send_ms", "model", "prompt_tokens", "completion_tokens")
+MAX_RETRY_SECONDS = 60
+COMPACT_MIN_BYTES = 1024 * 1024  # 모두 저장된 스풀 파일을 비우는 최소 크기
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    payload = json.dumps(record, ensure_ascii=False, default=str).encode("utf-8")
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+def read_records(handle, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int, bool]:
+    """현재 위치부터 온전한 레코드 읽기 -> (레코드, 읽은 바이트 수, 손상/미완성 레코드에서 멈췄는지)"""
+    records, consumed = [], 0
+    while limit is None or len(records) < limit:
+        header = handle.read(RECORD_HEADER.size)
+        if not header:
+            return records, consumed, False
+        if len(header) < RECORD_HEADER.size:
+            return records, consumed, True
+        length, checksum = RECORD_HEADER.unpack(header)
+        payload = handle.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return records, consumed, True
+        records.append(json.loads(payload))
+        consumed += RECORD_HEADER.size + length
+    return records, consumed, False
+
+def is_permanent_error(error: Exception) -> bool:
+    """재시도해도 실패하는 데이터 오류인지 (잘못된 값, log_key 고유 인덱스 충돌)"""
+    if isinstance(error, DataError):
+        return True
+    return isinstance(error, IntegrityError) and "log_key" in str(error.orig)
+
+class MessageLogSpool:
+    """메시지 로그 스풀 파일 쓰기와 DB 저장 (드레이너)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.checkpoint = 0  # DB에 저장된 위치 (바이트)
+        self.size = 0  # 기록된 레코드 끝 위치 (바이트)
+        self.pending_records = 0
+        self.unsynced = 0
+        self.oldest_pending_at: Optional[float] = None
+        self.spooled = 0
+        self.drained = 0
+        self.dropped = 0
+        self.failed_batches = 0
+        self.dead_lettered = 0
+        self.last_error: Optional[str] = None
+        self.last_drain_at: Optional[str] = None
+        self.drain_task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        # 체크포인트 이후 읽기 -> 저장 -> 체크포인트 갱신을 한 스레드씩만 수행 (같은 배치 중복 저장 방지)
+        self.drain_lock = threading.Lock()
+
+    @property
+    def checkpoint_path(self) -> str:
+        return self.path + ".checkpoint"
+
+    @property
+    def dead_letter_path(self) -> str:
+        return self.path + ".dead"
+
+    def _save_checkpoint(self, offset: int):
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            checkpoint_file.write(str(offset))
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _peek_created_at(self, offset: int) -> Optional[float]:
+        """offset 위치 레코드의 생성 시각 (지연 시간 계산용)"""
+        with open(self.path, "rb") as handle:
+            handle.seek(offset)
+            records, _, _ = read_records(handle, 1)
+        if not records:
+            return None
+        return datetime.fromisoformat(records[0]["created_at"]).replace(tzinfo=timezone.utc).timestamp()
+
+    def open(self):
+        """스풀 파일 열기 (체크포인트 로드, 이전 중단으로 잘린 마지막 레코드 제거, 남은 레코드 수 계산)"""
+        if self.file is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as checkpoint_file:
+                self.checkpoint = int(checkpoint_file.read().strip() or 0)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if self.checkpoint > size:
+            # 파일을 비운 직후 체크포인트를 저장하기 전에 중단된 경우
+            self.checkpoint = 0
+            self._save_checkpoint(0)
+        with open(self.path, "ab+") as handle:
+            handle.seek(self.checkpoint)
+            records, consumed, torn = read_records(handle)
+            if torn:
+                print(f"Truncating torn message log spool record at offset {self.checkpoint + consumed}")
+                handle.truncate(self.checkpoint + consumed)
+        self.size = self.checkpoint + consumed
+        self.pending_records = len(records)
+        self.oldest_pending_at = self._peek_created_at(self.checkpoint) if records else None
+        self.file = open(self.path, "ab")
+        if records:
+            print(f"Message log spool has {len(records)} pending records")
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """로그 레코드를 스풀에 기록 (최대 크기 초과 시 버림)"""
+        self.open()
+        record.setdefault("log_key", uuid.uuid4().hex)
+        data = encode_record(record)
+        if self.size - self.checkpoint + len(data) > settings.MESSAGE_LOG_SPOOL_MAX_BYTES:
+            self.dropped += 1
+            return False
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+        self.pending_records += 1
+        self.unsynced += 1
+        self.spooled += 1
+        if self.oldest_pending_at is None:
+            self.oldest_pending_at = time.time()
+        self._ensure_drainer()
+        if self.unsynced >= settings.MESSAGE_LOG_SPOOL_FSYNC_BATCH and self.wakeup:
+            self.wakeup.set()
+        return True
+
+    def sync(self):
+        """기록된 레코드를 디스크에 반영 (fsync를 여러 레코드에 한 번)"""
+        unsynced = self.unsynced
+        if unsynced and self.file is not None:
+            os.fsync(self.file.fileno())
+            self.unsynced -= unsynced
+
+    def _store(self, records: List[Dict[str, Any]]):
+        """레코드 배치를 DB에 저장 (이미 저장된 log_key는 건너뛰고, 로그와 시간대별 집계를 함께 커밋)"""
+        rows = [
+            {
+                "agent_role_id": record["role_id"],
+                "chat_id": record["chat_id"],
+                "user_id": record["user_id"],
+                "message_text": record["message"],
+                "response_text": record["response"],
+                "response_time_ms": record["response_time"],
+                "role_used": record["role_used"],
+                "created_at": datetime.fromisoformat(record["created_at"]),
+                "log_key": record.get("log_key"),
+                **{column: (record.get("stages") or {}).get(column) for column in STAGE_COLUMNS}
+            }
+            for record in records
+        ]
+        with runtime_session() as db:
+            # 이전 실행에서 저장했지만 체크포인트를 갱신하지 못한 레코드 제외
+            keys = [row["log_key"] for row in rows if row["log_key"]]
+            if keys:
+                stored = {key for (key,) in db.query(MessageLog.log_key).filter(MessageLog.log_key.in_(keys)).all()}
+                rows = [row for row in rows if row["log_key"] not in stored]
+            if not rows:
+                return
+
+            # 로그와 집계를 한 트랜잭션으로 커밋해 재시도 시 집계가 두 번 더해지지 않도록 함
+            db.execute(insert(MessageLog), rows)
+            try:
+                message_rollup_service.record_batch(db, [
+                    (row["agent_role_id"], row["chat_id"], row["created_at"],
+                     row["response_time_ms"], row["response_text"] is not None)
+                    for row in rows
+                ])
+                db.commit()
+            except Exception as e:
+                # 집계 갱신 실패가 로그 저장에 영향을 주지 않도록 로그만 다시 저장
+                db.rollback()
+                print(f"Failed to update message log rollup: {e}")
+                db.execute(insert(MessageLog), rows)
+                db.commit()
+
+    def _dead_letter(self, record: Dict[str, Any], error: Exception):
+        """저장할 수 없는 레코드를 오류와 함께 dead-letter 파일에 기록"""
+        entry = {"error": f"{type(error).__name__}: {error}"[:500], "record": record}
+        with open(self.dead_letter_path, "a", encoding="utf-8") as dead_file:
+            dead_file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            dead_file.flush()
+            os.fsync(dead_file.fileno())
+        self.dead_lettered += 1
+        print(f"Moved message log to dead-letter file {self.dead_letter_path}: {entry['error'].splitlines()[0]}")
+
+    def _store_isolating(self, records: List[Dict[str, Any]]):
+        """배치 저장, 데이터 오류면 반씩 나눠 다시 저장하고 원인 레코드는 dead-letter로 이동 (그 밖의 오류는 그대로 전달)"""
+        try:
+            self._store(records)
+            return
+        except (DataError, IntegrityError) as e:
+            if not is_permanent_error(e):
+                raise
+            if len(records) == 1:
+                self._dead_letter(records[0], e)
+                return
+        middle = len(records) // 2
+        self._store_isolating(records[:middle])
+        self._store_isolating(records[middle:])
+
+    def drain_once(self) -> Tuple[int, Optional[float]]:
+        """체크포인트 이후 한 배치 저장 -> (저장한 레코드 수, 다음 미저장 레코드 생성 시각)"""
+        with self.drain_lock:
+            self.sync()
+            with open(self.path, "rb") as handle:
+                handle.seek(self.checkpoint)
+                records, consumed, _ = read_records(handle, settings.MESSAGE_LOG_SPOOL_BATCH_SIZE)
+            if not records:
+                return 0, None
+            self._store_isolating(records)
+            self._save_checkpoint(self.checkpoint + consumed)
+            self.checkpoint += consumed
+            return len(records), self._peek_created_at(self.checkpoint)
+
+    def _compact(self):
+        """모두 저장되었으면 스풀 파일 비우기 (파일을 먼저 비운 뒤 체크포인트 저장)"""
+        with self.drain_lock:
+            if self.checkpoint == self.size and self.size >= COMPACT_MIN_BYTES:
+                self.sync()
+                self.file.truncate(0)
+                self.size = 0
+                self.checkpoint = 0
+                self._save_checkpoint(0)
+
+    def _ensure_drainer(self):
+        if self.drain_task is None or self.drain_task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # 이벤트 루프 밖 (start() 시 드레이너 시작)
+            self.wakeup = asyncio.Event()
+            self.drain_task = loop.create_task(self._drain_loop())
+
+    def _mark_drained(self, drained: int, next_created_at: Optional[float]):
+        self.pending_records -= drained
+        self.drained += drained
+        self.last_drain_at = datetime.utcnow().isoformat()
+        self.oldest_pending_at = next_created_at if self.pending_records else None
+
+    async def drain_pending(self) -> bool:
+        """남은 레코드를 모두 저장 (모두 저장했으면 True, 실패한 레코드는 드레이너가 계속 재시도)"""
+        if self.file is None:
+            return True
+        try:
+            while True:
+                drained, next_created_at = await asyncio.get_running_loop().run_in_executor(None, self.drain_once)
+                if not drained:
+                    return True
+                self._mark_drained(drained, next_created_at)
+        except Exception as e:
+            print(f"Failed to drain message log spool: {e}")
+            return False
+
+    async def _drain_loop(self):
+        retry_delay = settings.MESSAGE_LOG_SPOOL_DRAIN_SECONDS
+        while True:
+            try:
+                drained, next_created_at = await asyncio.get_running_loop().run_in_executor(None, self.drain_once)
+                retry_delay = settings.MESSAGE_LOG_SPOOL_DRAIN_SECONDS
+            except Exception as e:
+                self.failed_batches += 1
+                self.last_error = f"{type(e).__name__}: {e}"[:200]
+                print(f"Failed to drain message log spool (retry in {retry_delay:.1f}s): {self.last_error}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, MAX_RETRY_SECONDS)
+                continue
+
+            if drained:
+                self._mark_drained(drained, next_created_at)
+                if drained >= settings.MESSAGE_LOG_SPOOL_BATCH_SIZE:
+                    continue  # 남은 레코드가 있으면 바로 다음 배치
+            self._compact()
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), settings.MESSAGE_LOG_SPOOL_DRAIN_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """스풀 열기와 드레이너 시작 (이전 실행에서 남은 레코드 저장)"""
+        self.open()
+        self._ensure_drainer()
+
+    async def stop(self):
+        """드레이너 중지 후 남은 레코드 저장 시도 (실패한 레코드는 다음 실행 때 저장)"""
+        if self.drain_task and not self.drain_task.done():
+            # 취소해도 이미 실행 중인 drain_once 스레드는 끝까지 실행되며, 아래 저장 시도는 drain_lock으로 그 뒤에 실행됨
+            self.drain_task.cancel()
+            try:
+                await self.drain_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self.drain_task = None
+        if self.file is None:
+            return
+        await self.drain_pending()
+        self.sync()
+        self.file.close()
+        self.file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.MESSAGE_LOG_SPOOL_ENABLED,
+            "path": self.path,
+            "pending_records": self.pending_records,
+            "pending_bytes": self.size - self.checkpoint,
+            "spool_bytes": self.size,
+            "lag_seconds": round(time.time() - self.oldest_pending_at, 1) if self.oldest_pending_at else 0,
+            "spooled": self.spooled,
+            "drained": self.drained,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+            "dead_lettered": self.dead_lettered,
+            "last_error": self.last_error,
+            "last_drain_at": self.last_drain_at
+        }
+
+# 전역 인스턴스 (샤드 워커는 샤드별 파일 경로 사용)
+message_log_spool = MessageLogSpool(settings.MESSAGE_LOG_SPOOL_PATH)
@@ -0,0 +1,193 @@
+import bisect
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.message_log import MessageLog
+from app.models.message_rollup import MessageLogRollup
+from app.services.usage_service import hour_bucket
+
+# 역할/채팅방/시간대별 메시지 수와 응답 시간 히스토그램 집계
+# 히스토그램은 고정된 로그 구간을 사용하므로 구간별 합산만으로 임의 기간/단위의 백분위를 계산할 수 있습니다.
+
+# 응답 시간 구간 상한(ms): 10ms부터 1.25배씩 증가 (약 6분까지), 마지막 구간은 그 이상 (상대 오차 25% 이내)
+HISTOGRAM_BOUNDS_MS = [int(round(10 * 1.25 ** index)) for index in range(48)]
+HISTOGRAM_SIZE = len(HISTOGRAM_BOUNDS_MS) + 1
+PERCENTILES = (50, 95, 99)
+GROUP_BY_OPTIONS = ("role", "chat", "hour")
+
+def histogram_index(latency_ms: int) -> int:
+    return bisect.bisect_left(HISTOGRAM_BOUNDS_MS, latency_ms)
+
+def histogram_percentiles(histogram: np.ndarray) -> Dict[str, Optional[int]]:
+    """히스토그램의 p50/p95/p99 (해당 구간 상한값, 표본이 없으면 None)"""
+    total = int(histogram.sum())
+    if total == 0:
+        return {f"p{p}_ms": None for p in PERCENTILES}
+    cumulative = np.cumsum(histogram)
+    ranks = np.ceil(np.array(PERCENTILES) / 100 * total)
+    indexes = np.minimum(np.searchsorted(cumulative, ranks), len(HISTOGRAM_BOUNDS_MS) - 1)
+    return {f"p{p}_ms": HISTOGRAM_BOUNDS_MS[index] for p, index in zip(PERCENTILES, indexes)}
+
+class MessageRollupService:
+    """메시지 로그 시간대별 집계 갱신과 백분위 분석"""
+
+    def _row(self, db: Session, bucket_start: datetime, role_id: int, chat_id: int) -> MessageLogRollup:
+        """집계 행 조회 (없으면 생성, 동시 생성 충돌 시 다시 조회, Postgres에서는 행 잠금)"""
+        query = db.query(MessageLogRollup).filter(
+            and_(
+                MessageLogRollup.bucket_start == bucket_start,
+                MessageLogRollup.agent_role_id == role_id,
+                MessageLogRollup.chat_id == chat_id
+            )
+        ).with_for_update()
+        row = query.first()
+        if row is not None:
+            return row
+        row = MessageLogRollup(
+            bucket_start=bucket_start,
+            agent_role_id=role_id,
+            chat_id=chat_id,
+            message_count=0,
+            reply_count=0,
+            latency_sum_ms=0,
+            latency_histogram=[0] * HISTOGRAM_SIZE
+        )
+        try:
+            # 호출자의 트랜잭션(같은 배치의 로그 저장)은 유지하고 행 생성만 되돌릴 수 있도록 savepoint 사용
+            with db.begin_nested():
+                db.add(row)
+        except IntegrityError:
+            # 다른 드레이너/워커가 같은 시간대 행을 먼저 생성한 경우
+            row = query.one()
+        return row
+
+    def record(self, db: Session, role_id: int, chat_id: int, created_at: datetime,
+               response_time_ms: Optional[int], replied: bool):
+        """로그 한 건을 집계에 반영 (커밋은 호출자가 수행)"""
+        self.record_batch(db, [(role_id, chat_id, created_at, response_time_ms, replied)])
+
+    def record_batch(self, db: Session, entries: List[tuple]):
+        """로그 여러 건 (role_id, chat_id, created_at, response_time_ms, replied)을 집계 행별로 한 번씩 반영"""
+        grouped: Dict[tuple, List[tuple]] = {}
+        for role_id, chat_id, created_at, response_time_ms, replied in entries:
+            grouped.setdefault((hour_bucket(created_at), role_id, chat_id), []).append((response_time_ms, replied))
+        for (bucket_start, role_id, chat_id), items in grouped.items():
+            row = self._row(db, bucket_start, role_id, chat_id)
+            row.message_count += len(items)
+            histogram = list(row.latency_histogram)
+            for response_time_ms, replied in items:
+                if replied and response_time_ms is not None:
+                    row.reply_count += 1
+                    row.latency_sum_ms += response_time_ms
+                    histogram[histogram_index(response_time_ms)] += 1
+            row.latency_histogram = histogram
+
+    def rebuild(self, db: Session, since: datetime, until: datetime, chunk_size: int = 5000) -> int:
+        """기간 내 원본 로그로 집계 다시 계산 (기존 집계 배포 이전 로그 보충용), 반영한 로그 수 반환"""
+        since, until = hour_bucket(since), hour_bucket(until)
+        totals: Dict[tuple, List[Any]] = {}
+        processed = 0
+        rows = db.query(
+            MessageLog.agent_role_id, MessageLog.chat_id, MessageLog.created_at,
+            MessageLog.response_text, MessageLog.response_time_ms
+        ).filter(
+            MessageLog.created_at >= since,
+            MessageLog.created_at < until
+        ).yield_per(chunk_size)
+        for row in rows:
+            key = (hour_bucket(row.created_at), row.agent_role_id, row.chat_id)
+            entry = totals.setdefault(key, [0, 0, 0, [0] * HISTOGRAM_SIZE])
+            entry[0] += 1
+            if row.response_text is not None and row.response_time_ms is not None:
+                entry[1] += 1
+                entry[2] += row.response_time_ms
+                entry[3][histogram_index(row.response_time_ms)] += 1
+            processed += 1
+
+        db.query(MessageLogRollup).filter(
+            MessageLogRollup.bucket_start >= since,
+            MessageLogRollup.bucket_start < until
+        ).delete(synchronize_session=False)
+        db.add_all([
+            MessageLogRollup(
+                bucket_start=bucket_start,
+                agent_role_id=role_id,
+                chat_id=chat_id,
+                message_count=entry[0],
+                reply_count=entry[1],
+                latency_sum_ms=entry[2],
+                latency_histogram=entry[3]
+            )
+            for (bucket_start, role_id, chat_id), entry in totals.items()
+        ])
+        db.commit()
+        return processed
+
+    def _summary(self, counts: np.ndarray, histogram: np.ndarray, hours: float) -> Dict[str, Any]:
+        """집계 합계 -> 처리량/평균/백분위"""
+        messages, replies, latency_sum = (int(value) for value in counts)
+        return {
+            "message_count": messages,
+            "reply_count": replies,
+            "messages_per_hour": round(messages / hours, 2) if hours else None,
+            "replies_per_hour": round(replies / hours, 2) if hours else None,
+            "avg_response_time_ms": round(latency_sum / replies, 1) if replies else None,
+            **histogram_percentiles(histogram)
+        }
+
+    def analyze(self, db: Session, since: datetime, until: datetime, role_id: Optional[int] = None,
+                chat_id: Optional[int] = None, group_by: Optional[str] = None) -> Dict[str, Any]:
+        """기간 내 집계를 합산하여 처리량과 응답 시간 백분위 계산 (group_by: role, chat, hour)"""
+        query = db.query(
+            MessageLogRollup.bucket_start,
+            MessageLogRollup.agent_role_id,
+            MessageLogRollup.chat_id,
+            MessageLogRollup.message_count,
+            MessageLogRollup.reply_count,
+            MessageLogRollup.latency_sum_ms,
+            MessageLogRollup.latency_histogram
+        ).filter(
+            MessageLogRollup.bucket_start >= hour_bucket(since),
+            MessageLogRollup.bucket_start < until
+        )
+        if role_id is not None:
+            query = query.filter(MessageLogRollup.agent_role_id == role_id)
+        if chat_id is not None:
+            query = query.filter(MessageLogRollup.chat_id == chat_id)
+        rows = query.all()
+
+        hours = max((until - since).total_seconds() / 3600, 0)
+        histograms = np.array(
+            [row.latency_histogram for row in rows], dtype=np.int64
+        ).reshape(len(rows), HISTOGRAM_SIZE)
+        counts = np.array(
+            [(row.message_count, row.reply_count, row.latency_sum_ms) for row in rows], dtype=np.int64
+        ).reshape(len(rows), 3)
+
+        result = {"summary": self._summary(counts.sum(axis=0), histograms.sum(axis=0), hours)}
+        if group_by and rows:
+            if group_by == "role":
+                keys = [row.agent_role_id for row in rows]
+            elif group_by == "chat":
+                keys = [row.chat_id for row in rows]
+            else:
+                keys = [row.bucket_start.isoformat() for row in rows]
+            unique_keys, inverse = np.unique(np.array(keys), return_inverse=True)
+            grouped_histograms = np.zeros((len(unique_keys), HISTOGRAM_SIZE), dtype=np.int64)
+            grouped_counts = np.zeros((len(unique_keys), 3), dtype=np.int64)
+            np.add.at(grouped_histograms, inverse, histograms)
+            np.add.at(grouped_counts, inverse, counts)
+            group_hours = 1.0 if group_by == "hour" else hours
+            result["groups"] = [
+                {group_by: key.item(), **self._summary(grouped_counts[index], grouped_histograms[index], group_hours)}
+                for index, key in enumerate(unique_keys)
+            ]
+        return result
+
+# 전역 인스턴스
+message_rollup_service = MessageRollupService()
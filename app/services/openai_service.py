@@ -0,0 +1,323 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import openai
+
+from app.config import settings
+from app.services.api_key_pool import api_key_pool, mask_key
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.relevance_gate import is_question
+from app.services.usage_service import usage_accountant
+
+# LLM 호출 계층: 메시지 복잡도에 따른 모델 선택과 모델별 지연 시간/토큰 통계
+#
+# 역할별 라우팅 설정(agent_roles.model_routing)이 전역 기본값을 덮어씁니다.
+#   model            항상 이 모델 사용 (라우팅 생략)
+#   fast_model       간단한 메시지용 모델
+#   complex_model    복잡한 메시지용 모델
+#   complex_length   이 길이 이상이면 복잡한 메시지
+#   complex_roles    이 역할이면 항상 복잡한 메시지로 취급
+#   route_questions  질문이면 복잡한 메시지로 취급
+#
+# 장애 대응: 시도별 제한 시간, p95 지연 시간 이후 두 번째 요청(헤징), 모델별 회로 차단기와 대체 모델
+
+# 회로 차단기에 실패로 기록하는 일시적 오류 (잘못된 요청 등은 업스트림 장애가 아님)
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError
+)
+
+class LLMResult(NamedTuple):
+    """생성 결과 (실제 사용된 모델과 토큰 수 포함)"""
+    text: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+
+def percentile(samples: List[float], fraction: float) -> Optional[float]:
+    """정렬된 표본의 백분위 값 (표본이 없으면 None)"""
+    if not samples:
+        return None
+    index = min(int(len(samples) * fraction), len(samples) - 1)
+    return samples[index]
+
+class ModelMetrics:
+    """모델별 호출 통계 (최근 표본 기반 지연 시간 백분위와 오류율)"""
+
+    def __init__(self, latency_samples: int = 1000, error_window: int = 50):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=latency_samples)
+        self.recent_outcomes: Deque[bool] = deque(maxlen=error_window)  # True = 오류
+
+    def record(self, latency_ms: float, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.latencies.append(latency_ms)
+        self.recent_outcomes.append(False)
+
+    def record_error(self):
+        self.calls += 1
+        self.errors += 1
+        self.recent_outcomes.append(True)
+
+    @property
+    def recent_error_rate(self) -> float:
+        if not self.recent_outcomes:
+            return 0.0
+        return sum(self.recent_outcomes) / len(self.recent_outcomes)
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self.latencies)
+        succeeded = self.calls - self.errors
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "recent_error_rate": round(self.recent_error_rate, 3),
+            "latency_p50_ms": round(percentile(samples, 0.5), 1) if samples else None,
+            "latency_p95_ms": round(percentile(samples, 0.95), 1) if samples else None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "avg_tokens_per_call": round((self.prompt_tokens + self.completion_tokens) / succeeded, 1)
+            if succeeded else 0
+        }
+
+class OpenAIService:
+    """역할별 모델 라우팅과 OpenAI 호출"""
+
+    def __init__(self):
+        self.clients: Dict[str, openai.AsyncOpenAI] = {}  # api_key -> 클라이언트 (커넥션 재사용)
+        self.metrics: Dict[str, ModelMetrics] = {}  # model -> 통계
+        self.route_counts: Dict[str, int] = {}  # 라우팅 사유 -> 건수
+        self.diversions: Dict[str, int] = {}  # model -> 오류율로 우회한 횟수 (주기적으로 원래 모델 재시도)
+        self.breakers: Dict[str, CircuitBreaker] = {}  # model -> 회로 차단기
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.fallbacks = 0
+        self.defaults: Dict[str, Any] = {
+            "fast_model": settings.OPENAI_FAST_MODEL or settings.OPENAI_MODEL,
+            "complex_model": settings.OPENAI_MODEL,
+            "complex_length": settings.AGENT_ROUTING_COMPLEX_LENGTH,
+            "complex_roles": [name.strip() for name in settings.AGENT_ROUTING_COMPLEX_ROLES.split(",") if name.strip()],
+            "route_questions": True
+        }
+
+    def get_client(self, api_key: str) -> openai.AsyncOpenAI:
+        client = self.clients.get(api_key)
+        if client is None:
+            client = self.clients[api_key] = openai.AsyncOpenAI(
+                api_key=api_key, timeout=settings.OPENAI_ATTEMPT_TIMEOUT_SECONDS
+            )
+        return client
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self.breakers.get(model)
+        if breaker is None:
+            breaker = self.breakers[model] = CircuitBreaker(
+                settings.OPENAI_BREAKER_FAILURE_THRESHOLD, settings.OPENAI_BREAKER_OPEN_SECONDS
+            )
+        return breaker
+
+    def _metrics(self, model: str) -> ModelMetrics:
+        metrics = self.metrics.get(model)
+        if metrics is None:
+            metrics = self.metrics[model] = ModelMetrics()
+        return metrics
+
+    def route(self, message: str, role_info: dict) -> Tuple[str, str]:
+        """메시지에 사용할 모델과 선택 사유"""
+        overrides = role_info.get("model_routing") or {}
+        if overrides.get("model"):
+            return overrides["model"], "role_fixed"
+        if not settings.AGENT_MODEL_ROUTING_ENABLED:
+            return settings.OPENAI_MODEL, "default"
+
+        rules = dict(self.defaults)
+        rules.update(overrides)
+        if role_info.get("role_name") in rules["complex_roles"]:
+            model, other, reason = rules["complex_model"], rules["fast_model"], "role"
+        elif len(message or "") >= rules["complex_length"]:
+            model, other, reason = rules["complex_model"], rules["fast_model"], "length"
+        elif rules["route_questions"] and is_question(message):
+            model, other, reason = rules["complex_model"], rules["fast_model"], "question"
+        else:
+            model, other, reason = rules["fast_model"], rules["complex_model"], "simple"
+
+        # 선택된 모델의 최근 오류율이 높으면 다른 모델로 우회 (MIN_SAMPLES번마다 한 번은 원래 모델로 복구 확인)
+        metrics = self.metrics.get(model)
+        if model != other and metrics is not None \
+                and len(metrics.recent_outcomes) >= settings.AGENT_ROUTING_MIN_SAMPLES \
+                and metrics.recent_error_rate >= settings.AGENT_ROUTING_MAX_ERROR_RATE:
+            diverted = self.diversions.get(model, 0) + 1
+            self.diversions[model] = diverted
+            if diverted % settings.AGENT_ROUTING_MIN_SAMPLES:
+                return other, "error_rate"
+            return model, "probe"
+        return model, reason
+
+    async def _call(self, api_key: str, model: str, messages: List[Dict[str, str]],
+                    max_tokens: int, temperature: float):
+        """API 호출 (시도별 제한 시간 적용)"""
+        return await asyncio.wait_for(
+            self.get_client(api_key).chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature
+            ),
+            settings.OPENAI_ATTEMPT_TIMEOUT_SECONDS
+        )
+
+    async def _call_pooled(self, model: str, messages: List[Dict[str, str]],
+                           max_tokens: int, temperature: float):
+        """키 풀에서 할당한 키로 호출 (키 오류면 다른 키로 재시도), (응답, 키 라벨) 반환"""
+        for attempt in range(len(api_key_pool)):
+            pooled = await api_key_pool.acquire_wait()
+            error = None
+            try:
+                return await self._call(pooled.key, model, messages, max_tokens, temperature), pooled.label
+            except Exception as e:
+                error = e
+                if not api_key_pool.is_key_error(e) or attempt == len(api_key_pool) - 1:
+                    raise
+            finally:
+                api_key_pool.release(pooled, error)
+
+    async def _attempt(self, api_key: Optional[str], model: str, messages: List[Dict[str, str]],
+                       max_tokens: int, temperature: float, tags: Optional[Dict[str, Any]] = None) -> LLMResult:
+        """단일 시도 (역할 키가 없으면 키 풀 사용, 모델별 통계와 역할별 사용량 기록, 오류는 기록 후 다시 발생)"""
+        metrics = self._metrics(model)
+        start = time.monotonic()
+        try:
+            if api_key:
+                response = await self._call(api_key, model, messages, max_tokens, temperature)
+                key_label = mask_key(api_key)
+            else:
+                response, key_label = await self._call_pooled(model, messages, max_tokens, temperature)
+        except Exception:
+            metrics.record_error()
+            raise
+
+        usage = response.usage
+        prompt_tokens = usage.prompt_tokens if usage else 0
+        completion_tokens = usage.completion_tokens if usage else 0
+        metrics.record((time.monotonic() - start) * 1000, prompt_tokens, completion_tokens)
+        if tags:
+            usage_accountant.record(
+                tags["role_id"], tags["account_id"], model, key_label, prompt_tokens, completion_tokens
+            )
+        return LLMResult(response.choices[0].message.content, model, prompt_tokens, completion_tokens)
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        """두 번째 요청을 보낼 때까지 기다릴 시간(초) (헤징 비활성화 또는 표본 부족이면 None)"""
+        if not settings.OPENAI_HEDGE_ENABLED:
+            return None
+        metrics = self.metrics.get(model)
+        if metrics is None or len(metrics.latencies) < settings.OPENAI_HEDGE_MIN_SAMPLES:
+            return None
+        p95 = percentile(sorted(metrics.latencies), 0.95)
+        return max(p95, settings.OPENAI_HEDGE_MIN_DELAY_MS) / 1000
+
+    async def _hedged(self, api_key: Optional[str], model: str, messages: List[Dict[str, str]],
+                      max_tokens: int, temperature: float, tags: Optional[Dict[str, Any]] = None) -> LLMResult:
+        """p95 지연 시간 안에 응답이 없으면 두 번째 요청을 보내고 먼저 성공한 응답 사용"""
+        first = asyncio.create_task(self._attempt(api_key, model, messages, max_tokens, temperature, tags))
+        delay = self._hedge_delay(model)
+        if delay is None:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self.hedges_sent += 1
+        second = asyncio.create_task(self._attempt(api_key, model, messages, max_tokens, temperature, tags))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedges_won += 1
+                        return task.result()
+            raise first.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def complete(self, api_key: Optional[str], model: str, messages: List[Dict[str, str]],
+                       max_tokens: int, temperature: float = 0.7, tags: Optional[Dict[str, Any]] = None) -> LLMResult:
+        """회로 차단기와 대체 모델을 적용한 응답 생성 (모두 실패하면 마지막 오류 발생)"""
+        candidates = [model]
+        if settings.OPENAI_FALLBACK_MODEL and settings.OPENAI_FALLBACK_MODEL != model:
+            candidates.append(settings.OPENAI_FALLBACK_MODEL)
+
+        last_error: Exception = CircuitOpenError(model)
+        for candidate in candidates:
+            breaker = self._breaker(candidate)
+            if not breaker.allow():
+                last_error = CircuitOpenError(f"{candidate} 회로 차단 중")
+                continue
+            try:
+                result = await self._hedged(api_key, candidate, messages, max_tokens, temperature, tags)
+            except TRANSIENT_ERRORS as e:
+                breaker.record_failure()
+                last_error = e
+                continue
+            except Exception:
+                breaker.record_success()  # 업스트림은 정상 (요청 자체의 오류)
+                raise
+            except BaseException:
+                # 취소(클라이언트 중지 등)는 업스트림 상태와 무관, half_open 시험 호출만 해제
+                breaker.release_trial()
+                raise
+            breaker.record_success()
+            if candidate != model:
+                self.fallbacks += 1
+            return result
+        raise last_error
+
+    async def generate(self, message: str, role_info: dict, system_prompt: str,
+                       api_key: Optional[str] = None) -> LLMResult:
+        """라우팅된 모델로 역할 응답 생성 (api_key가 없으면 공유 키 풀 사용)"""
+        model, reason = self.route(message, role_info)
+        self.route_counts[reason] = self.route_counts.get(reason, 0) + 1
+        return await self.complete(
+            api_key,
+            model,
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": message}
+            ],
+            role_info.get("max_response_length", 500),
+            tags={"role_id": role_info["id"], "account_id": role_info.get("account_id")} if "id" in role_info else None
+        )
+
+    def get_model_metrics(self) -> Dict[str, Any]:
+        return {
+            "routing_enabled": settings.AGENT_MODEL_ROUTING_ENABLED,
+            "routes": dict(self.route_counts),
+            "models": {model: metrics.stats() for model, metrics in self.metrics.items()},
+            "breakers": self.get_breaker_states(),
+            "hedging": {
+                "enabled": settings.OPENAI_HEDGE_ENABLED,
+                "sent": self.hedges_sent,
+                "won": self.hedges_won
+            },
+            "fallbacks": self.fallbacks
+        }
+
+    def get_breaker_states(self) -> Dict[str, Any]:
+        return {model: breaker.stats() for model, breaker in self.breakers.items()}
+
+# 전역 인스턴스
+openai_service = OpenAIService()
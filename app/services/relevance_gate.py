@@ -0,0 +1,152 @@
+import importlib
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+
+# LLM 호출 전 메시지 관련성 검사
+# 역할별 규칙(agent_roles.relevance_rules)이 전역 기본값을 덮어쓰며, 통과하지 못한 메시지는 건너뛰거나 문맥으로만 기록합니다.
+#
+# 규칙 키:
+#   enabled          검사 사용 여부
+#   require_mention  언급 또는 이 계정 메시지에 대한 답장일 때만 응답
+#   keywords         하나라도 포함되어야 응답 (대소문자 무시)
+#   patterns         정규식 중 하나라도 일치해야 응답
+#   min_length       이모지/공백/문장부호를 제외한 최소 글자 수
+#   skip_commands    /로 시작하는 봇 명령 무시
+#   skip_media       미디어(스티커, 사진 등)에 달린 캡션 무시
+#   classifier       로컬 분류기 사용 여부
+#   threshold        분류기 점수 기준
+#   on_fail          drop (무시) 또는 context (응답 없이 로그만 기록)
+# 언급/답장된 메시지는 키워드, 길이, 분류기 검사를 건너뜁니다.
+
+ON_FAIL_ACTIONS = ("drop", "context")
+
+QUESTION_WORDS = (
+    "what", "why", "how", "when", "where", "who", "which", "can", "could", "is", "are", "do", "does",
+    "뭐", "왜", "어떻게", "언제", "어디", "누가", "누구", "무엇", "어느"
+)
+QUESTION_ENDINGS = ("까", "까요", "나요", "가요", "니", "냐", "죠")
+
+def content_length(text: str) -> int:
+    """이모지, 공백, 문장부호를 제외한 글자 수"""
+    return sum(1 for char in text or "" if char.isalnum())
+
+def is_question(text: str) -> bool:
+    """질문 여부 (물음표, 질문 단어로 시작, 한국어 의문형 어미)"""
+    lowered = (text or "").strip().lower()
+    if not lowered:
+        return False
+    if "?" in lowered:
+        return True
+    return lowered.split()[0] in QUESTION_WORDS or lowered.rstrip(".!~ ").endswith(QUESTION_ENDINGS)
+
+def heuristic_classifier(text: str) -> float:
+    """기본 로컬 분류기: 질문 여부와 길이로 응답 가치 점수(0~1) 계산"""
+    lowered = (text or "").lower()
+    score = min(content_length(lowered) / 40, 0.5)
+    if is_question(lowered):
+        score += 0.5
+    return min(score, 1.0)
+
+def load_classifier(path: str) -> Optional[Callable[[str], float]]:
+    """분류기 로드 ("heuristic" 또는 "모듈:함수" 경로, 함수는 텍스트를 받아 0~1 점수 반환)"""
+    if not path:
+        return None
+    if path == "heuristic":
+        return heuristic_classifier
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+class RelevanceGate:
+    """역할별 관련성 검사 및 건너뛴 사유 통계"""
+
+    def __init__(self):
+        self.defaults: Dict[str, Any] = {
+            "enabled": settings.AGENT_RELEVANCE_ENABLED,
+            "require_mention": False,
+            "keywords": [],
+            "patterns": [],
+            "min_length": settings.AGENT_RELEVANCE_MIN_LENGTH,
+            "skip_commands": settings.AGENT_RELEVANCE_SKIP_COMMANDS,
+            "skip_media": settings.AGENT_RELEVANCE_SKIP_MEDIA,
+            "classifier": bool(settings.AGENT_RELEVANCE_CLASSIFIER),
+            "threshold": settings.AGENT_RELEVANCE_CLASSIFIER_THRESHOLD,
+            "on_fail": settings.AGENT_RELEVANCE_ON_FAIL
+        }
+        self.classifier = load_classifier(settings.AGENT_RELEVANCE_CLASSIFIER)
+        self.compiled_patterns: Dict[str, re.Pattern] = {}
+        self.skipped: Dict[int, Dict[str, int]] = {}  # account_id -> {사유 -> 건수}
+        self.passed: Dict[int, int] = {}  # account_id -> 통과 건수
+
+    def rules_for(self, role_info: dict) -> Dict[str, Any]:
+        """전역 기본값에 역할별 규칙을 덮어쓴 최종 규칙"""
+        rules = dict(self.defaults)
+        rules.update(role_info.get("relevance_rules") or {})
+        return rules
+
+    def _pattern(self, pattern: str) -> re.Pattern:
+        compiled = self.compiled_patterns.get(pattern)
+        if compiled is None:
+            compiled = self.compiled_patterns[pattern] = re.compile(pattern, re.IGNORECASE)
+        return compiled
+
+    def skip_reason(self, rules: Dict[str, Any], text: str, mentioned: bool,
+                    has_media: bool) -> Optional[str]:
+        """규칙을 통과하지 못한 사유 (통과하면 None)"""
+        text = text or ""
+        stripped = text.strip()
+        if not stripped:
+            return "empty"
+        if rules["skip_commands"] and stripped.startswith("/"):
+            return "command"
+        if rules["skip_media"] and has_media and not mentioned:
+            return "media"
+        if mentioned:
+            return None
+        if rules["require_mention"]:
+            return "not_mentioned"
+
+        keywords: List[str] = rules["keywords"] or []
+        patterns: List[str] = rules["patterns"] or []
+        if keywords or patterns:
+            lowered = stripped.lower()
+            matched = any(keyword.lower() in lowered for keyword in keywords) or \
+                any(self._pattern(pattern).search(stripped) for pattern in patterns)
+            if not matched:
+                return "no_keyword"
+
+        if content_length(stripped) < (rules["min_length"] or 0):
+            return "too_short"
+
+        if rules["classifier"] and self.classifier is not None:
+            if self.classifier(stripped) < rules["threshold"]:
+                return "classifier"
+        return None
+
+    def check(self, account_id: int, role_info: dict, text: str, mentioned: bool = False,
+              has_media: bool = False, record: bool = True) -> Optional[str]:
+        """메시지 검사 후 통계 기록 (record=False면 기록 안 함). 통과하면 None, 아니면 on_fail 동작(drop/context) 반환"""
+        rules = self.rules_for(role_info)
+        if not rules["enabled"]:
+            return None
+
+        reason = self.skip_reason(rules, text, mentioned, has_media)
+        if not record:
+            return None if reason is None else "drop"
+        if reason is None:
+            self.passed[account_id] = self.passed.get(account_id, 0) + 1
+            return None
+
+        counters = self.skipped.setdefault(account_id, {})
+        counters[reason] = counters.get(reason, 0) + 1
+        return rules["on_fail"] if rules["on_fail"] in ON_FAIL_ACTIONS else "drop"
+
+    def account_stats(self, account_id: int) -> Dict[str, Any]:
+        return {
+            "passed": self.passed.get(account_id, 0),
+            "skipped": dict(self.skipped.get(account_id, {}))
+        }
+
+# 전역 인스턴스
+relevance_gate = RelevanceGate()
@@ -0,0 +1,99 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.config import settings
+
+# 같은 채팅방에 역할을 가진 여러 로컬 계정 간 응답 조정
+# 한 메시지에 대해 한 번만 응답 대상을 결정하고, 선택되지 않은 계정은 LLM 호출 없이 건너뜁니다.
+
+POLICIES = ("all", "round_robin", "priority", "mention")
+
+def message_key(chat_id: int, sender_id: int, timestamp: float, text: str) -> str:
+    """계정과 무관하게 같은 메시지를 식별하는 키 (일반 그룹은 계정마다 message_id가 다름)"""
+    digest = hashlib.sha1((text or "").encode()).hexdigest()[:16]
+    return f"{chat_id}:{sender_id}:{int(timestamp)}:{digest}"
+
+class ReplyArbiter:
+    """채팅방 단위 응답 계정 선택 (all, round_robin, priority, mention 정책)"""
+
+    def __init__(self, policy: Optional[str] = None, max_responders: Optional[int] = None,
+                 max_decisions: int = 2000):
+        self.policy = policy or settings.AGENT_ARBITRATION_POLICY
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown arbitration policy: {self.policy}")
+        self.max_responders = max_responders or settings.AGENT_ARBITRATION_MAX_RESPONDERS
+        self.role_priority = [name.strip() for name in settings.AGENT_ROLE_PRIORITY.split(",") if name.strip()]
+        self.decisions: "OrderedDict[str, Set[int]]" = OrderedDict()  # message_key -> 응답할 account_id
+        self.max_decisions = max_decisions
+        self.rr_counters: Dict[int, int] = {}  # chat_id -> 라운드로빈 위치
+        self.skipped: Dict[int, int] = {}  # account_id -> 응답하지 않은 메시지 수
+
+    def should_respond(self, key: str, account_id: int, chat_id: int,
+                       candidates: Callable[[], List[Dict[str, Any]]], text: str,
+                       reply_to_account: Optional[int] = None) -> bool:
+        """이 계정이 메시지에 응답해야 하는지 (메시지당 결정은 최초 호출 시 한 번만 계산)
+
+        candidates는 응답 가능한 계정 목록(관련성 검사 등을 통과한 계정)을 반환하는 함수로, 결정할 때만 호출합니다.
+        """
+        if self.policy == "all":
+            return True
+
+        selected = self.decisions.get(key)
+        if selected is None:
+            eligible = candidates()
+            if len(eligible) > 1:
+                selected = self._decide(chat_id, eligible, text, reply_to_account)
+            else:
+                selected = {account_id}
+            self.decisions[key] = selected
+            while len(self.decisions) > self.max_decisions:
+                self.decisions.popitem(last=False)
+
+        if account_id in selected:
+            return True
+        self.skipped[account_id] = self.skipped.get(account_id, 0) + 1
+        return False
+
+    def _decide(self, chat_id: int, candidates: List[Dict[str, Any]], text: str,
+                reply_to_account: Optional[int]) -> Set[int]:
+        """정책에 따라 응답 계정 선택"""
+        ordered = sorted(candidates, key=lambda c: c["account_id"])
+
+        if self.policy == "mention":
+            targeted = self._mentioned(ordered, text, reply_to_account)
+            if targeted:
+                return targeted
+            # 지목된 계정이 없으면 라운드로빈으로 대체
+
+        if self.policy == "priority":
+            rank = {name: index for index, name in enumerate(self.role_priority)}
+            ordered = sorted(ordered, key=lambda c: (rank.get(c["role_name"], len(rank)), c["account_id"]))
+            return {c["account_id"] for c in ordered[:self.max_responders]}
+
+        # round_robin
+        position = self.rr_counters.get(chat_id, 0)
+        self.rr_counters[chat_id] = position + 1
+        return {
+            ordered[(position + offset) % len(ordered)]["account_id"]
+            for offset in range(min(self.max_responders, len(ordered)))
+        }
+
+    def _mentioned(self, candidates: List[Dict[str, Any]], text: str,
+                   reply_to_account: Optional[int]) -> Set[int]:
+        """@username 언급 또는 답장으로 지목된 계정"""
+        lowered = (text or "").lower()
+        targeted = {
+            c["account_id"] for c in candidates
+            if c.get("username") and f"@{c['username'].lower()}" in lowered
+        }
+        if reply_to_account is not None and any(c["account_id"] == reply_to_account for c in candidates):
+            targeted.add(reply_to_account)
+        return targeted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "max_responders": self.max_responders,
+            "skipped": dict(self.skipped)
+        }
@@ -0,0 +1,96 @@
+from typing import Dict, List, Optional, Any
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+
+from app.models.agent import ChatGroup, AgentRole
+
+# 역할 목록/수정/삭제에서 사용하는 컬럼 (persona 본문 제외)
+ROLE_SUMMARY_COLUMNS = (
+    AgentRole.id,
+    AgentRole.account_id,
+    AgentRole.role_name,
+    AgentRole.is_active,
+    AgentRole.response_delay_ms,
+    AgentRole.max_response_length,
+    AgentRole.relevance_rules,
+    AgentRole.model_routing,
+    AgentRole.daily_token_budget,
+    AgentRole.created_at,
+    ChatGroup.chat_id,
+    ChatGroup.chat_title
+)
+
+# 실행 중인 에이전트의 역할 핸들러 구성에 필요한 컬럼
+ROLE_HANDLER_COLUMNS = (
+    AgentRole.id,
+    AgentRole.role_name,
+    AgentRole.persona,
+    AgentRole.openai_api_key,
+    AgentRole.response_delay_ms,
+    AgentRole.max_response_length,
+    AgentRole.relevance_rules,
+    AgentRole.model_routing,
+    AgentRole.daily_token_budget,
+    ChatGroup.chat_id
+)
+
+class RoleQueryService:
+    """에이전트 라우트용 역할 조회 계층 (필요한 컬럼만 단일 JOIN 쿼리로 조회, 지연 로딩 없음)"""
+
+    def _role_query(self, db: Session, include_persona: bool = False, columns=ROLE_SUMMARY_COLUMNS):
+        """역할 + 채팅방 컬럼 조회 쿼리"""
+        if include_persona:
+            columns = columns + (AgentRole.persona,)
+        return db.query(*columns).join(ChatGroup, AgentRole.chat_group_id == ChatGroup.id)
+
+    def list_account_roles(self, db: Session, account_id: int,
+                           include_persona: bool = False) -> List[Dict[str, Any]]:
+        """계정의 모든 역할 조회"""
+        rows = self._role_query(db, include_persona).filter(
+            AgentRole.account_id == account_id
+        ).order_by(AgentRole.id).all()
+        return [dict(row._mapping) for row in rows]
+
+    def get_role(self, db: Session, role_id: int,
+                 include_persona: bool = False) -> Optional[Dict[str, Any]]:
+        """단일 역할 조회"""
+        row = self._role_query(db, include_persona).filter(AgentRole.id == role_id).first()
+        return dict(row._mapping) if row else None
+
+    def active_role_handlers_query(self, db: Session, account_id: int):
+        """계정의 활성 역할(활성 채팅방 한정) 조회 쿼리 (idx_agent_roles_account_active 사용)"""
+        return db.query(*ROLE_HANDLER_COLUMNS).join(
+            ChatGroup, AgentRole.chat_group_id == ChatGroup.id
+        ).filter(
+            and_(
+                AgentRole.account_id == account_id,
+                AgentRole.is_active == True,
+                ChatGroup.is_active == True
+            )
+        )
+
+    def list_active_role_handlers(self, db: Session, account_id: int) -> List[Dict[str, Any]]:
+        """계정의 활성 역할(활성 채팅방 한정) 핸들러 정보 조회"""
+        rows = self.active_role_handlers_query(db, account_id).all()
+        return [dict(row._mapping) for row in rows]
+
+    def update_role(self, db: Session, role_id: int, update_data: Dict[str, Any]) -> int:
+        """역할 컬럼 직접 UPDATE (ORM 객체 로드 없음)"""
+        if not update_data:
+            return 0
+        updated = db.query(AgentRole).filter(AgentRole.id == role_id).update(
+            update_data, synchronize_session=False
+        )
+        db.commit()
+        return updated
+
+    def delete_role(self, db: Session, role_id: int) -> int:
+        """역할 직접 DELETE (ORM 객체 로드 없음)"""
+        deleted = db.query(AgentRole).filter(AgentRole.id == role_id).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        return deleted
+
+# 전역 인스턴스
+role_query_service = RoleQueryService()
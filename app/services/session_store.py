@@ -0,0 +1,50 @@
+import os
+from typing import Optional
+from telethon.sessions import StringSession, SQLiteSession
+from telethon.sessions.abstract import Session
+
+from app.config import settings
+
+# 텔레그램 세션 저장소
+# TELEGRAM_SESSION_DIR가 설정되면 계정별 SQLite 세션 파일을 사용하여 엔티티(access hash)와
+# 업데이트 상태 캐시를 재시작 후에도 유지합니다. 인증 정보의 원본은 계속 session_string입니다.
+
+def session_file_path(account_id: int) -> str:
+    """계정별 세션 파일 경로 (확장자 제외, Telethon이 .session을 붙임)"""
+    return os.path.join(settings.TELEGRAM_SESSION_DIR, f"account_{account_id}")
+
+def build_session(account_id: int, session_string: str) -> Session:
+    """클라이언트용 세션 생성 (영속 저장소가 비활성화되어 있으면 StringSession)"""
+    string_session = StringSession(session_string)
+    if not settings.TELEGRAM_SESSION_DIR:
+        return string_session
+
+    os.makedirs(settings.TELEGRAM_SESSION_DIR, exist_ok=True)
+    session = SQLiteSession(session_file_path(account_id))
+
+    # 재인증 등으로 session_string이 바뀌었으면 이전 캐시를 버리고 새로 시작
+    if session.auth_key is not None and string_session.auth_key is not None \
+            and session.auth_key.key != string_session.auth_key.key:
+        session.close()
+        session.delete()
+        session = SQLiteSession(session_file_path(account_id))
+
+    if session.auth_key is None:
+        session.set_dc(string_session.dc_id, string_session.server_address, string_session.port)
+        session.auth_key = string_session.auth_key
+        session.save()
+    return session
+
+def export_session_string(session: Session) -> Optional[str]:
+    """세션의 인증 정보를 session_string으로 내보내기 (세션 종류와 무관)"""
+    if session.auth_key is None:
+        return None
+    return StringSession.save(session)
+
+def delete_session_file(account_id: int):
+    """계정 세션 파일 삭제 (세션 취소 시)"""
+    if not settings.TELEGRAM_SESSION_DIR:
+        return
+    path = session_file_path(account_id) + ".session"
+    if os.path.exists(path):
+        os.remove(path)
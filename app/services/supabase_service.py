@@ -1,10 +1,17 @@
 from supabase import create_client, Client
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Awaitable, AsyncIterator
+import asyncio
+import copy
 import os
+import time
 from datetime import datetime, timedelta
 import uuid
 
 from app.config import settings
+from app.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, clamp_limit, decode_cursor, validate_order_by,
+    escape_like, build_page
+)
 
 class SupabaseService:
     def __init__(self):
@@ -12,52 +19,217 @@ class SupabaseService:
             settings.SUPABASE_URL,
             settings.SUPABASE_KEY
         )
+        
+        # 계정 조회 캐시 (키: "id:<id>", "phone:<번호>", "all")
+        self._account_cache: Dict[str, tuple] = {}  # key -> (만료 시각, 값)
+        self._account_inflight: Dict[str, asyncio.Future] = {}
+        self._account_generation = 0  # 무효화할 때마다 증가 (무효화 전에 시작한 조회 결과는 캐시하지 않음)
+        self._cache_hits = 0
+        self._cache_misses = 0
+    
+    # 계정 캐시
+    async def _cached_lookup(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """TTL 기반 읽기 캐시 (동일 키 동시 조회는 한 번의 요청으로 병합, loader는 이벤트 루프를 막지 않아야 함)"""
+        entry = self._account_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._cache_hits += 1
+            return copy.deepcopy(entry[1])
+        
+        inflight = self._account_inflight.get(key)
+        if inflight:
+            self._cache_hits += 1
+            return copy.deepcopy(await asyncio.shield(inflight))
+        
+        self._cache_misses += 1
+        generation = self._account_generation
+        future = asyncio.get_running_loop().create_future()
+        self._account_inflight[key] = future
+        try:
+            value = await loader()
+            future.set_result(value)
+        except Exception as e:
+            future.set_exception(e)
+            # 대기 중인 호출이 없을 때 "exception was never retrieved" 경고 방지
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()  # 조회 중 취소되면 대기 중인 호출도 취소
+            self._account_inflight.pop(key, None)
+        
+        # 조회 실패/미존재(None, 빈 목록)와 조회 중 무효화된 결과(수정 전 값일 수 있음)는 캐시하지 않음
+        if value and generation == self._account_generation:
+            if key == "all":
+                self._store("all", value)
+            else:
+                self._store_account(value)
+        return copy.deepcopy(value)
+    
+    def _store(self, key: str, value: Any):
+        """캐시에 값 저장"""
+        self._account_cache[key] = (time.monotonic() + settings.ACCOUNT_CACHE_TTL_SECONDS, value)
+    
+    def _store_account(self, account: Dict[str, Any]):
+        """계정을 id/전화번호 키로 캐시에 저장"""
+        self._store(f"id:{account['id']}", account)
+        if account.get("phone_number"):
+            self._store(f"phone:{account['phone_number']}", account)
+    
+    def invalidate_account(self, account_id: Optional[int] = None, phone_number: Optional[str] = None):
+        """계정 캐시 무효화"""
+        self._account_generation += 1
+        if account_id is not None:
+            entry = self._account_cache.pop(f"id:{account_id}", None)
+            if entry and phone_number is None:
+                phone_number = entry[1].get("phone_number")
+        if phone_number is not None:
+            self._account_cache.pop(f"phone:{phone_number}", None)
+        self._account_cache.pop("all", None)
+    
+    def clear_account_cache(self):
+        """계정 캐시 전체 비우기"""
+        self._account_generation += 1
+        self._account_cache.clear()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """계정 캐시 통계"""
+        total = self._cache_hits + self._cache_misses
+        return {
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+            "hit_ratio": round(self._cache_hits / total, 4) if total else 0.0,
+            "entries": len(self._account_cache),
+            "ttl_seconds": settings.ACCOUNT_CACHE_TTL_SECONDS
+        }
     
     # 계정 관리
     async def create_account(self, account_data: Dict[str, Any]) -> Dict[str, Any]:
         """계정 생성"""
         try:
             result = self.supabase.table("accounts").insert(account_data).execute()
-            return result.data[0] if result.data else None
+            account = result.data[0] if result.data else None
+            self.invalidate_account(phone_number=account_data.get("phone_number"))
+            if account:
+                self._store_account(account)
+            return account
         except Exception as e:
             print(f"Error creating account: {e}")
             raise
     
     async def get_account(self, account_id: int) -> Optional[Dict[str, Any]]:
         """계정 조회"""
-        try:
-            result = self.supabase.table("accounts").select("*").eq("id", account_id).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            print(f"Error getting account: {e}")
-            return None
+        def load():
+            try:
+                result = self.supabase.table("accounts").select("*").eq("id", account_id).execute()
+                return result.data[0] if result.data else None
+            except Exception as e:
+                print(f"Error getting account: {e}")
+                return None
+        
+        return await self._cached_lookup(f"id:{account_id}", lambda: asyncio.to_thread(load))
     
     async def get_account_by_phone(self, phone_number: str) -> Optional[Dict[str, Any]]:
         """전화번호로 계정 조회"""
-        try:
-            result = self.supabase.table("accounts").select("*").eq("phone_number", phone_number).execute()
-            return result.data[0] if result.data else None
-        except Exception as e:
-            print(f"Error getting account by phone: {e}")
-            return None
+        def load():
+            try:
+                result = self.supabase.table("accounts").select("*").eq("phone_number", phone_number).execute()
+                return result.data[0] if result.data else None
+            except Exception as e:
+                print(f"Error getting account by phone: {e}")
+                return None
+        
+        return await self._cached_lookup(f"phone:{phone_number}", lambda: asyncio.to_thread(load))
     
     async def update_account(self, account_id: int, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """계정 정보 업데이트"""
         try:
             result = self.supabase.table("accounts").update(update_data).eq("id", account_id).execute()
-            return result.data[0] if result.data else None
+            account = result.data[0] if result.data else None
+            self.invalidate_account(account_id)
+            if account:
+                self._store_account(account)
+            return account
         except Exception as e:
             print(f"Error updating account: {e}")
+            self.invalidate_account(account_id)
             return None
     
-    async def get_all_accounts(self) -> List[Dict[str, Any]]:
-        """모든 계정 조회"""
-        try:
-            result = self.supabase.table("accounts").select("*").execute()
-            return result.data
-        except Exception as e:
-            print(f"Error getting all accounts: {e}")
-            return []
+    async def get_all_accounts(self, **filters) -> List[Dict[str, Any]]:
+        """모든 계정 조회 (내부적으로 페이지 단위 조회)"""
+        async def load():
+            try:
+                return [account async for account in self.iter_accounts(**filters)]
+            except Exception as e:
+                print(f"Error getting all accounts: {e}")
+                return []
+        
+        if filters:
+            return await load()
+        return await self._cached_lookup("all", load)
+    
+    def _account_query(self, columns: str, count: Optional[str] = None,
+                       is_active: Optional[bool] = None, is_verified: Optional[bool] = None,
+                       phone_prefix: Optional[str] = None, username_prefix: Optional[str] = None,
+                       account_ids: Optional[List[int]] = None):
+        """계정 목록 조회 쿼리 (서버 측 필터 적용)"""
+        query = self.supabase.table("accounts").select(columns, count=count)
+        if is_active is not None:
+            query = query.eq("is_active", is_active)
+        if is_verified is not None:
+            query = query.eq("is_verified", is_verified)
+        if phone_prefix:
+            query = query.like("phone_number", f"{escape_like(phone_prefix)}%")
+        if username_prefix:
+            query = query.ilike("username", f"{escape_like(username_prefix)}%")
+        if account_ids is not None:
+            query = query.in_("id", account_ids)
+        return query
+    
+    async def list_accounts(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                            order_by: str = "id", include_total: bool = False,
+                            columns: str = "*", **filters) -> Dict[str, Any]:
+        """계정 목록 한 페이지 조회 (커서 기반 페이지네이션)"""
+        limit = clamp_limit(limit)
+        order_by = validate_order_by(order_by)
+        after = decode_cursor(cursor, order_by)
+        
+        query = self._account_query(columns, **filters)
+        if order_by == "created_at":
+            if after:
+                query = query.or_(
+                    f'created_at.gt."{after["created_at"]}",'
+                    f'and(created_at.eq."{after["created_at"]}",id.gt.{after["id"]})'
+                )
+            query = query.order("created_at").order("id")
+        else:
+            if after:
+                query = query.gt("id", after["id"])
+            query = query.order("id")
+        
+        # 동기 HTTP 요청은 스레드에서 실행 (이벤트 루프를 막지 않도록)
+        result = await asyncio.to_thread(query.limit(limit + 1).execute)
+        accounts, next_cursor = build_page(result.data, limit, order_by)
+        
+        page = {
+            "accounts": accounts,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+        if include_total:
+            count_result = await asyncio.to_thread(self._account_query("id", count="exact", **filters).limit(1).execute)
+            page["total"] = count_result.count or 0
+        return page
+    
+    async def iter_accounts(self, page_size: int = MAX_PAGE_SIZE, **filters) -> AsyncIterator[Dict[str, Any]]:
+        """모든 계정을 페이지 단위로 순회"""
+        cursor = None
+        while True:
+            page = await self.list_accounts(limit=page_size, cursor=cursor, **filters)
+            for account in page["accounts"]:
+                yield account
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
     
     # 채팅방 관리
     async def create_chat_group(self, chat_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -152,13 +324,67 @@ class SupabaseService:
             print(f"Error saving message log: {e}")
             raise
     
-    async def get_role_logs(self, role_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+    def _role_logs_query(self, role_id: int, chat_id: Optional[int] = None,
+                         since: Optional[str] = None, until: Optional[str] = None):
+        """역할별 로그 조회 쿼리 (필터 적용)"""
+        query = self.supabase.table("message_logs").select("*").eq("agent_role_id", role_id)
+        if chat_id is not None:
+            query = query.eq("chat_id", chat_id)
+        if since:
+            query = query.gte("created_at", since)
+        if until:
+            query = query.lt("created_at", until)
+        return query
+    
+    async def list_role_logs(self, role_id: int, limit: int = DEFAULT_PAGE_SIZE,
+                             cursor: Optional[str] = None, chat_id: Optional[int] = None,
+                             since: Optional[str] = None, until: Optional[str] = None,
+                             descending: bool = True) -> Dict[str, Any]:
+        """역할별 메시지 로그 한 페이지 조회 ((created_at, id) 커서 페이지네이션)"""
+        limit = clamp_limit(limit)
+        after = decode_cursor(cursor, "created_at")
+        
+        query = self._role_logs_query(role_id, chat_id, since, until)
+        if after:
+            op = "lt" if descending else "gt"
+            query = query.or_(
+                f'created_at.{op}."{after["created_at"]}",'
+                f'and(created_at.eq."{after["created_at"]}",id.{op}.{after["id"]})'
+            )
+        query = query.order("created_at", desc=descending).order("id", desc=descending)
+        
+        # 동기 HTTP 요청은 스레드에서 실행 (내보내기 중에도 이벤트 루프를 막지 않도록)
+        result = await asyncio.to_thread(query.limit(limit + 1).execute)
+        logs, next_cursor = build_page(result.data, limit, "created_at")
+        return {
+            "logs": logs,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+    
+    async def iter_role_logs(self, role_id: int, chunk_size: int = MAX_PAGE_SIZE,
+                             **filters) -> AsyncIterator[List[Dict[str, Any]]]:
+        """역할별 메시지 로그를 오래된 순으로 청크 단위 순회"""
+        cursor = None
+        while True:
+            page = await self.list_role_logs(
+                role_id, limit=chunk_size, cursor=cursor, descending=False, **filters
+            )
+            if page["logs"]:
+                yield page["logs"]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+    
+    async def get_role_logs(self, role_id: int, limit: int = 50, cursor: Optional[str] = None,
+                            chat_id: Optional[int] = None, since: Optional[str] = None,
+                            until: Optional[str] = None) -> List[Dict[str, Any]]:
         """역할별 메시지 로그 조회"""
         try:
-            result = self.supabase.table("message_logs").select("*").eq(
-                "agent_role_id", role_id
-            ).order("created_at", desc=True).limit(limit).execute()
-            return result.data
+            page = await self.list_role_logs(
+                role_id, limit=limit, cursor=cursor, chat_id=chat_id, since=since, until=until
+            )
+            return page["logs"]
         except Exception as e:
             print(f"Error getting role logs: {e}")
             return []
@@ -8,15 +8,22 @@ from telethon.errors import (
     PhoneNumberInvalidError,
     ApiIdInvalidError
 )
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, AsyncIterator
+from datetime import datetime
 import os
 
 from app.services.supabase_service import supabase_service
+from app.services.session_store import delete_session_file
 from app.config import settings
 
+# 일괄 연결 테스트 최대 동시 실행 수 (동시 연결이 많으면 텔레그램 FloodWait 위험)
+MAX_CONNECTION_TEST_CONCURRENCY = 50
+
 class TelegramAuthService:
     def __init__(self):
         self.temp_clients: Dict[str, TelegramClient] = {}
+        self.connection_cache: Dict[int, Dict[str, Any]] = {}  # account_id -> 마지막 연결 테스트 결과
+        self.sweep_task: Optional[asyncio.Task] = None
     
     async def start_auth_process(self, phone_number: str, api_id: int, api_hash: str) -> Dict[str, Any]:
         """텔레그램 인증 프로세스 시작"""
@@ -248,22 +255,32 @@ class TelegramAuthService:
                     "error": "계정을 찾을 수 없습니다."
                 }
             
-            # 클라이언트 생성 및 연결 테스트
-            client = TelegramClient(
-                StringSession(account["session_string"]),
-                account["api_id"],
-                account["api_hash"]
-            )
-            
+            return await self._probe_account(account)
+                
+        except Exception as e:
+            print(f"Error testing connection: {e}")
+            return {
+                "success": False,
+                "error": f"연결 테스트 중 오류가 발생했습니다: {str(e)}"
+            }
+    
+    async def _probe_account(self, account: Dict[str, Any]) -> Dict[str, Any]:
+        """단일 계정 연결 확인 후 결과를 캐시에 기록"""
+        client = TelegramClient(
+            StringSession(account["session_string"]),
+            account["api_id"],
+            account["api_hash"]
+        )
+        
+        try:
             await client.connect()
             
             if await client.is_user_authorized():
                 me = await client.get_me()
-                await client.disconnect()
-                
-                return {
+                result = {
                     "success": True,
                     "message": "연결이 정상입니다.",
+                    "session_expired": False,
                     "user_info": {
                         "id": me.id,
                         "username": me.username,
@@ -272,18 +289,87 @@ class TelegramAuthService:
                     }
                 }
             else:
-                await client.disconnect()
-                return {
+                result = {
                     "success": False,
+                    "session_expired": True,
                     "error": "세션이 만료되었습니다. 재인증이 필요합니다."
                 }
-                
         except Exception as e:
-            print(f"Error testing connection: {e}")
-            return {
+            print(f"Error testing connection for account {account['id']}: {e}")
+            result = {
                 "success": False,
+                "session_expired": False,
                 "error": f"연결 테스트 중 오류가 발생했습니다: {str(e)}"
             }
+        finally:
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+        
+        result["account_id"] = account["id"]
+        result["checked_at"] = datetime.utcnow().isoformat()
+        self.connection_cache[account["id"]] = result
+        return result
+    
+    async def test_connections(self, account_ids: Optional[List[int]] = None,
+                               only_active: bool = True,
+                               concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """여러 계정 연결 테스트 (동시 실행 수 제한, 완료 순서대로 결과 반환)"""
+        filters = {}
+        if account_ids is not None:
+            filters["account_ids"] = account_ids
+        if only_active:
+            filters["is_active"] = True
+        accounts = await supabase_service.get_all_accounts(**filters)
+        
+        concurrency = concurrency or settings.HEALTH_CHECK_CONCURRENCY
+        semaphore = asyncio.Semaphore(min(max(concurrency, 1), MAX_CONNECTION_TEST_CONCURRENCY))
+        
+        async def probe(account: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._probe_account(account)
+        
+        tasks = [asyncio.ensure_future(probe(account)) for account in accounts]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def get_cached_connections(self, account_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """캐시된 연결 테스트 결과 조회"""
+        if account_ids is None:
+            return list(self.connection_cache.values())
+        return [self.connection_cache[i] for i in account_ids if i in self.connection_cache]
+    
+    async def _health_sweep_loop(self, interval_seconds: int):
+        """주기적으로 전체 활성 계정 연결 상태 점검"""
+        while True:
+            try:
+                expired = []
+                async for result in self.test_connections(only_active=True):
+                    if result.get("session_expired"):
+                        expired.append(result["account_id"])
+                if expired:
+                    print(f"⚠️  세션 만료 계정: {expired}")
+            except Exception as e:
+                print(f"Error during health sweep: {e}")
+            await asyncio.sleep(interval_seconds)
+    
+    def start_health_sweep(self, interval_seconds: Optional[int] = None):
+        """백그라운드 연결 상태 점검 시작"""
+        interval_seconds = interval_seconds or settings.HEALTH_SWEEP_INTERVAL_SECONDS
+        if interval_seconds <= 0 or (self.sweep_task and not self.sweep_task.done()):
+            return
+        self.sweep_task = asyncio.create_task(self._health_sweep_loop(interval_seconds))
+    
+    def stop_health_sweep(self):
+        """백그라운드 연결 상태 점검 중지"""
+        if self.sweep_task:
+            self.sweep_task.cancel()
+            self.sweep_task = None
     
     async def revoke_session(self, account_id: int) -> Dict[str, Any]:
         """세션 취소 (계정 비활성화)"""
@@ -297,6 +383,7 @@ class TelegramAuthService:
             
             # 계정 비활성화
             await supabase_service.update_account(account_id, {"is_active": False})
+            delete_session_file(account_id)
             
             return {
                 "success": True,
@@ -0,0 +1,239 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import runtime_session
+from app.models.llm_usage import LlmUsageRollup
+
+# LLM 토큰/비용 집계
+# 호출마다 (시간대, 역할, 계정, 모델, 키)별로 메모리에 누적하고 AGENT_USAGE_FLUSH_SECONDS마다
+# llm_usage_rollups 테이블에 더합니다. 역할별 하루 토큰 한도(daily_token_budget) 확인에도 사용합니다.
+
+# 모델별 1K 토큰당 가격 (USD, 입력:출력), OPENAI_MODEL_PRICES로 덮어쓰기
+DEFAULT_MODEL_PRICES = "gpt-3.5-turbo:0.0005:0.0015,gpt-4o-mini:0.00015:0.0006,gpt-4o:0.005:0.015,gpt-4-turbo:0.01:0.03"
+
+# 집계 단위별 컬럼
+GROUP_COLUMNS = {
+    "role": LlmUsageRollup.agent_role_id,
+    "account": LlmUsageRollup.account_id,
+    "model": LlmUsageRollup.model,
+    "key": LlmUsageRollup.api_key_label
+}
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """"모델:입력가격:출력가격" 쉼표 목록 해석"""
+    prices = {}
+    for entry in spec.split(","):
+        parts = entry.strip().split(":")
+        if len(parts) == 3 and parts[0]:
+            prices[parts[0]] = (float(parts[1]), float(parts[2]))
+    return prices
+
+def hour_bucket(now: datetime) -> datetime:
+    return now.replace(minute=0, second=0, microsecond=0)
+
+def to_utc_naive(value) -> datetime:
+    """요청/DB의 시각 (ISO 문자열, timezone 포함 가능) -> 집계/로그 컬럼과 같은 UTC naive datetime"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class UsageAccountant:
+    """역할/계정/모델/키별 토큰 사용량 집계와 주기적 저장"""
+
+    def __init__(self):
+        self.prices = parse_prices(DEFAULT_MODEL_PRICES)
+        self.prices.update(parse_prices(settings.OPENAI_MODEL_PRICES))
+        self.pending: Dict[tuple, List[float]] = {}  # (시간대, role_id, account_id, model, key) -> [호출, 입력, 출력, 비용]
+        self.daily_tokens: Dict[int, int] = {}  # role_id -> 오늘 사용 토큰 (최초 확인 시 DB에서 로드)
+        self.daily_date = datetime.utcnow().date()
+        self.budget_skipped: Dict[int, int] = {}  # role_id -> 한도 초과로 건너뛴 메시지 수
+        self.flush_task: Optional[asyncio.Task] = None
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """모델 가격표로 비용 계산 (버전이 붙은 모델명은 가장 긴 접두사로 매칭, 없으면 0)"""
+        matches = [name for name in self.prices if model.startswith(name)]
+        if not matches:
+            return 0.0
+        input_price, output_price = self.prices[max(matches, key=len)]
+        return (prompt_tokens * input_price + completion_tokens * output_price) / 1000
+
+    def record(self, role_id: int, account_id: int, model: str, key_label: str,
+               prompt_tokens: int, completion_tokens: int):
+        """호출 한 건의 사용량 누적"""
+        now = datetime.utcnow()
+        key = (hour_bucket(now), role_id, account_id, model, key_label)
+        totals = self.pending.setdefault(key, [0, 0, 0, 0.0])
+        totals[0] += 1
+        totals[1] += prompt_tokens
+        totals[2] += completion_tokens
+        totals[3] += self.cost(model, prompt_tokens, completion_tokens)
+
+        self._roll_day(now)
+        if role_id in self.daily_tokens:
+            self.daily_tokens[role_id] += prompt_tokens + completion_tokens
+        self._ensure_flusher()
+
+    def _roll_day(self, now: datetime):
+        if now.date() != self.daily_date:
+            self.daily_date = now.date()
+            self.daily_tokens = {}
+
+    def tokens_used_today(self, role_id: int) -> int:
+        """역할의 오늘(UTC) 사용 토큰 (저장된 집계 + 아직 저장되지 않은 누적분)"""
+        now = datetime.utcnow()
+        self._roll_day(now)
+        if role_id not in self.daily_tokens:
+            day_start = datetime.combine(self.daily_date, datetime.min.time())
+            with runtime_session() as db:
+                stored = db.query(
+                    func.coalesce(func.sum(LlmUsageRollup.prompt_tokens + LlmUsageRollup.completion_tokens), 0)
+                ).filter(
+                    LlmUsageRollup.agent_role_id == role_id,
+                    LlmUsageRollup.bucket_start >= day_start
+                ).scalar()
+            unflushed = sum(
+                totals[1] + totals[2] for key, totals in self.pending.items()
+                if key[1] == role_id and key[0] >= day_start
+            )
+            self.daily_tokens[role_id] = int(stored) + int(unflushed)
+        return self.daily_tokens[role_id]
+
+    def budget_exhausted(self, role_info: dict, record: bool = True) -> bool:
+        """역할의 하루 토큰 한도 소진 여부 (소진 시 건너뛴 건수 기록, record=False면 기록 안 함)"""
+        budget = role_info.get("daily_token_budget")
+        if not budget:
+            return False
+        if self.tokens_used_today(role_info["id"]) < budget:
+            return False
+        if record:
+            self.budget_skipped[role_info["id"]] = self.budget_skipped.get(role_info["id"], 0) + 1
+        return True
+
+    def _ensure_flusher(self):
+        if self.flush_task is None or self.flush_task.done():
+            try:
+                self.flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+            except RuntimeError:
+                pass  # 이벤트 루프 밖 (stop() 시 저장)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.AGENT_USAGE_FLUSH_SECONDS)
+            self.flush()
+
+    def _add_to_rollup(self, db: Session, key: tuple, totals: List[float]):
+        """집계 행에 누적 (없으면 생성, 동시 생성 충돌 시 다시 누적)"""
+        bucket_start, role_id, account_id, model, key_label = key
+        match = and_(
+            LlmUsageRollup.bucket_start == bucket_start,
+            LlmUsageRollup.agent_role_id == role_id,
+            LlmUsageRollup.model == model,
+            LlmUsageRollup.api_key_label == key_label
+        )
+        increments = {
+            LlmUsageRollup.calls: LlmUsageRollup.calls + int(totals[0]),
+            LlmUsageRollup.prompt_tokens: LlmUsageRollup.prompt_tokens + int(totals[1]),
+            LlmUsageRollup.completion_tokens: LlmUsageRollup.completion_tokens + int(totals[2]),
+            LlmUsageRollup.cost_usd: LlmUsageRollup.cost_usd + totals[3],
+            LlmUsageRollup.updated_at: datetime.utcnow()
+        }
+        if db.query(LlmUsageRollup).filter(match).update(increments, synchronize_session=False):
+            db.commit()
+            return
+        try:
+            db.add(LlmUsageRollup(
+                bucket_start=bucket_start,
+                agent_role_id=role_id,
+                account_id=account_id,
+                model=model,
+                api_key_label=key_label,
+                calls=int(totals[0]),
+                prompt_tokens=int(totals[1]),
+                completion_tokens=int(totals[2]),
+                cost_usd=totals[3]
+            ))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            db.query(LlmUsageRollup).filter(match).update(increments, synchronize_session=False)
+            db.commit()
+
+    def flush(self):
+        """누적분을 집계 테이블에 저장 (실패한 항목은 다음 저장 때 다시 시도)"""
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        failed = {}
+        with runtime_session() as db:
+            for key, totals in pending.items():
+                try:
+                    self._add_to_rollup(db, key, totals)
+                except Exception as e:
+                    db.rollback()
+                    failed[key] = totals
+                    print(f"Failed to flush LLM usage {key}: {e}")
+        for key, totals in failed.items():
+            merged = self.pending.setdefault(key, [0, 0, 0, 0.0])
+            for index, value in enumerate(totals):
+                merged[index] += value
+
+    async def stop(self):
+        """저장 작업 중지 후 남은 누적분 저장"""
+        if self.flush_task and not self.flush_task.done():
+            self.flush_task.cancel()
+        self.flush_task = None
+        self.flush()
+
+    def summarize(self, db: Session, since: datetime, group_by: str = "role",
+                  until: Optional[datetime] = None) -> Dict[str, Any]:
+        """기간 내 사용량을 집계 단위별, 시간대별로 합산"""
+        column = GROUP_COLUMNS[group_by]
+        filters = [LlmUsageRollup.bucket_start >= since]
+        if until is not None:
+            filters.append(LlmUsageRollup.bucket_start < until)
+        sums = (
+            func.sum(LlmUsageRollup.calls).label("calls"),
+            func.sum(LlmUsageRollup.prompt_tokens).label("prompt_tokens"),
+            func.sum(LlmUsageRollup.completion_tokens).label("completion_tokens"),
+            func.sum(LlmUsageRollup.cost_usd).label("cost_usd")
+        )
+
+        def to_dict(row, name: str) -> Dict[str, Any]:
+            return {
+                name: row[0],
+                "calls": int(row.calls or 0),
+                "prompt_tokens": int(row.prompt_tokens or 0),
+                "completion_tokens": int(row.completion_tokens or 0),
+                "cost_usd": round(float(row.cost_usd or 0), 6)
+            }
+
+        groups = db.query(column, *sums).filter(*filters).group_by(column).order_by(
+            func.sum(LlmUsageRollup.cost_usd).desc()
+        ).all()
+        series = db.query(LlmUsageRollup.bucket_start, *sums).filter(*filters).group_by(
+            LlmUsageRollup.bucket_start
+        ).order_by(LlmUsageRollup.bucket_start).all()
+
+        group_rows = [to_dict(row, group_by) for row in groups]
+        return {
+            "group_by": group_by,
+            "groups": group_rows,
+            "series": [to_dict(row, "bucket_start") for row in series],
+            "total": {
+                "calls": sum(row["calls"] for row in group_rows),
+                "prompt_tokens": sum(row["prompt_tokens"] for row in group_rows),
+                "completion_tokens": sum(row["completion_tokens"] for row in group_rows),
+                "cost_usd": round(sum(row["cost_usd"] for row in group_rows), 6)
+            }
+        }
+
+# 전역 인스턴스
+usage_accountant = UsageAccountant()
@@ -0,0 +1,5 @@
+from app.workers.agent_runner import main
+
+# 에이전트 러너 실행: python -m app.workers
+if __name__ == "__main__":
+    main()
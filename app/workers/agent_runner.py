@@ -0,0 +1,177 @@
+import asyncio
+import json
+import signal
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.services.agent_service import agent_service
+from app.services.openai_service import openai_service
+from app.services.api_key_pool import api_key_pool
+from app.services.log_spool import message_log_spool
+from app.workers.shard_supervisor import shard_supervisor
+
+# 에이전트 러너: 모든 텔레그램 클라이언트를 소유하고 로컬 제어 채널로 명령을 받는 독립 프로세스
+# 제어 프로토콜: 한 줄에 하나의 JSON 요청 {"command": ..., "token": ..., ...} -> 한 줄 JSON 응답
+
+class AgentController:
+    """에이전트 런타임 제어 (AGENT_WORKERS에 따라 프로세스 내 실행 또는 샤드 워커로 위임)"""
+
+    def __init__(self):
+        self.start_task: Optional[asyncio.Task] = None
+
+    @property
+    def sharded(self) -> bool:
+        return settings.AGENT_WORKERS > 0
+
+    async def start(self) -> Dict[str, Any]:
+        """모든 활성 에이전트 시작 (시작 작업은 백그라운드에서 진행)"""
+        if self.sharded:
+            shard_supervisor.start()
+            return {"success": True, "message": f"{settings.AGENT_WORKERS}개 샤드 워커에서 에이전트를 시작합니다."}
+
+        if self.start_task and not self.start_task.done():
+            return {"success": True, "message": "에이전트가 이미 시작 중입니다."}
+        self.start_task = asyncio.create_task(agent_service.start_all_agents())
+        return {"success": True, "message": "에이전트 시작 요청이 처리되었습니다."}
+
+    async def stop(self) -> Dict[str, Any]:
+        """모든 에이전트 중지"""
+        if self.sharded:
+            await asyncio.get_running_loop().run_in_executor(None, shard_supervisor.stop)
+        else:
+            if self.start_task and not self.start_task.done():
+                self.start_task.cancel()
+            await agent_service.stop_all_agents()
+        return {"success": True, "message": "모든 에이전트가 중지되었습니다."}
+
+    async def rebalance(self) -> Dict[str, Any]:
+        """계정 재동기화 요청 (계정 추가/비활성화 즉시 반영)"""
+        if self.sharded:
+            if not shard_supervisor.running:
+                return {"success": False, "error": "샤드 워커가 실행 중이 아닙니다."}
+            shard_supervisor.reconcile()
+        else:
+            await agent_service.sync_accounts()
+        return {"success": True, "message": "재동기화 요청이 전달되었습니다."}
+
+    async def reload_roles(self, account_id: int) -> Dict[str, Any]:
+        """계정의 역할 정보 재로딩 (역할 생성/수정/삭제 후 호출)"""
+        if self.sharded:
+            shard_supervisor.reload_roles(account_id)
+        else:
+            await agent_service.reload_account_roles(account_id)
+        return {"success": True}
+
+    async def status(self) -> Dict[str, Any]:
+        """활성 에이전트 상태"""
+        if self.sharded:
+            active_agents = shard_supervisor.get_active_agents()
+            return {
+                "success": True,
+                "active_agents": active_agents,
+                "total_agents": len(active_agents),
+                "shards": shard_supervisor.get_shards()
+            }
+        active_agents = agent_service.get_active_agents()
+        return {
+            "success": True,
+            "active_agents": active_agents,
+            "total_agents": len(active_agents),
+            "llm_breakers": openai_service.get_breaker_states(),
+            "log_spool": message_log_spool.stats()
+        }
+
+    async def models(self) -> Dict[str, Any]:
+        """모델별 라우팅/지연 시간/토큰 통계 (샤드 모드에서는 샤드별)"""
+        if self.sharded:
+            return {
+                "success": True,
+                "shards": {
+                    shard_index: status.get("models")
+                    for shard_index, status in shard_supervisor.shard_status.items()
+                }
+            }
+        return {"success": True, **openai_service.get_model_metrics()}
+
+    async def keys(self) -> Dict[str, Any]:
+        """공유 API 키 풀 사용량 (샤드 모드에서는 샤드별)"""
+        if self.sharded:
+            return {
+                "success": True,
+                "shards": {
+                    shard_index: status.get("keys")
+                    for shard_index, status in shard_supervisor.shard_status.items()
+                }
+            }
+        return {"success": True, "keys": api_key_pool.stats()}
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """제어 채널 요청 처리"""
+        if settings.AGENT_RUNNER_TOKEN and request.get("token") != settings.AGENT_RUNNER_TOKEN:
+            return {"success": False, "error": "unauthorized"}
+
+        command = request.get("command")
+        if command == "start":
+            return await self.start()
+        if command == "stop":
+            return await self.stop()
+        if command == "rebalance":
+            return await self.rebalance()
+        if command == "reload_roles":
+            return await self.reload_roles(int(request["account_id"]))
+        if command == "status":
+            return await self.status()
+        if command == "models":
+            return await self.models()
+        if command == "keys":
+            return await self.keys()
+        if command == "ping":
+            return {"success": True, "message": "pong"}
+        return {"success": False, "error": f"unknown command: {command}"}
+
+async def _handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """제어 채널 연결 처리 (연결당 여러 요청 가능)"""
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                response = await agent_controller.handle(json.loads(line))
+            except Exception as e:
+                response = {"success": False, "error": str(e)}
+            writer.write(json.dumps(response, ensure_ascii=False, default=str).encode() + b"\n")
+            await writer.drain()
+    finally:
+        writer.close()
+
+async def serve():
+    """에이전트 러너 실행 (제어 채널 대기, SIGINT/SIGTERM 시 정상 종료)"""
+    server = await asyncio.start_server(
+        _handle_connection, settings.AGENT_RUNNER_HOST, settings.AGENT_RUNNER_PORT
+    )
+    print(f"🤖 Agent runner listening on {settings.AGENT_RUNNER_HOST}:{settings.AGENT_RUNNER_PORT}")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass  # Windows
+
+    if settings.AGENT_RUNNER_AUTOSTART:
+        await agent_controller.start()
+
+    async with server:
+        await stop_event.wait()
+
+    print("🛑 Agent runner 종료 중...")
+    await agent_controller.stop()
+    print("✅ Agent runner 종료 완료")
+
+def main():
+    asyncio.run(serve())
+
+# 전역 인스턴스
+agent_controller = AgentController()
@@ -0,0 +1,57 @@
+import asyncio
+import json
+from typing import Any, Dict
+
+from app.config import settings
+
+class AgentRunnerClient:
+    """별도 프로세스로 실행 중인 에이전트 러너의 제어 채널 클라이언트 (AgentController와 동일한 인터페이스)"""
+
+    def __init__(self, host: str = None, port: int = None, timeout: float = 10):
+        self.host = host or settings.AGENT_RUNNER_HOST
+        self.port = port or settings.AGENT_RUNNER_PORT
+        self.timeout = timeout
+
+    async def send(self, command: str, **payload) -> Dict[str, Any]:
+        """명령 전송 후 응답 반환 (러너에 연결할 수 없으면 ConnectionError)"""
+        request = {"command": command, "token": settings.AGENT_RUNNER_TOKEN, **payload}
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            raise ConnectionError(f"에이전트 러너에 연결할 수 없습니다 ({self.host}:{self.port}): {e}")
+
+        try:
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+        finally:
+            writer.close()
+        if not line:
+            raise ConnectionError("에이전트 러너가 응답 없이 연결을 종료했습니다.")
+        return json.loads(line)
+
+    async def start(self) -> Dict[str, Any]:
+        return await self.send("start")
+
+    async def stop(self) -> Dict[str, Any]:
+        return await self.send("stop")
+
+    async def rebalance(self) -> Dict[str, Any]:
+        return await self.send("rebalance")
+
+    async def reload_roles(self, account_id: int) -> Dict[str, Any]:
+        return await self.send("reload_roles", account_id=account_id)
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.send("status")
+
+    async def models(self) -> Dict[str, Any]:
+        return await self.send("models")
+
+    async def keys(self) -> Dict[str, Any]:
+        return await self.send("keys")
+
+# 전역 인스턴스
+agent_runner_client = AgentRunnerClient()
@@ -0,0 +1,236 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+
+# 멀티 프로세스 에이전트 샤딩
+# 각 워커 프로세스는 자체 이벤트 루프와 TelegramAgentService를 가지며,
+# account_id 해시가 자신의 샤드 번호와 일치하는 계정만 실행합니다.
+
+def shard_for(account_id: int, num_shards: int) -> int:
+    """계정이 속한 샤드 번호 (프로세스 재시작과 무관하게 고정)"""
+    return zlib.crc32(str(account_id).encode()) % num_shards
+
+def run_shard_worker(shard_index: int, num_shards: int,
+                     command_queue: multiprocessing.Queue, status_queue: multiprocessing.Queue):
+    """샤드 워커 프로세스 진입점"""
+    try:
+        asyncio.run(_shard_main(shard_index, num_shards, command_queue, status_queue))
+    except KeyboardInterrupt:
+        pass
+
+async def _shard_main(shard_index: int, num_shards: int,
+                      command_queue: multiprocessing.Queue, status_queue: multiprocessing.Queue):
+    """샤드 워커 메인 루프: 주기적 동기화, 상태 보고, 명령 처리"""
+    # 워커 프로세스에서 새로 생성 (부모 프로세스의 연결/클라이언트를 공유하지 않음)
+    from app.services.agent_service import TelegramAgentService
+    from app.services.lease_service import LeaseService
+    from app.services.openai_service import openai_service
+    from app.services.api_key_pool import api_key_pool
+    from app.services.log_spool import message_log_spool
+
+    # 샤드별 스풀 파일 (여러 프로세스가 같은 파일에 쓰지 않도록)
+    message_log_spool.path = f"{settings.MESSAGE_LOG_SPOOL_PATH}.shard{shard_index}"
+    # 키별 분당 한도를 워커끼리 나눠 사용 (워커마다 풀을 따로 가지므로)
+    api_key_pool.share_limits(num_shards)
+    if settings.MESSAGE_LOG_SPOOL_ENABLED:
+        message_log_spool.start()
+        await message_log_spool.drain_pending()
+
+    service = TelegramAgentService()
+    if service.lease_service:
+        # 샤드별 고정 노드 ID: 재시작된 워커가 자신의 임대를 바로 다시 사용
+        node_prefix = settings.AGENT_NODE_ID or socket.gethostname()
+        capacity = settings.AGENT_NODE_CAPACITY
+        service.lease_service = LeaseService(
+            node_id=f"{node_prefix}:shard{shard_index}",
+            capacity=-(-capacity // num_shards) if capacity > 0 else 0
+        )
+    owns = lambda account_id: shard_for(account_id, num_shards) == shard_index
+
+    def report():
+        status_queue.put((shard_index, {
+            "shard": shard_index,
+            "pid": os.getpid(),
+            "agents": service.get_active_agents(),
+            "models": openai_service.get_model_metrics(),
+            "llm_breakers": openai_service.get_breaker_states(),
+            "keys": api_key_pool.stats(),
+            "log_spool": message_log_spool.stats(),
+            "reported_at": datetime.utcnow().isoformat()
+        }))
+
+    print(f"Shard worker {shard_index}/{num_shards} started (pid={os.getpid()})")
+    next_sync = 0.0
+    try:
+        while True:
+            # 명령: ("stop",), ("reconcile",), ("reload_roles", account_id)
+            commands = []
+            while True:
+                try:
+                    commands.append(command_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if any(command[0] == "stop" for command in commands):
+                break
+            for command in commands:
+                if command[0] == "reload_roles":
+                    await service.reload_account_roles(command[1])
+            if any(command[0] == "reconcile" for command in commands) or time.monotonic() >= next_sync:
+                await service.sync_accounts(owns)
+                next_sync = time.monotonic() + settings.AGENT_SHARD_SYNC_SECONDS
+                report()
+            else:
+                await service.stop_expired_clients()
+
+            await asyncio.sleep(1)
+    finally:
+        await service.stop_all_agents()
+        report()
+        print(f"Shard worker {shard_index} stopped")
+
+class ShardSupervisor:
+    """샤드 워커 프로세스 관리 (생성, 비정상 종료 시 재시작, 상태 집계)"""
+
+    def __init__(self, num_workers: int):
+        self.num_workers = num_workers
+        self._ctx = multiprocessing.get_context("spawn")
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.command_queues: Dict[int, multiprocessing.Queue] = {}
+        self.status_queue: Optional[multiprocessing.Queue] = None  # start() 시 생성
+        self.shard_status: Dict[int, Dict[str, Any]] = {}
+        self.restart_counts: Dict[int, int] = {}
+        self._next_restart: Dict[int, float] = {}
+        self._monitor: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._monitor is not None and self._monitor.is_alive()
+
+    def _spawn(self, shard_index: int):
+        """샤드 워커 프로세스 생성"""
+        command_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=run_shard_worker,
+            args=(shard_index, self.num_workers, command_queue, self.status_queue),
+            name=f"agent-shard-{shard_index}",
+            daemon=True
+        )
+        process.start()
+        self.processes[shard_index] = process
+        self.command_queues[shard_index] = command_queue
+
+    def start(self):
+        """모든 샤드 워커 시작"""
+        if self.running:
+            self.reconcile()
+            return
+        self._stopping.clear()
+        if self.status_queue is None:
+            self.status_queue = self._ctx.Queue()
+        for shard_index in range(self.num_workers):
+            self._spawn(shard_index)
+        self._monitor = threading.Thread(target=self._monitor_loop, name="shard-supervisor", daemon=True)
+        self._monitor.start()
+        print(f"Started {self.num_workers} agent shard workers")
+
+    def _drain_status(self):
+        """워커가 보고한 상태 수집"""
+        if self.status_queue is None:
+            return
+        while True:
+            try:
+                shard_index, status = self.status_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.shard_status[shard_index] = status
+
+    def _monitor_loop(self):
+        """워커 감시: 비정상 종료된 워커는 백오프 후 재시작"""
+        while not self._stopping.is_set():
+            self._drain_status()
+            now = time.monotonic()
+            for shard_index, process in list(self.processes.items()):
+                if process.is_alive():
+                    continue
+                retry_at = self._next_restart.get(shard_index)
+                if retry_at is None:
+                    restarts = self.restart_counts.get(shard_index, 0)
+                    delay = min(2 ** restarts, 60)
+                    self._next_restart[shard_index] = now + delay
+                    self.shard_status.pop(shard_index, None)
+                    print(f"Shard worker {shard_index} exited (code={process.exitcode}), restarting in {delay}s")
+                elif now >= retry_at:
+                    del self._next_restart[shard_index]
+                    self.restart_counts[shard_index] = self.restart_counts.get(shard_index, 0) + 1
+                    self._spawn(shard_index)
+            self._stopping.wait(1)
+
+    def reconcile(self):
+        """모든 워커에 즉시 계정 동기화 요청 (계정 추가/비활성화 반영)"""
+        for command_queue in self.command_queues.values():
+            command_queue.put(("reconcile",))
+
+    def reload_roles(self, account_id: int):
+        """계정을 담당하는 워커에 역할 정보 재로딩 요청"""
+        command_queue = self.command_queues.get(shard_for(account_id, self.num_workers))
+        if command_queue:
+            command_queue.put(("reload_roles", account_id))
+
+    def stop(self, timeout: float = 10):
+        """모든 샤드 워커 중지"""
+        self._stopping.set()
+        if self._monitor:
+            self._monitor.join(timeout)
+            self._monitor = None
+        for command_queue in self.command_queues.values():
+            command_queue.put(("stop",))
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._drain_status()
+        self.processes.clear()
+        self.command_queues.clear()
+        self.shard_status.clear()
+        self._next_restart.clear()
+
+    def get_active_agents(self) -> Dict[int, Dict]:
+        """모든 샤드의 활성 에이전트 정보 통합"""
+        self._drain_status()
+        agents = {}
+        for status in self.shard_status.values():
+            for account_id, info in status["agents"].items():
+                agents[account_id] = {**info, "shard": status["shard"]}
+        return agents
+
+    def get_shards(self) -> List[Dict[str, Any]]:
+        """샤드별 프로세스 상태"""
+        self._drain_status()
+        shards = []
+        for shard_index in range(self.num_workers):
+            process = self.processes.get(shard_index)
+            status = self.shard_status.get(shard_index, {})
+            shards.append({
+                "shard": shard_index,
+                "pid": process.pid if process else None,
+                "alive": bool(process and process.is_alive()),
+                "restarts": self.restart_counts.get(shard_index, 0),
+                "agents": len(status.get("agents", {})),
+                "log_spool": status.get("log_spool"),
+                "reported_at": status.get("reported_at")
+            })
+        return shards
+
+# 전역 인스턴스 (AGENT_WORKERS > 0 일 때 사용)
+shard_supervisor = ShardSupervisor(settings.AGENT_WORKERS)
@@ -40,6 +40,9 @@ CREATE TABLE agent_roles (
     openai_api_key VARCHAR(100), -- 개별 역할별 OpenAI 키
     response_delay_ms INTEGER DEFAULT 0, -- 응답 지연 시간
     max_response_length INTEGER DEFAULT 500, -- 최대 응답 길이
+    daily_token_budget INTEGER, -- 하루(UTC) 토큰 한도 (없으면 무제한)
+    relevance_rules JSONB, -- LLM 호출 전 관련성 검사 규칙 (전역 기본값을 덮어씀)
+    model_routing JSONB, -- 모델 선택 규칙 (전역 기본값을 덮어씀)
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     
@@ -47,9 +50,9 @@ CREATE TABLE agent_roles (
     UNIQUE(account_id, chat_group_id)
 );
 
--- 4. 메시지 로그 테이블
+-- 4. 메시지 로그 테이블 (created_at 기준 월 단위 파티션, 기본 키에 파티션 키 포함)
 CREATE TABLE message_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     agent_role_id INTEGER REFERENCES agent_roles(id) ON DELETE CASCADE,
     chat_id BIGINT NOT NULL,
     user_id BIGINT NOT NULL,
@@ -57,8 +60,36 @@ CREATE TABLE message_logs (
     response_text TEXT,
     response_time_ms INTEGER,
     role_used VARCHAR(50), -- 실제 사용된 역할
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-);
+    queue_wait_ms INTEGER, -- 메시지 전송 시각부터 생성 시작까지
+    llm_ms INTEGER, -- 응답 생성 시간
+    delay_ms INTEGER, -- 설정된 응답 지연 (response_delay_ms)
+    send_ms INTEGER, -- 텔레그램 전송 시간
+    model VARCHAR(100), -- 실제 사용된 모델
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    log_key VARCHAR(64), -- 스풀 레코드 ID (같은 레코드를 다시 저장해도 중복되지 않도록)
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(message_text, '') || ' ' || coalesce(response_text, ''))
+    ) STORED, -- 전문 검색용
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- 이후 월 파티션은 서버가 MESSAGE_LOG_PARTITIONS_AHEAD개월 앞까지 자동 생성합니다 (파티션 범위 밖 행은 기본 파티션에 저장)
+CREATE TABLE message_logs_default PARTITION OF message_logs DEFAULT;
+DO $$
+DECLARE
+    month_start DATE := date_trunc('month', NOW())::DATE;
+BEGIN
+    FOR offset_months IN 0..2 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF message_logs FOR VALUES FROM (%L) TO (%L)',
+            'message_logs_' || to_char(month_start + make_interval(months => offset_months), 'YYYY_MM'),
+            month_start + make_interval(months => offset_months),
+            month_start + make_interval(months => offset_months + 1)
+        );
+    END LOOP;
+END $$;
 
 -- 5. 인증 세션 테이블 (2FA 및 인증 상태 관리)
 CREATE TABLE auth_sessions (
@@ -71,17 +102,62 @@ CREATE TABLE auth_sessions (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
--- 6. 인덱스 생성 (성능 최적화)
-CREATE INDEX idx_accounts_phone ON accounts(phone_number);
-CREATE INDEX idx_accounts_active ON accounts(is_active);
-CREATE INDEX idx_agent_roles_account ON agent_roles(account_id);
+-- 5-1. 계정 실행 임대 테이블 (여러 서버 노드 간 계정 소유권 조정)
+CREATE TABLE account_leases (
+    account_id INTEGER PRIMARY KEY REFERENCES accounts(id) ON DELETE CASCADE,
+    node_id VARCHAR(100) NOT NULL, -- 계정을 실행 중인 노드
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL, -- 갱신되지 않으면 다른 노드가 인수
+    acquired_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    renewed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- LLM 토큰/비용 집계 테이블 (역할/모델/키별 1시간 단위)
+CREATE TABLE llm_usage_rollups (
+    id SERIAL PRIMARY KEY,
+    bucket_start TIMESTAMP NOT NULL, -- 집계 시간대 시작 (UTC)
+    agent_role_id INTEGER NOT NULL,
+    account_id INTEGER NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    api_key_label VARCHAR(20) NOT NULL, -- 마스킹된 키
+    calls INTEGER DEFAULT 0,
+    prompt_tokens BIGINT DEFAULT 0,
+    completion_tokens BIGINT DEFAULT 0,
+    cost_usd DOUBLE PRECISION DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    CONSTRAINT uq_llm_usage_bucket UNIQUE(bucket_start, agent_role_id, model, api_key_label)
+);
+
+-- 메시지 처리량/응답 시간 집계 테이블 (역할/채팅방별 1시간 단위, 로그 저장 시 함께 갱신)
+CREATE TABLE message_log_rollups (
+    id SERIAL PRIMARY KEY,
+    bucket_start TIMESTAMP NOT NULL, -- 집계 시간대 시작 (UTC)
+    agent_role_id INTEGER NOT NULL,
+    chat_id BIGINT NOT NULL,
+    message_count INTEGER DEFAULT 0, -- 기록된 메시지 수 (문맥만 기록된 메시지 포함)
+    reply_count INTEGER DEFAULT 0, -- 응답한 메시지 수
+    latency_sum_ms BIGINT DEFAULT 0, -- 응답 시간 합계
+    latency_histogram JSONB, -- 응답 시간 로그 구간별 건수 (합산 가능)
+    
+    CONSTRAINT uq_message_log_rollup_bucket UNIQUE(bucket_start, agent_role_id, chat_id)
+);
+
+-- 6. 인덱스 생성 (실제 조회 형태에 맞춘 복합/부분 인덱스, python -m app.query_plans 로 사용 여부 확인)
+-- UNIQUE 제약이 이미 인덱스를 만드는 컬럼(accounts.phone_number, auth_sessions.session_token,
+-- agent_roles(account_id, ...), 집계 테이블의 bucket_start)에는 별도 인덱스를 만들지 않습니다.
+CREATE INDEX idx_accounts_active ON accounts(id) WHERE is_active; -- 활성 계정 로드/집계
+CREATE INDEX idx_agent_roles_account_active ON agent_roles(account_id, chat_group_id) WHERE is_active; -- 계정의 활성 역할
 CREATE INDEX idx_agent_roles_chat ON agent_roles(chat_group_id);
-CREATE INDEX idx_agent_roles_active ON agent_roles(is_active);
-CREATE INDEX idx_message_logs_role ON message_logs(agent_role_id);
+CREATE INDEX idx_message_logs_role_created ON message_logs(agent_role_id, created_at DESC, id DESC); -- 역할별 최신 로그
 CREATE INDEX idx_message_logs_chat ON message_logs(chat_id);
-CREATE INDEX idx_message_logs_created ON message_logs(created_at);
-CREATE INDEX idx_auth_sessions_token ON auth_sessions(session_token);
+CREATE INDEX idx_message_logs_created ON message_logs(created_at); -- 오늘 메시지 수, 보관 기간 적용
+CREATE INDEX idx_message_logs_search ON message_logs USING GIN(search_vector);
+CREATE UNIQUE INDEX idx_message_logs_log_key ON message_logs(log_key, created_at); -- 파티션 테이블의 고유 인덱스는 파티션 키 포함
 CREATE INDEX idx_auth_sessions_account ON auth_sessions(account_id);
+CREATE INDEX idx_account_leases_node ON account_leases(node_id);
+CREATE INDEX idx_llm_usage_role_bucket ON llm_usage_rollups(agent_role_id, bucket_start); -- 역할별 오늘 토큰 사용량
+CREATE INDEX idx_llm_usage_account ON llm_usage_rollups(account_id);
+CREATE INDEX idx_message_log_rollups_role ON message_log_rollups(agent_role_id, bucket_start);
 
 -- 7. RLS (Row Level Security) 설정
 ALTER TABLE accounts ENABLE ROW LEVEL SECURITY;
@@ -89,6 +165,9 @@ ALTER TABLE chat_groups ENABLE ROW LEVEL SECURITY;
 ALTER TABLE agent_roles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE message_logs ENABLE ROW LEVEL SECURITY;
 ALTER TABLE auth_sessions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE account_leases ENABLE ROW LEVEL SECURITY;
+ALTER TABLE llm_usage_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE message_log_rollups ENABLE ROW LEVEL SECURITY;
 
 -- 8. 기본 정책 (모든 사용자가 읽기 가능, 인증된 사용자만 쓰기 가능)
 CREATE POLICY "Enable read access for all users" ON accounts FOR SELECT USING (true);
@@ -110,6 +189,20 @@ CREATE POLICY "Enable read access for all users" ON auth_sessions FOR SELECT USI
 CREATE POLICY "Enable insert for authenticated users" ON auth_sessions FOR INSERT WITH CHECK (true);
 CREATE POLICY "Enable update for authenticated users" ON auth_sessions FOR UPDATE USING (true);
 
+CREATE POLICY "Enable read access for all users" ON account_leases FOR SELECT USING (true);
+CREATE POLICY "Enable insert for authenticated users" ON account_leases FOR INSERT WITH CHECK (true);
+CREATE POLICY "Enable update for authenticated users" ON account_leases FOR UPDATE USING (true);
+CREATE POLICY "Enable delete for authenticated users" ON account_leases FOR DELETE USING (true);
+
+CREATE POLICY "Enable read access for all users" ON llm_usage_rollups FOR SELECT USING (true);
+CREATE POLICY "Enable insert for authenticated users" ON llm_usage_rollups FOR INSERT WITH CHECK (true);
+CREATE POLICY "Enable update for authenticated users" ON llm_usage_rollups FOR UPDATE USING (true);
+
+CREATE POLICY "Enable read access for all users" ON message_log_rollups FOR SELECT USING (true);
+CREATE POLICY "Enable insert for authenticated users" ON message_log_rollups FOR INSERT WITH CHECK (true);
+CREATE POLICY "Enable update for authenticated users" ON message_log_rollups FOR UPDATE USING (true);
+CREATE POLICY "Enable delete for authenticated users" ON message_log_rollups FOR DELETE USING (true);
+
 -- 9. 함수 및 트리거 (자동 업데이트 시간)
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -0,0 +1,132 @@
+import unittest
+from unittest import mock
+
+import httpx
+import openai
+
+from app.config import settings
+from app.services.api_key_pool import ApiKeyPool, NoAvailableKeyError, RATE_LIMIT_COOLDOWN_SECONDS, parse_keys
+
+# 공유 키 풀의 키 선택, 격리/복구, 샤드별 분당 한도와 대기 테스트 (가짜 시계 사용)
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.now += seconds
+
+def api_error(error_class, status_code: int, code=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    return error_class("error", response=response, body={"code": code} if code else None)
+
+class ApiKeyPoolTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patches = [
+            mock.patch("app.services.api_key_pool.time", mock.Mock(monotonic=self.clock)),
+            mock.patch.object(settings, "OPENAI_KEY_QUARANTINE_SECONDS", 600)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_parse_keys(self):
+        self.assertEqual(parse_keys("sk-aaa:2:500, sk-bbb,,sk-ccc::30"), [
+            {"key": "sk-aaa", "weight": 2.0, "rpm_limit": 500},
+            {"key": "sk-bbb", "weight": 1.0, "rpm_limit": 0},
+            {"key": "sk-ccc", "weight": 1.0, "rpm_limit": 30}
+        ])
+        self.assertEqual(parse_keys(""), [])
+
+    def test_weighted_selection_spreads_in_flight_requests(self):
+        pool = ApiKeyPool(parse_keys("sk-heavy-key:2,sk-light-key:1"))
+        picked = [pool.acquire().key for _ in range(3)]
+        # 가중치 2인 키가 먼저, 진행 중 요청이 쌓이면 다른 키도 사용
+        self.assertEqual(picked[0], "sk-heavy-key")
+        self.assertIn("sk-light-key", picked)
+        for pooled in pool.keys:
+            while pooled.in_flight:
+                pool.release(pooled)
+        self.assertEqual(pool.acquire().key, "sk-heavy-key")
+
+    def test_quarantine_and_recover(self):
+        pool = ApiKeyPool(parse_keys("sk-first-key:2,sk-second-key:1"))
+        first = pool.acquire()
+        pool.release(first, api_error(openai.AuthenticationError, 401))
+        self.assertEqual(pool.stats()[0]["quarantined"], True)
+        self.assertEqual(pool.acquire().key, "sk-second-key")
+
+        self.clock.now += 599
+        self.assertEqual(pool.acquire().key, "sk-second-key")
+        self.clock.now += 2
+        self.assertEqual(pool.acquire().key, "sk-first-key")
+        self.assertEqual(first.errors, 1)
+
+    def test_rate_limit_cooldown_and_quota_quarantine(self):
+        pool = ApiKeyPool(parse_keys("sk-first-key,sk-second-key"))
+        first, second = pool.keys
+        pool.acquire()
+        pool.release(first, api_error(openai.RateLimitError, 429))
+        self.assertAlmostEqual(first.available_in(self.clock.now), RATE_LIMIT_COOLDOWN_SECONDS)
+
+        pool.release(pool.acquire(), api_error(openai.RateLimitError, 429, code="insufficient_quota"))
+        self.assertAlmostEqual(second.available_in(self.clock.now), 600)
+        with self.assertRaises(NoAvailableKeyError):
+            pool.acquire()
+        self.clock.now += RATE_LIMIT_COOLDOWN_SECONDS
+        self.assertIs(pool.acquire(), first)
+
+    def test_other_errors_do_not_quarantine(self):
+        pool = ApiKeyPool(parse_keys("sk-only-key"))
+        pooled = pool.acquire()
+        pool.release(pooled, api_error(openai.InternalServerError, 500))
+        self.assertEqual(pooled.errors, 1)
+        self.assertEqual(pooled.available_in(self.clock.now), 0)
+        self.assertFalse(ApiKeyPool.is_key_error(api_error(openai.InternalServerError, 500)))
+        self.assertTrue(ApiKeyPool.is_key_error(api_error(openai.RateLimitError, 429)))
+
+    def test_shared_rpm_limit_is_exhausted_per_worker(self):
+        pool = ApiKeyPool(parse_keys("sk-only-key:1:10"))
+        pool.share_limits(4)
+        self.assertEqual(pool.keys[0].rpm_limit, 2)
+        for _ in range(2):
+            pool.release(pool.acquire())
+        with self.assertRaises(NoAvailableKeyError):
+            pool.acquire()
+
+        # 가장 오래된 요청이 1분 지나면 다시 사용 가능
+        self.clock.now += 60
+        pool.acquire()
+
+    def test_shared_rpm_limit_minimum(self):
+        pool = ApiKeyPool(parse_keys("sk-small-key:1:3,sk-free-key"))
+        pool.share_limits(8)
+        self.assertEqual([pooled.rpm_limit for pooled in pool.keys], [1, 0])
+        pool.share_limits(1)
+        self.assertEqual(pool.keys[0].rpm_limit, 3)
+
+    async def test_acquire_wait_until_key_frees(self):
+        pool = ApiKeyPool(parse_keys("sk-only-key:1:1"))
+        pool.release(pool.acquire())
+        self.clock.now += 55
+        with mock.patch("app.services.api_key_pool.asyncio.sleep", self.clock.sleep):
+            pooled = await pool.acquire_wait(max_wait=10)
+        self.assertEqual(pooled.key, "sk-only-key")
+        self.assertGreaterEqual(self.clock.now, 1060)
+
+    async def test_acquire_wait_fails_fast_beyond_max_wait(self):
+        pool = ApiKeyPool(parse_keys("sk-only-key"))
+        pool.release(pool.acquire(), api_error(openai.AuthenticationError, 401))
+        sleep = mock.AsyncMock()
+        with mock.patch("app.services.api_key_pool.asyncio.sleep", sleep):
+            with self.assertRaises(NoAvailableKeyError):
+                await pool.acquire_wait(max_wait=10)
+        sleep.assert_not_awaited()
+
+if __name__ == "__main__":
+    unittest.main()
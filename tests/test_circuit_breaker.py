@@ -0,0 +1,100 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from app.config import settings
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.openai_service import OpenAIService
+
+# 회로 차단기 상태 전이 (closed -> open -> half_open -> closed)와 취소된 시험 호출 해제 테스트 (가짜 시계 사용)
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=3, open_seconds=30)
+
+    def open_breaker(self, now: float = 100.0):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow(now))
+            self.breaker.record_failure(now)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure(100.0)
+        self.breaker.record_failure(100.0)
+        self.breaker.record_success()
+        self.breaker.record_failure(100.0)
+        self.assertEqual(self.breaker.state, "closed")
+
+        self.breaker.record_failure(100.0)
+        self.breaker.record_failure(100.0)
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self.breaker.times_opened, 1)
+        self.assertFalse(self.breaker.allow(129.0))
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_half_open_allows_single_trial(self):
+        self.open_breaker()
+        self.assertTrue(self.breaker.allow(130.0))
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertFalse(self.breaker.allow(130.5))
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allow(131.0))
+        self.assertTrue(self.breaker.allow(131.0))
+
+    def test_failed_trial_reopens(self):
+        self.open_breaker()
+        self.assertTrue(self.breaker.allow(130.0))
+        self.breaker.record_failure(130.0)
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self.breaker.times_opened, 2)
+        self.assertFalse(self.breaker.allow(159.0))
+        self.assertTrue(self.breaker.allow(160.0))
+
+    def test_released_trial_can_be_retried(self):
+        self.open_breaker()
+        self.assertTrue(self.breaker.allow(130.0))
+        self.breaker.release_trial()
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertTrue(self.breaker.allow(130.1))
+        self.assertFalse(self.breaker.allow(130.2))
+
+class CompleteCancellationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_cancelled_trial_is_released(self):
+        service = OpenAIService()
+        breaker = service._breaker("gpt-test")
+        # 열린 지 open_seconds가 지난 회로 (다음 호출이 시험 호출)
+        breaker.state, breaker.opened_at = "open", time.monotonic() - breaker.open_seconds
+        started = asyncio.Event()
+
+        async def slow_attempt(*args, **kwargs):
+            started.set()
+            await asyncio.sleep(3600)
+
+        with mock.patch.object(settings, "OPENAI_FALLBACK_MODEL", ""), \
+                mock.patch.object(service, "_hedged", side_effect=slow_attempt):
+            task = asyncio.create_task(service.complete(None, "gpt-test", [], 10))
+            await started.wait()
+            self.assertTrue(breaker.trial_in_flight)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertEqual(breaker.state, "half_open")
+        self.assertFalse(breaker.trial_in_flight)
+        self.assertTrue(breaker.allow())
+
+    async def test_open_breaker_fails_fast(self):
+        service = OpenAIService()
+        breaker = service._breaker("gpt-test")
+        breaker.state, breaker.opened_at = "open", time.monotonic()
+        attempt = mock.AsyncMock()
+        with mock.patch.object(settings, "OPENAI_FALLBACK_MODEL", ""), \
+                mock.patch.object(service, "_hedged", attempt):
+            with self.assertRaises(CircuitOpenError):
+                await service.complete(None, "gpt-test", [], 10)
+        attempt.assert_not_awaited()
+
+if __name__ == "__main__":
+    unittest.main()
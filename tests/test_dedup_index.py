@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+
+from app.services.dedup_index import RecentMessageIndex
+
+# 최근 메시지 인덱스의 중복 판정, 세대 교체(시간/크기)와 제거 테스트
+
+class RecentMessageIndexTest(unittest.TestCase):
+    def setUp(self):
+        with mock.patch("app.services.dedup_index.time.monotonic", return_value=1000.0):
+            self.index = RecentMessageIndex(window_seconds=60, max_entries=3)
+
+    def test_duplicate_is_suppressed(self):
+        self.assertFalse(self.index.check_and_add((1, 10), now=1001))
+        self.assertTrue(self.index.check_and_add((1, 10), now=1002))
+        self.assertFalse(self.index.check_and_add((1, 11), now=1002))
+        self.assertEqual(self.index.stats(), {"entries": 2, "checked": 3, "duplicates_suppressed": 1})
+
+    def test_keys_survive_one_rotation_then_expire(self):
+        self.index.check_and_add("a", now=1001)
+        # 첫 교체 후에는 이전 세대에 남아 있음
+        self.assertTrue(self.index.check_and_add("a", now=1061))
+        self.assertIn("a", self.index)
+        self.index.check_and_add("b", now=1062)
+        # 중복은 다시 기록하지 않으므로 두 번째 교체 후에는 제거됨
+        self.assertFalse(self.index.check_and_add("a", now=1122))
+        self.assertIn("b", self.index)
+        self.index.check_and_add("c", now=1183)
+        self.assertNotIn("b", self.index)
+
+    def test_rotation_by_capacity(self):
+        for key, now in (("a", 1001), ("b", 1002), ("c", 1003)):
+            self.index.check_and_add(key, now=now)
+        self.assertEqual(len(self.index.current), 3)
+
+        # 현재 세대가 가득 차면 시간과 무관하게 교체
+        self.assertFalse(self.index.check_and_add("d", now=1004))
+        self.assertEqual(self.index.current, {"d"})
+        self.assertEqual(self.index.previous, {"a", "b", "c"})
+        self.assertTrue(self.index.check_and_add("a", now=1005))
+
+        for key in ("e", "f"):
+            self.index.check_and_add(key, now=1006)
+        self.index.check_and_add("g", now=1007)
+        self.assertNotIn("a", self.index)
+        self.assertEqual(self.index.previous, {"d", "e", "f"})
+
+    def test_size_is_bounded(self):
+        for number in range(100):
+            self.index.check_and_add(number, now=1001)
+            self.assertLessEqual(self.index.stats()["entries"], 2 * self.index.max_entries)
+
+    def test_add_without_check(self):
+        with mock.patch("app.services.dedup_index.time.monotonic", return_value=1001.0):
+            self.index.add("sent")
+        self.assertIn("sent", self.index)
+        self.assertTrue(self.index.check_and_add("sent", now=1002))
+        self.assertEqual(self.index.checked, 1)
+
+if __name__ == "__main__":
+    unittest.main()
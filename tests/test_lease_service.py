@@ -0,0 +1,104 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.account_lease import AccountLease
+from app.services.lease_service import LeaseService
+
+# 계정 임대 획득/갱신/인수/만료 테스트 (SQLite 메모리 DB 사용)
+
+class LeaseServiceTest(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine, expire_on_commit=False)()
+        self.node_a = LeaseService(node_id="node-a", capacity=2, ttl_seconds=60)
+        self.node_b = LeaseService(node_id="node-b", capacity=0, ttl_seconds=60)
+
+    def tearDown(self):
+        self.db.close()
+
+    def expire(self, account_id: int):
+        """임대를 만료된 상태로 변경 (갱신이 멈춘 노드)"""
+        self.db.query(AccountLease).filter(AccountLease.account_id == account_id).update(
+            {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+        )
+        self.db.commit()
+
+    def test_acquire_up_to_capacity(self):
+        held = self.node_a.acquire(self.db, [1, 2, 3])
+        self.assertEqual(held, {1, 2})
+        self.assertTrue(self.node_a.is_held(1))
+        self.assertFalse(self.node_a.is_held(3))
+
+        # 다른 노드는 보유 중인 임대를 가져가지 못하고 남은 계정만 획득
+        self.assertEqual(self.node_b.acquire(self.db, [1, 2, 3]), {3})
+
+    def test_renew_extends_expiry(self):
+        self.node_a.acquire(self.db, [1])
+        self.expire(1)
+        self.assertEqual(self.node_a.renew(self.db), {1})
+        lease = self.db.query(AccountLease).filter(AccountLease.account_id == 1).one()
+        self.assertGreater(lease.expires_at, datetime.utcnow())
+        self.assertTrue(self.node_a.is_held(1))
+
+    def test_takeover_of_expired_lease(self):
+        self.node_a.acquire(self.db, [1])
+        self.assertEqual(self.node_b.acquire(self.db, [1]), set())
+
+        self.expire(1)
+        self.assertEqual(self.node_b.acquire(self.db, [1]), {1})
+        lease = self.db.query(AccountLease).filter(AccountLease.account_id == 1).one()
+        self.assertEqual(lease.node_id, "node-b")
+
+        # 이전 노드는 갱신 시 인수된 계정을 더 이상 보유하지 않음
+        self.assertEqual(self.node_a.renew(self.db), set())
+        self.assertFalse(self.node_a.is_held(1))
+
+    def test_local_expiry_without_renewal(self):
+        self.node_a.acquire(self.db, [1])
+        now = self.node_a.deadlines[1] - 60
+        with mock.patch("app.services.lease_service.time.monotonic", return_value=now + 30):
+            self.assertTrue(self.node_a.is_held(1))
+            self.assertAlmostEqual(self.node_a.seconds_until_expiry(), 30, delta=1)
+        with mock.patch("app.services.lease_service.time.monotonic", return_value=now + 61):
+            self.assertFalse(self.node_a.is_held(1))
+
+    def test_release(self):
+        self.node_a.acquire(self.db, [1, 2])
+        self.node_a.release(self.db, [1])
+        self.assertFalse(self.node_a.is_held(1))
+        self.assertEqual(self.node_b.acquire(self.db, [1]), {1})
+        self.node_a.release(self.db)
+        self.assertEqual(self.node_a.deadlines, {})
+
+class ExpiredLeaseClientTest(unittest.IsolatedAsyncioTestCase):
+    async def test_sync_failure_stops_client_after_expiry(self):
+        from app.services.agent_service import TelegramAgentService
+
+        service = TelegramAgentService()
+        service.lease_service = LeaseService(node_id="node-a", ttl_seconds=60)
+        client = mock.AsyncMock()
+        service.active_clients[1] = client
+        service.lease_service.deadlines[1] = 100.0
+
+        failing_session = mock.MagicMock(side_effect=RuntimeError("database unavailable"))
+        with mock.patch("app.services.agent_service.runtime_session", failing_session):
+            # 임대가 아직 유효하면 DB 오류가 있어도 계속 실행
+            with mock.patch("app.services.lease_service.time.monotonic", return_value=50.0):
+                await service.sync_accounts()
+            self.assertIn(1, service.active_clients)
+
+            # 갱신하지 못한 채 만료되면 중지
+            with mock.patch("app.services.lease_service.time.monotonic", return_value=101.0):
+                await service.sync_accounts()
+        self.assertNotIn(1, service.active_clients)
+        client.disconnect.assert_awaited_once()
+        self.assertEqual(service.lease_service.deadlines, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app.config import settings
+from app.services.log_archive_service import LogArchiveService
+
+# 컬럼형 아카이브 쓰기 후 기간/필터 조회, 집계(group_by), 최신 행 반환과 재실행 시 part 건너뛰기 테스트
+
+START = datetime(2026, 1, 1, 22)
+
+def log_row(log_id: int, hours: float, role_id: int = 1, chat_id: int = -100, latency=None, replied: bool = True):
+    return {
+        "id": log_id,
+        "agent_role_id": role_id,
+        "chat_id": chat_id,
+        "user_id": 7,
+        "created_at": START + timedelta(hours=hours),
+        "response_time_ms": latency,
+        "queue_wait_ms": None,
+        "llm_ms": None,
+        "delay_ms": None,
+        "send_ms": None,
+        "prompt_tokens": 10,
+        "completion_tokens": None if latency is None else 5,
+        "message_text": f"메시지 {log_id}",
+        "response_text": f"응답 {log_id}" if replied else None,
+        "role_used": "Chatter",
+        "model": "gpt-4o"
+    }
+
+class LogArchiveServiceTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(settings, "MESSAGE_LOG_ARCHIVE_DIR", directory.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.service = LogArchiveService()
+
+        # 1월 1일 22시부터 1월 2일 1시까지, 역할 1/2와 채팅방 -100/-200
+        self.rows = [
+            log_row(1, 0, latency=100),
+            log_row(2, 0.5, role_id=2, latency=300),
+            log_row(3, 1, chat_id=-200, latency=None, replied=False),
+            log_row(4, 2, latency=200),
+            log_row(5, 2.5, chat_id=-200, latency=400),
+            log_row(6, 3, role_id=2, latency=500)
+        ]
+        self.assertEqual(self.service.write([self.rows[:3], self.rows[3:]]), 6)
+
+    def test_layout_by_day_and_role(self):
+        parts = self.service._parts(None, None, None)
+        self.assertEqual(
+            [os.path.relpath(part["path"], self.service.root) for part in parts],
+            [os.path.join("date=2026-01-01", "role=1", "part-1-3"), os.path.join("date=2026-01-01", "role=2", "part-2-2"),
+             os.path.join("date=2026-01-02", "role=1", "part-4-5"), os.path.join("date=2026-01-02", "role=2", "part-6-6")]
+        )
+        # 같은 로그를 다시 쓰면 기존 part를 건너뜀
+        self.assertFalse(self.service._write_part(START.date(), 1, [self.rows[0], self.rows[2]]))
+
+    def test_summary_over_range(self):
+        result = self.service.query()
+        self.assertEqual(result["summary"]["message_count"], 6)
+        self.assertEqual(result["summary"]["reply_count"], 5)
+        self.assertEqual(result["summary"]["total_tokens"], 6 * 10 + 5 * 5)
+        self.assertEqual(result["summary"]["avg_response_time_ms"], 300.0)
+
+        result = self.service.query(since=START + timedelta(hours=1), until=START + timedelta(hours=2, minutes=30))
+        self.assertEqual(result["summary"]["message_count"], 2)
+        self.assertEqual(result["summary"]["reply_count"], 1)
+        # 날짜 디렉터리로 먼저 걸러낸 뒤 행 단위로 비교
+        self.assertEqual(result["scanned_parts"], 4)
+
+        result = self.service.query(since=START + timedelta(hours=2))
+        self.assertEqual(result["scanned_parts"], 2)
+        self.assertEqual(result["summary"]["message_count"], 3)
+
+    def test_filters_and_group_by(self):
+        result = self.service.query(role_id=1, group_by="chat")
+        self.assertEqual(result["scanned_parts"], 2)
+        groups = {group["chat"]: group for group in result["groups"]}
+        # 백분위는 실제 값 중 더 큰 쪽 (method="higher")
+        self.assertEqual((groups[-100]["message_count"], groups[-100]["p50_ms"]), (2, 200))
+        self.assertEqual((groups[-200]["message_count"], groups[-200]["reply_count"]), (2, 1))
+
+        result = self.service.query(group_by="day")
+        self.assertEqual(
+            [(group["day"], group["message_count"], group["p99_ms"]) for group in result["groups"]],
+            [("2026-01-01", 3, 300), ("2026-01-02", 3, 500)]
+        )
+        self.assertEqual(self.service.query(chat_id=-300, group_by="role")["groups"], [])
+
+    def test_latest_rows_round_trip(self):
+        rows = self.service.query(chat_id=-200, limit=5)["rows"]
+        self.assertEqual([row["id"] for row in rows], [5, 3])
+        latest, missing = rows
+        self.assertEqual(latest["created_at"], (START + timedelta(hours=2.5)).isoformat())
+        self.assertEqual((latest["response_time_ms"], latest["agent_role_id"]), (400, 1))
+        self.assertEqual((latest["message_text"], latest["response_text"]), ("메시지 5", "응답 5"))
+        # NULL 컬럼은 None으로 복원
+        self.assertIsNone(missing["response_time_ms"])
+        self.assertIsNone(missing["response_text"])
+        self.assertIsNone(missing["queue_wait_ms"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.message_log import MessageLog
+from app.pagination import build_page, decode_cursor
+from app.services.log_search_service import LogSearchService, search_terms
+
+# SQLite FTS5 전문 검색 (기존 로그 색인, 트리거 동기화, 접두사 일치, 필터)과 (score, id) 커서 페이지 테스트
+
+class LogSearchServiceTest(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+        self.service = LogSearchService()
+        self.service.dialect = "sqlite"
+
+        self.created = datetime(2026, 1, 1)
+        self.add_logs([
+            ("배포 일정이 언제인가요?", "내일 배포합니다"),
+            ("배포 배포 배포", None),
+            ("점심 메뉴 추천", "김치찌개"),
+            ("deploy 실패 로그 확인", "배포 스크립트를 확인하세요")
+        ])
+
+    def add_logs(self, texts, chat_id: int = -100):
+        for index, (message, response) in enumerate(texts):
+            self.db.add(MessageLog(
+                agent_role_id=1, chat_id=chat_id, user_id=7, message_text=message, response_text=response,
+                created_at=self.created + timedelta(minutes=index)
+            ))
+        self.db.commit()
+
+    def ids(self, query: str, **filters):
+        return {row["id"] for row in self.service.search(self.db, query, 50, **filters)}
+
+    def test_search_terms(self):
+        self.assertEqual(search_terms("배포, 일정!! deploy_fail"), ["배포", "일정", "deploy", "fail"])
+        with self.assertRaises(ValueError):
+            self.service.search(self.db, "?!", 10)
+
+    def test_existing_logs_are_indexed(self):
+        self.assertEqual(self.ids("배포"), {1, 2, 4})
+        # 모든 단어가 포함된 로그만 (접두사 일치로 조사 포함 단어도 검색)
+        self.assertEqual(self.ids("배포 일정"), {1})
+        self.assertEqual(self.ids("스크립트"), {4})
+        self.assertEqual(self.ids("DEPLOY"), {4})
+
+    def test_triggers_keep_index_in_sync(self):
+        self.service.ensure_index(self.db)
+        self.add_logs([("새 배포 공지", None)], chat_id=-200)
+        self.assertEqual(self.ids("공지"), {5})
+
+        log = self.db.get(MessageLog, 3)
+        log.response_text = "배포 후에 먹어요"
+        self.db.commit()
+        self.assertEqual(self.ids("김치찌개"), set())
+        self.assertIn(3, self.ids("배포"))
+
+        self.db.delete(self.db.get(MessageLog, 5))
+        self.db.commit()
+        self.assertEqual(self.ids("공지"), set())
+
+    def test_filters(self):
+        self.add_logs([("다른 방 배포", None)], chat_id=-200)
+        self.assertEqual(self.ids("배포", chat_id=-200), {5})
+        self.assertEqual(self.ids("배포", role_id=2), set())
+        self.assertEqual(
+            self.ids("배포", since=self.created + timedelta(minutes=1), until=self.created + timedelta(minutes=3)), {2}
+        )
+
+    def test_cursor_pages_by_score_then_id(self):
+        self.add_logs([(f"배포 알림 {number}", None) for number in range(5)])
+        expected = [row["id"] for row in self.service.search(self.db, "배포", 50)]
+        self.assertEqual(len(expected), 8)
+        scores = [row["score"] for row in self.service.search(self.db, "배포", 50)]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        seen, cursor = [], None
+        while True:
+            rows = self.service.search(self.db, "배포", 3, after=decode_cursor(cursor, "score"))
+            page, cursor = build_page(rows, 3, "score")
+            seen.extend(row["id"] for row in page)
+            if cursor is None:
+                break
+        # 같은 점수의 로그도 빠지거나 중복되지 않음
+        self.assertEqual(seen, expected)
+
+if __name__ == "__main__":
+    unittest.main()
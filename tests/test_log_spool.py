@@ -0,0 +1,248 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.models.base import Base
+from app.models.message_log import MessageLog
+from app.models.message_rollup import MessageLogRollup
+from app.services.log_spool import MessageLogSpool, encode_record, read_records
+
+# 메시지 로그 스풀 레코드 형식, 잘린 레코드 제거, 체크포인트 재개, log_key 중복 방지, dead-letter 테스트
+
+def make_record(index: int, **fields) -> dict:
+    return {
+        "role_id": 1,
+        "chat_id": -100,
+        "user_id": 7,
+        "message": f"message {index}",
+        "response": f"reply {index}",
+        "response_time": 100 + index,
+        "role_used": "Chatter",
+        "created_at": datetime(2026, 1, 1, 12, index % 60).isoformat(),
+        "stages": {"llm_ms": 80, "model": "gpt-3.5-turbo"},
+        **fields
+    }
+
+class RecordFramingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "records")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        with open(self.path, "wb") as handle:
+            handle.write(encode_record({"n": 1}) + encode_record({"n": 2, "text": "안녕"}))
+        with open(self.path, "rb") as handle:
+            records, consumed, torn = read_records(handle)
+        self.assertEqual(records, [{"n": 1}, {"n": 2, "text": "안녕"}])
+        self.assertEqual(consumed, os.path.getsize(self.path))
+        self.assertFalse(torn)
+
+    def test_stops_at_checksum_mismatch(self):
+        first, second = encode_record({"n": 1}), bytearray(encode_record({"n": 2}))
+        second[-2] ^= 0xFF
+        with open(self.path, "wb") as handle:
+            handle.write(first + bytes(second) + encode_record({"n": 3}))
+        with open(self.path, "rb") as handle:
+            records, consumed, torn = read_records(handle)
+        self.assertEqual(records, [{"n": 1}])
+        self.assertEqual(consumed, len(first))
+        self.assertTrue(torn)
+
+    def test_limit(self):
+        with open(self.path, "wb") as handle:
+            handle.write(b"".join(encode_record({"n": n}) for n in range(5)))
+        with open(self.path, "rb") as handle:
+            records, _, torn = read_records(handle, 2)
+        self.assertEqual([record["n"] for record in records], [0, 1])
+        self.assertFalse(torn)
+
+class MessageLogSpoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "message_logs.spool")
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(engine)
+        self.session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+
+        @contextmanager
+        def runtime_session():
+            db = self.session_factory()
+            try:
+                yield db
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+        patches = [
+            mock.patch("app.services.log_spool.runtime_session", runtime_session),
+            mock.patch.object(settings, "MESSAGE_LOG_SPOOL_BATCH_SIZE", 500),
+            mock.patch.object(settings, "MESSAGE_LOG_SPOOL_MAX_BYTES", 1024 * 1024)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.spools = []
+
+    def tearDown(self):
+        for spool in self.spools:
+            if spool.file is not None:
+                spool.file.close()
+        shutil.rmtree(self.directory)
+
+    def new_spool(self) -> MessageLogSpool:
+        spool = MessageLogSpool(self.path)
+        self.spools.append(spool)
+        spool.open()
+        return spool
+
+    def stored_count(self) -> int:
+        db = self.session_factory()
+        try:
+            return db.query(MessageLog).count()
+        finally:
+            db.close()
+
+    def rollup_count(self) -> int:
+        db = self.session_factory()
+        try:
+            return sum(row.message_count for row in db.query(MessageLogRollup).all())
+        finally:
+            db.close()
+
+    def test_drain_stores_logs_and_rollup(self):
+        spool = self.new_spool()
+        for index in range(3):
+            self.assertTrue(spool.append(make_record(index)))
+        self.assertEqual(spool.pending_records, 3)
+
+        drained, next_created_at = spool.drain_once()
+        self.assertEqual(drained, 3)
+        self.assertIsNone(next_created_at)
+        self.assertEqual(spool.checkpoint, spool.size)
+        self.assertEqual(self.stored_count(), 3)
+        self.assertEqual(self.rollup_count(), 3)
+
+        db = self.session_factory()
+        log = db.query(MessageLog).filter(MessageLog.message_text == "message 0").one()
+        db.close()
+        self.assertEqual((log.llm_ms, log.model), (80, "gpt-3.5-turbo"))
+        self.assertEqual(spool.drain_once(), (0, None))
+
+    def test_torn_tail_truncated_on_open(self):
+        spool = self.new_spool()
+        spool.append(make_record(0))
+        spool.append(make_record(1))
+        spool.sync()
+        complete_size = spool.size
+        spool.file.write(encode_record(make_record(2))[:-5])
+        spool.file.close()
+        spool.file = None
+
+        reopened = self.new_spool()
+        self.assertEqual(os.path.getsize(self.path), complete_size)
+        self.assertEqual(reopened.size, complete_size)
+        self.assertEqual(reopened.pending_records, 2)
+        self.assertEqual(reopened.drain_once()[0], 2)
+
+    def test_resume_from_checkpoint(self):
+        spool = self.new_spool()
+        for index in range(5):
+            spool.append(make_record(index))
+        with mock.patch.object(settings, "MESSAGE_LOG_SPOOL_BATCH_SIZE", 2):
+            self.assertEqual(spool.drain_once()[0], 2)
+        checkpoint = spool.checkpoint
+        spool.file.close()
+        spool.file = None
+
+        reopened = self.new_spool()
+        self.assertEqual(reopened.checkpoint, checkpoint)
+        self.assertEqual(reopened.pending_records, 3)
+        self.assertEqual(reopened.drain_once()[0], 3)
+        self.assertEqual(self.stored_count(), 5)
+
+    def test_skip_records_stored_before_checkpoint(self):
+        spool = self.new_spool()
+        for index in range(4):
+            spool.append(make_record(index))
+        spool.drain_once()
+        spool.file.close()
+        spool.file = None
+
+        # 저장 후 체크포인트를 기록하기 전에 중단된 경우
+        os.remove(spool.checkpoint_path)
+        reopened = self.new_spool()
+        self.assertEqual(reopened.pending_records, 4)
+        self.assertEqual(reopened.drain_once()[0], 4)
+        self.assertEqual(self.stored_count(), 4)
+        self.assertEqual(self.rollup_count(), 4)
+
+    def test_dead_letter_isolates_bad_record(self):
+        spool = self.new_spool()
+        for index in range(7):
+            spool.append(make_record(index, bad=index == 4))
+        store = spool._store
+        calls = []
+
+        def failing_store(records):
+            calls.append(len(records))
+            if any(record.get("bad") for record in records):
+                raise DataError("INSERT", {}, Exception("invalid input value"))
+            store(records)
+
+        with mock.patch.object(spool, "_store", side_effect=failing_store):
+            self.assertEqual(spool.drain_once()[0], 7)
+        self.assertEqual(self.stored_count(), 6)
+        self.assertEqual(spool.dead_lettered, 1)
+        self.assertEqual(spool.checkpoint, spool.size)
+        self.assertLess(len(calls), 7 * 2)
+        with open(spool.dead_letter_path, encoding="utf-8") as dead_file:
+            lines = dead_file.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"message 4"', lines[0])
+        self.assertIn("DataError", lines[0])
+
+    def test_other_errors_are_retried(self):
+        spool = self.new_spool()
+        for index in range(3):
+            spool.append(make_record(index))
+        errors = [
+            IntegrityError("INSERT", {}, Exception("FOREIGN KEY constraint failed")),
+            KeyError("role_id"),
+            RuntimeError("database unavailable")
+        ]
+        for error in errors:
+            with mock.patch.object(spool, "_store", side_effect=error):
+                with self.assertRaises(type(error)):
+                    spool.drain_once()
+            self.assertEqual(spool.checkpoint, 0)
+        self.assertEqual(spool.dead_lettered, 0)
+        self.assertFalse(os.path.exists(spool.dead_letter_path))
+        self.assertEqual(spool.drain_once()[0], 3)
+
+    def test_drop_when_spool_is_full(self):
+        spool = self.new_spool()
+        with mock.patch.object(settings, "MESSAGE_LOG_SPOOL_MAX_BYTES", len(encode_record(make_record(0))) + 60):
+            self.assertTrue(spool.append(make_record(0)))
+            self.assertFalse(spool.append(make_record(1)))
+        self.assertEqual(spool.dropped, 1)
+        self.assertEqual(spool.pending_records, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Query, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.models.message_log import MessageLog
+from app.models.message_rollup import MessageLogRollup
+from app.services.message_rollup_service import (
+    HISTOGRAM_BOUNDS_MS, HISTOGRAM_SIZE, MessageRollupService, histogram_index, histogram_percentiles
+)
+
+# 응답 시간 히스토그램/백분위, 시간대별 집계 누적과 동시 생성 충돌 테스트
+
+class HistogramTest(unittest.TestCase):
+    def test_index_uses_upper_bounds(self):
+        self.assertEqual(histogram_index(0), 0)
+        self.assertEqual(histogram_index(10), 0)
+        self.assertEqual(histogram_index(11), 1)
+        self.assertEqual(histogram_index(HISTOGRAM_BOUNDS_MS[5]), 5)
+        self.assertEqual(histogram_index(HISTOGRAM_BOUNDS_MS[5] + 1), 6)
+        self.assertEqual(histogram_index(10 ** 9), HISTOGRAM_SIZE - 1)
+
+    def test_percentiles(self):
+        histogram = np.zeros(HISTOGRAM_SIZE, dtype=np.int64)
+        for latency in [100] * 90 + [1000] * 9 + [5000]:
+            histogram[histogram_index(latency)] += 1
+        percentiles = histogram_percentiles(histogram)
+        self.assertEqual(percentiles["p50_ms"], HISTOGRAM_BOUNDS_MS[histogram_index(100)])
+        self.assertEqual(percentiles["p95_ms"], HISTOGRAM_BOUNDS_MS[histogram_index(1000)])
+        self.assertEqual(percentiles["p99_ms"], HISTOGRAM_BOUNDS_MS[histogram_index(1000)])
+        # 상한값은 실제 값 이상이며 상대 오차 25% 이내
+        self.assertGreaterEqual(percentiles["p50_ms"], 100)
+        self.assertLessEqual(percentiles["p50_ms"], 125)
+
+    def test_percentiles_overflow_bucket(self):
+        histogram = np.zeros(HISTOGRAM_SIZE, dtype=np.int64)
+        histogram[-1] = 3
+        self.assertEqual(histogram_percentiles(histogram)["p99_ms"], HISTOGRAM_BOUNDS_MS[-1])
+
+    def test_percentiles_without_samples(self):
+        self.assertEqual(
+            histogram_percentiles(np.zeros(HISTOGRAM_SIZE, dtype=np.int64)),
+            {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+        )
+
+class MessageRollupServiceTest(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(engine)
+        self.sessions = sessionmaker(bind=engine, expire_on_commit=False)
+        self.db = self.sessions()
+        self.service = MessageRollupService()
+        self.hour = datetime(2026, 1, 1, 12)
+
+    def tearDown(self):
+        self.db.close()
+
+    def rollups(self):
+        return self.db.query(MessageLogRollup).order_by(
+            MessageLogRollup.bucket_start, MessageLogRollup.chat_id.desc()
+        ).all()
+
+    def test_record_batch_groups_by_hour_role_and_chat(self):
+        self.service.record_batch(self.db, [
+            (1, -100, self.hour + timedelta(minutes=1), 100, True),
+            (1, -100, self.hour + timedelta(minutes=59), 200, True),
+            (1, -100, self.hour + timedelta(minutes=30), None, False),
+            (1, -200, self.hour, 50, True),
+            (1, -100, self.hour + timedelta(hours=1), 300, True)
+        ])
+        self.db.commit()
+
+        first, other_chat, next_hour = self.rollups()
+        self.assertEqual((first.bucket_start, first.chat_id), (self.hour, -100))
+        self.assertEqual((first.message_count, first.reply_count, first.latency_sum_ms), (3, 2, 300))
+        self.assertEqual(sum(first.latency_histogram), 2)
+        self.assertEqual(first.latency_histogram[histogram_index(200)], 1)
+        self.assertEqual((other_chat.chat_id, other_chat.message_count), (-200, 1))
+        self.assertEqual((next_hour.bucket_start, next_hour.message_count), (self.hour + timedelta(hours=1), 1))
+
+    def test_record_batch_accumulates_into_existing_row(self):
+        self.service.record(self.db, 1, -100, self.hour, 100, True)
+        self.db.commit()
+        self.service.record_batch(self.db, [(1, -100, self.hour, 200, True), (1, -100, self.hour, None, False)])
+        self.db.commit()
+
+        (row,) = self.rollups()
+        self.assertEqual((row.message_count, row.reply_count, row.latency_sum_ms), (3, 2, 300))
+
+    def test_concurrent_row_creation_keeps_batch(self):
+        # 다른 워커가 같은 시간대 행을 먼저 생성해 커밋
+        other = self.sessions()
+        self.service.record(other, 1, -100, self.hour, 100, True)
+        other.commit()
+        other.close()
+
+        self.db.add(MessageLog(agent_role_id=1, chat_id=-100, user_id=7, message_text="hello", created_at=self.hour))
+        self.db.flush()
+        # 조회 시점에는 아직 행이 없었던 경우 (생성 시 고유 키 충돌)
+        with mock.patch.object(Query, "first", return_value=None):
+            self.service.record(self.db, 1, -100, self.hour, 300, True)
+        self.db.commit()
+
+        (row,) = self.rollups()
+        self.assertEqual((row.message_count, row.reply_count, row.latency_sum_ms), (2, 2, 400))
+        self.assertEqual(self.db.query(MessageLog).count(), 1)
+
+    def test_rebuild_and_analyze(self):
+        for minute, latency in ((0, 100), (10, 200), (70, 400)):
+            self.db.add(MessageLog(
+                agent_role_id=1, chat_id=-100, user_id=7, message_text="m", response_text="r",
+                response_time_ms=latency, created_at=self.hour + timedelta(minutes=minute)
+            ))
+        self.db.add(MessageLog(agent_role_id=2, chat_id=-100, user_id=7, message_text="m", created_at=self.hour))
+        self.db.commit()
+
+        processed = self.service.rebuild(self.db, self.hour, self.hour + timedelta(hours=2))
+        self.assertEqual(processed, 4)
+
+        result = self.service.analyze(self.db, self.hour, self.hour + timedelta(hours=2), group_by="role")
+        self.assertEqual(result["summary"]["message_count"], 4)
+        self.assertEqual(result["summary"]["reply_count"], 3)
+        self.assertEqual(result["summary"]["messages_per_hour"], 2.0)
+        self.assertEqual(result["summary"]["avg_response_time_ms"], round(700 / 3, 1))
+        self.assertEqual([group["role"] for group in result["groups"]], [1, 2])
+        self.assertEqual(result["groups"][1]["reply_count"], 0)
+
+        hourly = self.service.analyze(self.db, self.hour, self.hour + timedelta(hours=2), role_id=1, group_by="hour")
+        self.assertEqual([group["message_count"] for group in hourly["groups"]], [2, 1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import base64
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, DateTime, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.pagination import (
+    MAX_PAGE_SIZE, apply_keyset, build_page, clamp_limit, decode_cursor, encode_cursor, escape_like
+)
+
+# 커서 인코딩/해석과 변조 거부, LIKE 이스케이프, keyset 페이지 순회 테스트
+
+Base = declarative_base()
+
+class Row(Base):
+    __tablename__ = "rows"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(20))
+    created_at = Column(DateTime)
+
+class CursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        created = datetime(2026, 1, 1, 12, 30)
+        cursor = encode_cursor({"id": 42, "created_at": created}, "created_at")
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor, "created_at"), {"id": 42, "created_at": created.isoformat()})
+        self.assertEqual(decode_cursor(encode_cursor({"id": 7, "created_at": created}), "id"), {"id": 7})
+        self.assertEqual(decode_cursor(encode_cursor({"id": 7, "score": 1.5}, "score"), "score"), {"id": 7, "score": 1.5})
+        self.assertIsNone(decode_cursor(None))
+        self.assertIsNone(decode_cursor(""))
+
+    def test_rejects_tampered_cursor(self):
+        cursor = encode_cursor({"id": 42, "created_at": datetime(2026, 1, 1)}, "created_at")
+        tampered = [
+            cursor[:-3],
+            "%%%%",
+            cursor[:10] + "x" + cursor[11:],
+            base64.urlsafe_b64encode(b"[1, 2]").decode(),
+            base64.urlsafe_b64encode(b'{"created_at": "2026-01-01"}').decode()
+        ]
+        for value in tampered:
+            with self.subTest(cursor=value), self.assertRaises(ValueError):
+                decode_cursor(value, "created_at")
+        # 다른 정렬 기준의 커서
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor({"id": 42}), "created_at")
+
+    def test_clamp_limit(self):
+        self.assertEqual(clamp_limit(None), 50)
+        self.assertEqual(clamp_limit(-1), 50)
+        self.assertEqual(clamp_limit(10), 10)
+        self.assertEqual(clamp_limit(10 ** 6), MAX_PAGE_SIZE)
+
+    def test_escape_like(self):
+        self.assertEqual(escape_like("50%_off"), "50\\%\\_off")
+        self.assertEqual(escape_like("a\\b"), "a\\\\b")
+        self.assertEqual(escape_like("plain"), "plain")
+
+class KeysetTest(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+        # 같은 created_at이 여러 행에 걸치도록 저장
+        created = datetime(2026, 1, 1)
+        for index in range(7):
+            self.db.add(Row(name=["50%", "5_0", "500"][index % 3], created_at=created + timedelta(minutes=index // 2)))
+        self.db.commit()
+
+    def walk(self, order_by: str, descending: bool, limit: int = 3):
+        seen, cursor = [], None
+        while True:
+            query = apply_keyset(self.db.query(Row), Row, order_by, decode_cursor(cursor, order_by), limit, descending)
+            rows = [{"id": row.id, "created_at": row.created_at} for row in query.all()]
+            self.assertLessEqual(len(rows), limit + 1)
+            page, cursor = build_page(rows, limit, order_by)
+            seen.extend(row["id"] for row in page)
+            if cursor is None:
+                return seen
+
+    def test_pages_cover_all_rows_once(self):
+        self.assertEqual(self.walk("id", False), [1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(self.walk("id", True), [7, 6, 5, 4, 3, 2, 1])
+        self.assertEqual(self.walk("created_at", True, limit=2), [7, 6, 5, 4, 3, 2, 1])
+        self.assertEqual(self.walk("created_at", False, limit=4), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_without_limit(self):
+        query = apply_keyset(self.db.query(Row), Row, "created_at", None, None, descending=True)
+        self.assertEqual([row.id for row in query.all()], [7, 6, 5, 4, 3, 2, 1])
+
+    def test_escaped_prefix_matches_literally(self):
+        query = self.db.query(Row.name).filter(Row.name.like(escape_like("5_") + "%", escape="\\"))
+        self.assertEqual({name for (name,) in query.all()}, {"5_0"})
+        query = self.db.query(Row.name).filter(Row.name.like(escape_like("50%") + "%", escape="\\"))
+        self.assertEqual({name for (name,) in query.all()}, {"50%"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.query_plans import HOT_QUERIES, check_query_plans, extra_sorts, full_scans
+
+# 주요 조회 쿼리가 인덱스를 사용하는지 확인 (인덱스가 빠지거나 바뀌면 실패)
+
+# 쿼리 형태에 맞춘 인덱스 (다른 인덱스로 대신 처리되어도 실패)
+EXPECTED_INDEXES = {
+    "role_logs": "idx_message_logs_role_created",
+    "active_role_handlers": "idx_agent_roles_account_active",
+    "active_accounts": "idx_accounts_active",
+    "today_messages": "idx_message_logs_created",
+    "token_budget": "idx_llm_usage_role_bucket",
+    "role_analytics": "idx_message_log_rollups_role"
+}
+
+class QueryPlanTest(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_hot_queries_use_indexes(self):
+        results = check_query_plans(self.db)
+        self.assertEqual([result["query"] for result in results], [query.name for query in HOT_QUERIES])
+        for result in results:
+            with self.subTest(query=result["query"]):
+                self.assertTrue(result["uses_index"], "\n".join(result["plan"]))
+                expected = EXPECTED_INDEXES.get(result["query"])
+                if expected:
+                    self.assertIn(expected, " ".join(result["plan"]))
+
+    def test_detects_full_scan_and_sort(self):
+        self.assertEqual(full_scans(["SCAN message_logs"]), ["SCAN message_logs"])
+        self.assertEqual(full_scans(["SCAN message_logs USING INDEX idx_message_logs_created"]), [])
+        self.assertEqual(full_scans(["Seq Scan message_logs", "Index Scan idx_accounts_active"]), ["Seq Scan message_logs"])
+        self.assertEqual(extra_sorts(["USE TEMP B-TREE FOR ORDER BY"]), ["USE TEMP B-TREE FOR ORDER BY"])
+        self.assertEqual(extra_sorts(["Index Scan idx_message_logs_role_created"]), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from app.config import settings
+from app.services.relevance_gate import RelevanceGate, content_length, heuristic_classifier, is_question
+
+# 관련성 검사 규칙 (키워드/정규식, 언급/답장, 길이, 명령/미디어, 분류기, on_fail)과 통계 기록 테스트
+
+def role(**rules) -> dict:
+    return {"role_name": "Chatter", "relevance_rules": {"enabled": True, "min_length": 0, "classifier": False, **rules}}
+
+class TextHelpersTest(unittest.TestCase):
+    def test_content_length_ignores_emoji_and_punctuation(self):
+        self.assertEqual(content_length("ㅋㅋ!! 👍 ok..."), 4)
+        self.assertEqual(content_length(None), 0)
+
+    def test_is_question(self):
+        self.assertTrue(is_question("이거 어떻게 해?"))
+        self.assertTrue(is_question("How does it work"))
+        self.assertTrue(is_question("내일 오나요"))
+        self.assertFalse(is_question("좋은 아침입니다"))
+        self.assertFalse(is_question(""))
+
+    def test_heuristic_classifier(self):
+        self.assertLess(heuristic_classifier("ㅋㅋ"), 0.3)
+        self.assertGreaterEqual(heuristic_classifier("배포는 언제 하나요?"), 0.5)
+
+class RelevanceGateTest(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(settings, "AGENT_RELEVANCE_ENABLED", False), \
+                mock.patch.object(settings, "AGENT_RELEVANCE_CLASSIFIER", "heuristic"):
+            self.gate = RelevanceGate()
+
+    def test_disabled_passes_everything(self):
+        self.assertIsNone(self.gate.check(1, {"role_name": "Chatter"}, ""))
+        self.assertEqual(self.gate.account_stats(1), {"passed": 0, "skipped": {}})
+
+    def test_keywords_and_patterns(self):
+        rules = role(keywords=["Deploy"], patterns=[r"버전\s*\d+"])
+        self.assertIsNone(self.gate.check(1, rules, "when is the deploy?"))
+        self.assertIsNone(self.gate.check(1, rules, "버전 2 나왔나요"))
+        self.assertEqual(self.gate.check(1, rules, "점심 뭐 먹지"), "drop")
+        self.assertEqual(self.gate.account_stats(1), {"passed": 2, "skipped": {"no_keyword": 1}})
+
+    def test_mention_bypasses_keyword_length_and_classifier(self):
+        rules = role(keywords=["deploy"], min_length=20, classifier=True, threshold=0.9)
+        self.assertIsNone(self.gate.check(1, rules, "hi", mentioned=True))
+        self.assertEqual(self.gate.check(1, rules, "hi"), "drop")
+
+    def test_require_mention(self):
+        rules = role(require_mention=True)
+        self.assertEqual(self.gate.check(1, rules, "누구든 답해주세요"), "drop")
+        self.assertIsNone(self.gate.check(1, rules, "누구든 답해주세요", mentioned=True))
+        self.assertEqual(self.gate.account_stats(1)["skipped"], {"not_mentioned": 1})
+
+    def test_commands_media_and_empty(self):
+        rules = role(skip_commands=True, skip_media=True)
+        self.assertEqual(self.gate.skip_reason(self.gate.rules_for(rules), "/start", False, False), "command")
+        self.assertEqual(self.gate.skip_reason(self.gate.rules_for(rules), "caption", False, True), "media")
+        self.assertIsNone(self.gate.skip_reason(self.gate.rules_for(rules), "caption", True, True))
+        self.assertEqual(self.gate.skip_reason(self.gate.rules_for(rules), "   ", True, False), "empty")
+
+    def test_min_length_and_classifier(self):
+        self.assertEqual(self.gate.check(1, role(min_length=3), "ㅋ!!"), "drop")
+        rules = role(classifier=True, threshold=0.5)
+        self.assertEqual(self.gate.check(1, rules, "ㅋㅋㅋ"), "drop")
+        self.assertIsNone(self.gate.check(1, rules, "이거 왜 안 되죠?"))
+        self.assertEqual(self.gate.account_stats(1)["skipped"], {"too_short": 1, "classifier": 1})
+
+    def test_on_fail_context(self):
+        self.assertEqual(self.gate.check(1, role(keywords=["x"], on_fail="context"), "hello"), "context")
+        self.assertEqual(self.gate.check(1, role(keywords=["x"], on_fail="unknown"), "hello"), "drop")
+
+    def test_check_without_recording(self):
+        rules = role(keywords=["deploy"])
+        self.assertEqual(self.gate.check(2, rules, "hello", record=False), "drop")
+        self.assertIsNone(self.gate.check(2, rules, "deploy now", record=False))
+        self.assertEqual(self.gate.account_stats(2), {"passed": 0, "skipped": {}})
+
+class CandidateEligibilityTest(unittest.TestCase):
+    """다른 계정의 응답 후보 판정: @언급과 답장 대상은 언급으로 취급"""
+
+    def setUp(self):
+        from app.services.agent_service import TelegramAgentService
+
+        self.service = TelegramAgentService()
+        self.service.account_usernames = {2: "HelperBot"}
+        self.role_info = role(require_mention=True)
+
+    def message(self, text: str):
+        return SimpleNamespace(text=text, media=None, web_preview=None)
+
+    def test_mention_by_username(self):
+        self.assertTrue(self.service.candidate_eligible(self.message("@helperbot 도와줘"), 2, self.role_info, None))
+        self.assertFalse(self.service.candidate_eligible(self.message("도와줘"), 2, self.role_info, None))
+
+    def test_reply_to_candidate(self):
+        self.assertTrue(self.service.candidate_eligible(self.message("도와줘"), 2, self.role_info, 2))
+        self.assertFalse(self.service.candidate_eligible(self.message("도와줘"), 3, self.role_info, 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+
+from app.config import settings
+from app.services.reply_arbiter import ReplyArbiter, message_key
+
+# 응답 조정 정책 (round_robin, priority, mention)과 메시지당 한 번 결정, 동률 처리 테스트
+
+CANDIDATES = [
+    {"account_id": 3, "role_name": "Chatter", "username": "gamma"},
+    {"account_id": 1, "role_name": "Moderator", "username": "alpha"},
+    {"account_id": 2, "role_name": "Admin", "username": "Beta"}
+]
+
+class ReplyArbiterTest(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.object(settings, "AGENT_ROLE_PRIORITY", "Admin,Moderator,Chatter")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def responders(self, arbiter: ReplyArbiter, key: str, candidates=CANDIDATES, text: str = "hello",
+                   reply_to_account=None):
+        """모든 후보 계정이 같은 메시지를 받았을 때 응답하는 계정"""
+        return {
+            candidate["account_id"] for candidate in candidates
+            if arbiter.should_respond(key, candidate["account_id"], -100, lambda: candidates, text, reply_to_account)
+        }
+
+    def test_all_policy_never_asks_for_candidates(self):
+        arbiter = ReplyArbiter(policy="all")
+        candidates = mock.Mock()
+        self.assertTrue(arbiter.should_respond("m1", 1, -100, candidates, "hello"))
+        candidates.assert_not_called()
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            ReplyArbiter(policy="random")
+
+    def test_round_robin_rotates_in_account_order(self):
+        arbiter = ReplyArbiter(policy="round_robin", max_responders=1)
+        picked = [self.responders(arbiter, f"m{index}") for index in range(4)]
+        self.assertEqual(picked, [{1}, {2}, {3}, {1}])
+        self.assertEqual(arbiter.skipped, {1: 2, 2: 3, 3: 3})
+
+    def test_round_robin_multiple_responders(self):
+        arbiter = ReplyArbiter(policy="round_robin", max_responders=2)
+        self.assertEqual(self.responders(arbiter, "m1"), {1, 2})
+        self.assertEqual(self.responders(arbiter, "m2"), {2, 3})
+        self.assertEqual(self.responders(arbiter, "m3"), {3, 1})
+
+    def test_priority_by_role_then_account(self):
+        arbiter = ReplyArbiter(policy="priority", max_responders=1)
+        self.assertEqual(self.responders(arbiter, "m1"), {2})
+
+        # 같은 역할이면 account_id가 작은 계정, 목록에 없는 역할은 마지막
+        tied = [
+            {"account_id": 9, "role_name": "Moderator"},
+            {"account_id": 4, "role_name": "Moderator"},
+            {"account_id": 1, "role_name": "Custom"}
+        ]
+        self.assertEqual(self.responders(arbiter, "m2", tied), {4})
+        arbiter.max_responders = 3
+        self.assertEqual(self.responders(arbiter, "m3", tied), {1, 4, 9})
+
+    def test_mention_and_reply_target(self):
+        arbiter = ReplyArbiter(policy="mention", max_responders=1)
+        self.assertEqual(self.responders(arbiter, "m1", text="@BETA 이거 봐줘"), {2})
+        self.assertEqual(self.responders(arbiter, "m2", text="@alpha @gamma 둘 다"), {1, 3})
+        self.assertEqual(self.responders(arbiter, "m3", reply_to_account=3), {3})
+        # 지목된 계정이 없으면 라운드로빈
+        self.assertEqual(self.responders(arbiter, "m4"), {1})
+        self.assertEqual(self.responders(arbiter, "m5"), {2})
+
+    def test_decision_is_made_once_per_message(self):
+        arbiter = ReplyArbiter(policy="round_robin", max_responders=1)
+        candidates = mock.Mock(return_value=CANDIDATES)
+        results = [arbiter.should_respond("m1", account_id, -100, candidates, "hello") for account_id in (3, 1, 2, 1)]
+        self.assertEqual(results, [False, True, False, True])
+        candidates.assert_called_once()
+
+    def test_single_eligible_candidate_responds(self):
+        arbiter = ReplyArbiter(policy="round_robin", max_responders=1)
+        # 관련성 검사 등으로 다른 계정이 빠지면 남은 계정이 응답
+        only = [CANDIDATES[0]]
+        self.assertTrue(arbiter.should_respond("m1", 3, -100, lambda: only, "hello"))
+        self.assertEqual(arbiter.rr_counters, {})
+
+    def test_decisions_are_bounded(self):
+        arbiter = ReplyArbiter(policy="round_robin", max_responders=1, max_decisions=3)
+        for index in range(5):
+            self.responders(arbiter, f"m{index}")
+        self.assertEqual(list(arbiter.decisions), ["m2", "m3", "m4"])
+
+    def test_message_key_is_account_independent(self):
+        key = message_key(-100, 7, 1700000000.9, "hello")
+        self.assertEqual(key, message_key(-100, 7, 1700000000.1, "hello"))
+        self.assertNotEqual(key, message_key(-100, 7, 1700000000.1, "hello!"))
+        self.assertNotEqual(key, message_key(-100, 8, 1700000000.1, "hello"))
+
+if __name__ == "__main__":
+    unittest.main()
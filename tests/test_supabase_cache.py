@@ -0,0 +1,132 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from app.config import settings
+
+# 접속하지 않는 주소와 형식만 맞춘 키 (클라이언트 생성 시 형식 검사만 수행)
+TEST_SETTINGS = {"SUPABASE_URL": "http://localhost:54321", "SUPABASE_KEY": "eyJhbGciOiJIUzI1NiJ9.e30.test"}
+
+with mock.patch.multiple(settings, **TEST_SETTINGS):
+    from app.services.supabase_service import SupabaseService
+
+# 계정 조회 캐시: 동시 조회 병합, TTL, 조회 중 무효화(세대) 처리와 실패/취소 테스트
+
+class CachedLookupTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        with mock.patch.multiple(settings, **TEST_SETTINGS):
+            self.service = SupabaseService()
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def loader(self, value=None):
+        """release 될 때까지 기다렸다가 호출 횟수가 포함된 계정 반환"""
+        self.calls += 1
+        await self.release.wait()
+        return value or {"id": 1, "phone_number": "+821000", "version": self.calls}
+
+    async def test_concurrent_lookups_share_one_request(self):
+        tasks = [asyncio.create_task(self.service._cached_lookup("id:1", self.loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        self.assertEqual(list(self.service._account_inflight), ["id:1"])
+        self.release.set()
+        results = await asyncio.gather(*tasks)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([result["version"] for result in results], [1] * 5)
+        # 호출마다 복사본을 반환
+        results[0]["version"] = 99
+        self.assertEqual(results[1]["version"], 1)
+        self.assertEqual(self.service._account_inflight, {})
+        self.assertEqual((self.service._cache_hits, self.service._cache_misses), (4, 1))
+
+        # 캐시 적중 (id와 전화번호 키 모두 저장)
+        self.assertEqual((await self.service._cached_lookup("phone:+821000", self.loader))["version"], 1)
+        self.assertEqual(self.calls, 1)
+
+    async def test_get_account_loads_in_thread_once(self):
+        self.service.supabase = mock.Mock()
+        query = self.service.supabase.table.return_value.select.return_value.eq.return_value
+        query.execute.return_value = mock.Mock(data=[{"id": 1, "phone_number": "+821000"}])
+
+        accounts = await asyncio.gather(*(self.service.get_account(1) for _ in range(3)))
+        self.assertEqual(accounts, [{"id": 1, "phone_number": "+821000"}] * 3)
+        query.execute.assert_called_once()
+        self.assertEqual(await self.service.get_account_by_phone("+821000"), accounts[0])
+        query.execute.assert_called_once()
+
+        # 수정하면 무효화 후 수정된 값으로 캐시
+        updated = self.service.supabase.table.return_value.update.return_value.eq.return_value
+        updated.execute.return_value = mock.Mock(data=[{"id": 1, "phone_number": "+821000", "is_active": False}])
+        await self.service.update_account(1, {"is_active": False})
+        self.assertFalse((await self.service.get_account(1))["is_active"])
+        query.execute.assert_called_once()
+
+    async def test_cache_expires_after_ttl(self):
+        self.release.set()
+        with mock.patch.object(settings, "ACCOUNT_CACHE_TTL_SECONDS", 30), \
+                mock.patch("app.services.supabase_service.time") as clock:
+            clock.monotonic.return_value = 100.0
+            await self.service._cached_lookup("id:1", self.loader)
+            clock.monotonic.return_value = 129.0
+            self.assertEqual((await self.service._cached_lookup("id:1", self.loader))["version"], 1)
+            clock.monotonic.return_value = 130.0
+            self.assertEqual((await self.service._cached_lookup("id:1", self.loader))["version"], 2)
+
+    async def test_invalidation_during_lookup_is_not_cached(self):
+        task = asyncio.create_task(self.service._cached_lookup("id:1", self.loader))
+        await asyncio.sleep(0)
+        # 조회 중 수정되면 수정 전 값일 수 있으므로 결과는 반환하되 캐시하지 않음
+        self.service.invalidate_account(1)
+        self.release.set()
+        self.assertEqual((await task)["version"], 1)
+        self.assertNotIn("id:1", self.service._account_cache)
+
+        self.assertEqual((await self.service._cached_lookup("id:1", self.loader))["version"], 2)
+        self.assertIn("id:1", self.service._account_cache)
+        self.service.invalidate_account(1)
+        self.assertEqual(self.service._account_cache, {})
+
+    async def test_clear_invalidates_all_and_missing_is_not_cached(self):
+        self.release.set()
+        await self.service._cached_lookup("all", lambda: self.loader([{"id": 1}, {"id": 2}]))
+        self.assertIn("all", self.service._account_cache)
+        self.service.clear_account_cache()
+        self.assertEqual(self.service._account_cache, {})
+        self.assertEqual(self.service._account_generation, 1)
+
+        async def missing():
+            return None
+
+        self.assertIsNone(await self.service._cached_lookup("id:5", missing))
+        self.assertNotIn("id:5", self.service._account_cache)
+
+    async def test_failure_is_shared_and_not_cached(self):
+        async def failing():
+            await self.release.wait()
+            raise RuntimeError("database unavailable")
+
+        tasks = [asyncio.create_task(self.service._cached_lookup("id:1", failing)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(self.service._account_inflight, {})
+        self.assertEqual(self.service._account_cache, {})
+
+    async def test_cancelled_lookup_cancels_waiters(self):
+        first = asyncio.create_task(self.service._cached_lookup("id:1", self.loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(self.service._cached_lookup("id:1", self.loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(self.service._account_inflight, {})
+
+        # 다음 조회는 새로 요청
+        self.release.set()
+        self.assertEqual((await self.service._cached_lookup("id:1", self.loader))["version"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
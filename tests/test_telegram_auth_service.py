@@ -0,0 +1,109 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+
+# 접속하지 않는 주소와 형식만 맞춘 키 (클라이언트 생성 시 형식 검사만 수행)
+TEST_SETTINGS = {"SUPABASE_URL": "http://localhost:54321", "SUPABASE_KEY": "eyJhbGciOiJIUzI1NiJ9.e30.test"}
+
+with mock.patch.multiple(settings, **TEST_SETTINGS):
+    from app.api import telegram_auth
+    from app.services.telegram_auth_service import MAX_CONNECTION_TEST_CONCURRENCY, TelegramAuthService
+
+# 일괄 연결 테스트의 동시 실행 수 제한, 계정 필터, 중단 시 취소와 API 입력 검증 테스트
+
+def accounts(count: int):
+    return [{"id": index, "session_string": "s", "api_id": 1, "api_hash": "h"} for index in range(1, count + 1)]
+
+class BulkConnectionTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = TelegramAuthService()
+        self.active = 0
+        self.max_active = 0
+        self.probed = []
+
+    async def fake_probe(self, account):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.probed.append(account["id"])
+        try:
+            for _ in range(3):
+                await asyncio.sleep(0)
+            return {"success": True, "account_id": account["id"]}
+        finally:
+            self.active -= 1
+
+    async def run_tests(self, count: int, **kwargs):
+        with mock.patch("app.services.telegram_auth_service.supabase_service.get_all_accounts",
+                        mock.AsyncMock(return_value=accounts(count))) as get_all_accounts, \
+                mock.patch.object(self.service, "_probe_account", side_effect=self.fake_probe):
+            results = [result async for result in self.service.test_connections(**kwargs)]
+        return results, get_all_accounts
+
+    async def test_concurrency_is_limited(self):
+        results, _ = await self.run_tests(10, concurrency=3)
+        self.assertEqual(sorted(result["account_id"] for result in results), list(range(1, 11)))
+        self.assertEqual(self.max_active, 3)
+
+    async def test_concurrency_is_capped(self):
+        await self.run_tests(MAX_CONNECTION_TEST_CONCURRENCY + 10, concurrency=10 ** 6)
+        self.assertEqual(self.max_active, MAX_CONNECTION_TEST_CONCURRENCY)
+
+        self.max_active = 0
+        await self.run_tests(5, concurrency=-1)
+        self.assertEqual(self.max_active, 1)
+
+    async def test_default_concurrency_and_filters(self):
+        with mock.patch.object(settings, "HEALTH_CHECK_CONCURRENCY", 2):
+            _, get_all_accounts = await self.run_tests(6)
+        self.assertEqual(self.max_active, 2)
+        get_all_accounts.assert_awaited_once_with(is_active=True)
+
+        _, get_all_accounts = await self.run_tests(2, account_ids=[1, 2], only_active=False)
+        get_all_accounts.assert_awaited_once_with(account_ids=[1, 2])
+
+    async def test_closing_stream_cancels_pending_probes(self):
+        with mock.patch("app.services.telegram_auth_service.supabase_service.get_all_accounts",
+                        mock.AsyncMock(return_value=accounts(20))), \
+                mock.patch.object(self.service, "_probe_account", side_effect=self.fake_probe):
+            stream = self.service.test_connections(concurrency=2)
+            await stream.__anext__()
+            await stream.aclose()
+            await asyncio.sleep(0)
+        self.assertEqual(self.active, 0)
+        self.assertLess(len(self.probed), 20)
+
+class BulkConnectionApiTest(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(telegram_auth.router)
+        self.client = TestClient(app)
+
+    def test_concurrency_out_of_range_is_rejected(self):
+        for concurrency in (0, MAX_CONNECTION_TEST_CONCURRENCY + 1):
+            with self.subTest(concurrency=concurrency):
+                response = self.client.post("/telegram-auth/test-connections", json={"concurrency": concurrency})
+                self.assertEqual(response.status_code, 422)
+
+    def test_results_are_streamed_as_ndjson(self):
+        async def results(**kwargs):
+            self.assertEqual(kwargs, {"account_ids": [1, 2], "only_active": True, "concurrency": 5})
+            for account_id in kwargs["account_ids"]:
+                yield {"success": True, "account_id": account_id}
+
+        with mock.patch.object(telegram_auth.telegram_auth_service, "test_connections", results):
+            response = self.client.post(
+                "/telegram-auth/test-connections", json={"account_ids": [1, 2], "concurrency": 5}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([line["account_id"] for line in lines], [1, 2])
+
+if __name__ == "__main__":
+    unittest.main()
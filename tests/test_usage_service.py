@@ -0,0 +1,160 @@
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import Base
+from app.models.llm_usage import LlmUsageRollup
+from app.services.usage_service import UsageAccountant, hour_bucket, to_utc_naive
+
+# 토큰/비용 누적과 집계 저장, 역할별 하루 토큰 한도, 사용량 조회 기간 변환 테스트
+
+class UsageTestCase(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(engine)
+        self.sessions = sessionmaker(bind=engine, expire_on_commit=False)
+
+        @contextmanager
+        def runtime_session():
+            db = self.sessions()
+            try:
+                yield db
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+        patch = mock.patch("app.services.usage_service.runtime_session", runtime_session)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.accountant = UsageAccountant()
+
+    def rollups(self):
+        db = self.sessions()
+        try:
+            return db.query(LlmUsageRollup).order_by(LlmUsageRollup.model).all()
+        finally:
+            db.close()
+
+class UsageAccountantTest(UsageTestCase):
+    def test_cost_uses_longest_model_prefix(self):
+        self.assertAlmostEqual(self.accountant.cost("gpt-4o-mini-2024-07-18", 1000, 1000), 0.00075)
+        self.assertAlmostEqual(self.accountant.cost("gpt-4o-2024-05-13", 1000, 0), 0.005)
+        self.assertEqual(self.accountant.cost("unknown-model", 1000, 1000), 0.0)
+
+    def test_flush_aggregates_calls_into_rollups(self):
+        self.accountant.record(1, 10, "gpt-4o", "sk-...aaaa", 100, 50)
+        self.accountant.record(1, 10, "gpt-4o", "sk-...aaaa", 200, 25)
+        self.accountant.record(1, 10, "gpt-3.5-turbo", "sk-...aaaa", 10, 10)
+        self.assertEqual(len(self.accountant.pending), 2)
+        self.accountant.flush()
+        self.assertEqual(self.accountant.pending, {})
+
+        self.accountant.record(1, 10, "gpt-4o", "sk-...aaaa", 1000, 0)
+        self.accountant.flush()
+
+        turbo, gpt4o = self.rollups()
+        self.assertEqual((gpt4o.calls, gpt4o.prompt_tokens, gpt4o.completion_tokens), (3, 1300, 75))
+        self.assertAlmostEqual(gpt4o.cost_usd, self.accountant.cost("gpt-4o", 1300, 75))
+        self.assertEqual((turbo.calls, turbo.account_id), (1, 10))
+        self.assertEqual(gpt4o.bucket_start, hour_bucket(datetime.utcnow()))
+
+    def test_failed_flush_keeps_pending_totals(self):
+        self.accountant.record(1, 10, "gpt-4o", "sk-...aaaa", 100, 50)
+        with mock.patch.object(self.accountant, "_add_to_rollup", side_effect=RuntimeError("database unavailable")):
+            self.accountant.flush()
+        self.assertEqual(list(self.accountant.pending.values()), [[1, 100, 50, self.accountant.cost("gpt-4o", 100, 50)]])
+        self.accountant.flush()
+        (row,) = self.rollups()
+        self.assertEqual(row.calls, 1)
+
+    def test_budget_exhaustion(self):
+        role_info = {"id": 1, "daily_token_budget": 1000}
+        self.assertFalse(self.accountant.budget_exhausted({"id": 1, "daily_token_budget": None}))
+        self.accountant.record(1, 10, "gpt-4o", "sk-...aaaa", 600, 100)
+        self.accountant.flush()
+        self.assertFalse(self.accountant.budget_exhausted(role_info))
+
+        # 저장되지 않은 누적분도 오늘 사용량에 포함
+        self.accountant.record(1, 10, "gpt-4o", "sk-...aaaa", 250, 50)
+        self.assertEqual(self.accountant.tokens_used_today(1), 1000)
+        self.assertTrue(self.accountant.budget_exhausted(role_info, record=False))
+        self.assertEqual(self.accountant.budget_skipped, {})
+        self.assertTrue(self.accountant.budget_exhausted(role_info))
+        self.assertEqual(self.accountant.budget_skipped, {1: 1})
+
+    def test_budget_loads_stored_usage_and_resets_daily(self):
+        db = self.sessions()
+        db.add(LlmUsageRollup(
+            bucket_start=hour_bucket(datetime.utcnow()), agent_role_id=2, account_id=10, model="gpt-4o",
+            api_key_label="sk-...aaaa", calls=1, prompt_tokens=400, completion_tokens=100, cost_usd=0
+        ))
+        db.add(LlmUsageRollup(
+            bucket_start=hour_bucket(datetime.utcnow()) - timedelta(days=2), agent_role_id=2, account_id=10,
+            model="gpt-4o", api_key_label="sk-...aaaa", calls=1, prompt_tokens=5000, completion_tokens=0, cost_usd=0
+        ))
+        db.commit()
+        db.close()
+        self.assertEqual(self.accountant.tokens_used_today(2), 500)
+        self.assertTrue(self.accountant.budget_exhausted({"id": 2, "daily_token_budget": 500}))
+
+        self.accountant.daily_date -= timedelta(days=1)
+        self.accountant.daily_tokens[2] = 10 ** 6
+        self.assertEqual(self.accountant.tokens_used_today(2), 500)
+
+    def test_exhausted_role_is_not_an_arbitration_candidate(self):
+        from app.services.agent_service import TelegramAgentService
+
+        service = TelegramAgentService()
+        message = SimpleNamespace(text="hello", media=None, web_preview=None)
+        role_info = {"id": 3, "role_name": "Chatter", "daily_token_budget": 100}
+        with mock.patch("app.services.agent_service.usage_accountant", self.accountant):
+            self.assertTrue(service.candidate_eligible(message, 2, role_info, None))
+            self.accountant.record(3, 2, "gpt-4o", "sk-...aaaa", 100, 0)
+            self.assertFalse(service.candidate_eligible(message, 2, role_info, None))
+        self.assertEqual(self.accountant.budget_skipped, {})
+
+class UsageRangeTest(UsageTestCase):
+    def test_to_utc_naive(self):
+        self.assertEqual(to_utc_naive("2026-01-01T09:00:00+09:00"), datetime(2026, 1, 1))
+        self.assertEqual(
+            to_utc_naive(datetime(2026, 1, 1, 9, tzinfo=timezone(timedelta(hours=9)))), datetime(2026, 1, 1)
+        )
+        self.assertEqual(to_utc_naive(datetime(2026, 1, 1, 9)), datetime(2026, 1, 1, 9))
+
+    def test_usage_endpoint_converts_aware_range(self):
+        from app.api import agents
+        from app.database import get_db
+
+        db = self.sessions()
+        for hour in (23, 24, 25):
+            db.add(LlmUsageRollup(
+                bucket_start=datetime(2025, 12, 31) + timedelta(hours=hour), agent_role_id=1, account_id=10,
+                model="gpt-4o", api_key_label="sk-...aaaa", calls=1, prompt_tokens=10, completion_tokens=0, cost_usd=0
+            ))
+        db.commit()
+
+        app = FastAPI()
+        app.include_router(agents.router)
+        app.dependency_overrides[get_db] = lambda: db
+        response = TestClient(app).get("/agents/usage", params={
+            "since": "2026-01-01T09:00:00+09:00", "until": "2026-01-01T10:00:00+09:00"
+        })
+        db.close()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total"]["calls"], 1)
+        self.assertEqual(response.json()["since"], "2026-01-01T00:00:00")
+
+if __name__ == "__main__":
+    unittest.main()